@@ -0,0 +1,63 @@
+
+# Convert Dan Burton's Milky Way overlay (MilkyWay.xls, a SkyMap Pro
+# overlay in a spreadsheet) to milkyway.csv. Needs xlrd to read the
+# spreadsheet; the CSV is what the catalogs read.
+#
+# Each row of milkyway.csv is one outline: its kind ('edge', 'dark' or
+# 'cloud'), its name, then alternating ra (hours),dec (degrees)
+# columns, like constellations.csv.
+
+import csv
+import xlrd
+
+sheet = xlrd.open_workbook('DanBurton/MilkyWay.xls').sheet_by_index(0)
+writer = csv.writer(open('milkyway.csv', 'w'))
+
+kind = 'edge'
+name = ''
+current_line = []
+line_kind = line_name = None
+resumed = False
+
+def write_line():
+    if len(current_line) > 2:
+        writer.writerow([line_kind, line_name] + [v for ra, dec in current_line 
+            for v in ('%.6f' % ra, '%.4f' % dec)])
+
+for r in range(sheet.nrows):
+    row = sheet.row_values(r)
+    command = str(row[0]).strip()
+
+    if command.startswith(';'):
+        comment = command.strip('; ')
+        if comment.startswith('Dark'):
+            kind = 'dark'
+        elif 'Magellanic' in comment:
+            kind = 'cloud'
+        if comment:
+            name = comment
+        continue
+
+    if command == '':
+        # The overlay breaks a line to wrap it through 0h, then draws
+        # its last points again
+        resumed = True
+        continue
+
+    if command.startswith('MOVE'):
+        write_line()
+        current_line = []
+        line_kind, line_name = kind, name
+        resumed = False
+
+    if command.startswith('MOVE') or command.startswith('DRAW'):
+        hh, mm, ss = [float(v) for v in command.split()[1:]]
+        dd, am = [abs(float(v)) for v in str(row[1]).split()]
+        sign = -1 if row[9] == -1 else 1
+        point = (hh + mm / 60 + ss / 3600, sign * (dd + am / 60))
+        if resumed and point in current_line[-2:]:
+            continue
+        resumed = False
+        current_line.append(point)
+
+write_line()
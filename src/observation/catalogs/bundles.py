@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+from constellations import CONSTELLATION_NAMES
+from query import Magnitude, Cone
+from jsontool import CATALOGS, CatalogsGeoJSONEncoder, build_parser
+
+### Constellation Bundles
+# Everything needed to draw one constellation's chart, in one file per
+# constellation: the stars and deep sky objects in its chart region,
+# its lines and boundary, and the lines and boundaries of the
+# neighbouring constellations that reach into the region.
+#
+# A constellation's chart region is a circle around the center of its
+# lines and boundary, large enough to take in all of them plus a
+# margin. Circles don't care about the 0h line or the poles, which
+# matters for constellations like Pisces, Octans and Ursa Minor.
+#
+# The 88 bundles are built in parallel by a process pool. Each process
+# loads the catalogs once, when it starts, and then builds bundles for
+# whichever constellations it's given.
+
+INDEX_FILE = 'index.json'
+
+# The margin around a constellation's lines, in degrees
+MARGIN = 2.0
+
+
+# A unit vector for a ra and dec in degrees
+def _vector(ra, dec):
+    ra, dec = math.radians(ra), math.radians(dec)
+    return (math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra),
+            math.sin(dec))
+
+
+# The positions on the lines and boundaries of constellations
+def _positions(constellations):
+    return [p for c in constellations for line in c.lines + c.boundaries 
+            for p in line.positions]
+
+
+#### chart_region
+# The chart region for the given constellations (the same constellation
+# from the lines and boundary catalogs), as a (ra, dec, radius) circle
+# in degrees, or `None` if they have no lines or boundary.
+def chart_region(constellations, margin=MARGIN):
+    positions = _positions(constellations)
+    if not positions:
+        return None
+
+    vectors = [_vector(p.ra.degrees, p.dec.degrees) for p in positions]
+    x, y, z = [sum(v[i] for v in vectors) for i in range(3)]
+    norm = math.sqrt(x * x + y * y + z * z)
+    if norm == 0:
+        x, y, z, norm = 0, 0, 1, 1
+    center = (x / norm, y / norm, z / norm)
+
+    radius = max(math.degrees(math.acos(max(-1, min(1, 
+        sum(a * b for a, b in zip(center, v)))))) for v in vectors)
+    return (math.degrees(math.atan2(center[1], center[0])) % 360,
+            math.degrees(math.asin(center[2])), 
+            min(radius + margin, 180))
+
+
+# Whether any line or boundary position of a constellation is in a
+# region.
+def _reaches(constellation, region):
+    ra, dec, radius = region
+    center = _vector(ra, dec)
+    cos_radius = math.cos(math.radians(radius))
+    return any(sum(a * b for a, b in zip(center, 
+        _vector(p.ra.degrees, p.dec.degrees))) >= cos_radius
+        for p in _positions([constellation]))
+
+
+#### build_bundle
+# The bundle for a constellation as a GeoJSON FeatureCollection dict,
+# from a dict of loaded catalogs by kind. Returns `None` for a
+# constellation without lines or a boundary.
+def build_bundle(abbr, catalogs, magnitude=6, margin=MARGIN):
+    outlines = [catalogs[kind][abbr] 
+            for kind in ('constellations', 'boundaries')
+            if kind in catalogs and abbr in catalogs[kind]]
+    region = chart_region(outlines, margin)
+    if region is None:
+        return None
+
+    query = Magnitude(faintest=magnitude) & Cone(*region)
+    objects = []
+    for kind in ('hyg', 'ngc'):
+        if kind in catalogs:
+            objects.extend(query.run(catalogs[kind]))
+    for kind in ('constellations', 'boundaries'):
+        if kind in catalogs:
+            objects.extend(c for c in catalogs[kind].values() 
+                    if c.abbr == abbr or _reaches(c, region))
+
+    return {
+        "type": "FeatureCollection",
+        "constellation": abbr,
+        "name": CONSTELLATION_NAMES[abbr],
+        "region": {"center": [region[0], region[1]], "radius": region[2]},
+        "features": objects,
+    }
+
+
+# The catalogs and options of a pool process, set by `_start_process`
+_catalogs = {}
+_options = {}
+
+def _start_process(paths, options):
+    for kind, path in paths.items():
+        with open(path) as stream:
+            _catalogs[kind] = CATALOGS[kind](stream)
+    _options.update(options)
+
+
+# Build and write one bundle in a pool process, returning its index
+# entry.
+def _write_bundle(abbr):
+    bundle = build_bundle(abbr, _catalogs, _options['magnitude'],
+            _options['margin'])
+    if bundle is None:
+        return {"abbr": abbr, "file": None}
+
+    encoder = CatalogsGeoJSONEncoder(separators=(',', ':'))
+    encoder.args = build_parser().parse_args([])
+    path = os.path.join(_options['directory'], abbr.lower() + '.json')
+    with open(path, 'w') as f:
+        for chunk in encoder.iterencode(bundle):
+            f.write(chunk)
+
+    return {
+        "abbr": abbr, 
+        "name": bundle["name"],
+        "file": os.path.basename(path),
+        "region": bundle["region"],
+        "objects": len(bundle["features"]),
+    }
+
+
+#### build_bundles
+# Write the bundles for the given constellations (all 88 by default)
+# to `directory`, from the catalog files given by kind (i.e. `{'ngc':
+# 'ngcic.csv'}`), using `processes` processes. Writes and returns the
+# index of the bundles.
+def build_bundles(directory, paths, abbrs=None, magnitude=6, 
+        margin=MARGIN, processes=None):
+    os.makedirs(directory, exist_ok=True)
+    if abbrs is None:
+        abbrs = sorted(CONSTELLATION_NAMES)
+    paths = dict((k, v) for k, v in paths.items() if v)
+    options = {'directory': directory, 'magnitude': magnitude,
+            'margin': margin}
+
+    with ProcessPoolExecutor(max_workers=processes, 
+            initializer=_start_process, 
+            initargs=(paths, options)) as executor:
+        index = list(executor.map(_write_bundle, abbrs))
+
+    with open(os.path.join(directory, INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
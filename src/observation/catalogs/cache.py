@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+### Export Cache
+# Results of exports and renders, keyed by the parameters that produced
+# them. Entries are kept in memory in LRU order and written to a
+# directory on disk, which is trimmed to a maximum size by dropping the
+# least recently used entries.
+#
+# Every entry records the fingerprint of the catalog files it was made
+# from (their paths, sizes and modification times). An entry whose
+# fingerprint doesn't match the current catalogs is stale; it is
+# removed and counted as an invalidation.
+
+CACHE_SUFFIX = '.json'
+
+
+#### canonical_key
+# The cache key for a dict of parameters. Parameters that are unset
+# (`None` or `False`) are dropped, so adding a new option doesn't change
+# the keys of existing entries.
+def canonical_key(params):
+    params = dict((k, v) for k, v in params.items() 
+            if v is not None and v is not False)
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'),
+            default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+#### catalog_fingerprint
+# A fingerprint of the given catalog files that changes whenever any of
+# them does.
+def catalog_fingerprint(paths):
+    fingerprint = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.update('{}\0{}\0{}\n'.format(os.path.abspath(path), 
+            stat.st_size, stat.st_mtime_ns).encode('utf-8'))
+    return fingerprint.hexdigest()
+
+
+#### ExportCache
+# The cache itself. Values must be JSON-encodable. Without a
+# `directory` the cache is memory only.
+#
+#   cache = ExportCache('.cache', max_bytes=64 * 1024 * 1024)
+#   fingerprint = catalog_fingerprint(['ngcic.csv'])
+#   result = cache.get(params, fingerprint)
+#   if result is None:
+#       result = export(...)
+#       cache.put(params, fingerprint, result)
+#
+class ExportCache(object):
+
+    def __init__(self, directory=None, max_items=64, 
+            max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__memory = OrderedDict()
+        self.__stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 
+                'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    # A copy of the hit, miss, invalidation and eviction counts
+    @property
+    def stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def __remember(self, key, fingerprint, value):
+        self.__memory[key] = (fingerprint, value)
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.max_items:
+            self.__memory.popitem(last=False)
+
+    def __read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self.__path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.__touch(key)
+        return entry['fingerprint'], entry['value']
+
+    # Keep recently used entries from being trimmed from the disk
+    def __touch(self, key):
+        if self.directory is None:
+            return
+        try:
+            os.utime(self.__path(key))
+        except FileNotFoundError:
+            pass
+
+    def __discard(self, key):
+        self.__memory.pop(key, None)
+        if self.directory is not None:
+            try:
+                os.remove(self.__path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, params, fingerprint):
+        key = canonical_key(params)
+        with self.__lock:
+            entry = self.__memory.get(key)
+            kind = 'memory_hits'
+            if entry is not None:
+                self.__touch(key)
+            else:
+                entry = self.__read(key)
+                kind = 'disk_hits'
+
+            if entry is not None and entry[0] != fingerprint:
+                self.__discard(key)
+                self.__stats['invalidations'] += 1
+                entry = None
+
+            if entry is None:
+                self.__stats['misses'] += 1
+                return None
+
+            self.__remember(key, *entry)
+            self.__stats['hits'] += 1
+            self.__stats[kind] += 1
+            return entry[1]
+
+    def put(self, params, fingerprint, value):
+        key = canonical_key(params)
+        with self.__lock:
+            self.__remember(key, fingerprint, value)
+            if self.directory is None:
+                return
+
+            # Write to a temporary file first so readers never see half
+            # an entry.
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, 
+                    suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'params': params, 'fingerprint': fingerprint,
+                    'value': value}, f, default=str)
+            os.replace(temp_path, self.__path(key))
+            self.__trim(keep=key)
+
+    # Remove the least recently used entries from the disk until the
+    # total size is under `max_bytes`, keeping the entry just written.
+    def __trim(self, keep=None):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_SUFFIX):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for mtime, size, name in entries)
+
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep + CACHE_SUFFIX:
+                continue
+            os.remove(os.path.join(self.directory, name))
+            self.__memory.pop(name[:-len(CACHE_SUFFIX)], None)
+            self.__stats['evictions'] += 1
+            total -= size
+
+    def clear(self):
+        with self.__lock:
+            self.__memory.clear()
+            if self.directory is not None:
+                for name in os.listdir(self.directory):
+                    if name.endswith(CACHE_SUFFIX):
+                        os.remove(os.path.join(self.directory, name))
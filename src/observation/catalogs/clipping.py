@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+
+from utils import Position, EquatorialCoordinate
+from constellations import Constellation, Line
+
+### Clipping
+# Clip constellation lines and boundaries to a region of the sky, so a
+# chart of a region only gets the parts of them it shows.
+#
+# Lines between positions are great circle arcs, so clipping happens on
+# the sphere, with positions as unit vectors. Every region is built out
+# of caps: the part of the sphere within some angle of an axis. A cone
+# is a single cap. A box between two right ascensions and two
+# declinations is up to four: two caps around the poles for the
+# declinations and two hemispheres (caps of 90°) for the right
+# ascensions. A box more than 180° wide isn't the intersection of its
+# hemispheres, so it's clipped as two boxes. Caps don't have edges at
+# 0h or at the poles, so neither need any special handling.
+#
+# Where an arc crosses the edge of a cap is solved for directly, so an
+# arc that dips into a cap between two positions outside it is kept
+# too. Polygons (boundaries) are clipped by following the edge of the
+# cap from where they leave it to where they enter it again.
+
+# A little slack for positions that are on the edge of a cap
+EPSILON = 1e-12
+
+
+# A unit vector for a ra and dec in degrees
+def vector(ra, dec):
+    ra, dec = math.radians(ra), math.radians(dec)
+    return (math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra),
+            math.sin(dec))
+
+# The ra and dec in degrees of a vector
+def coordinates(v):
+    return (math.degrees(math.atan2(v[1], v[0])) % 360,
+            math.degrees(math.asin(max(-1, min(1, v[2])))))
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0])
+
+def _normalize(v):
+    norm = math.sqrt(_dot(v, v))
+    return (v[0] / norm, v[1] / norm, v[2] / norm)
+
+# Two unit vectors perpendicular to `n` and each other
+def _basis(n):
+    e1 = _normalize(_cross(n, (0, 0, 1) if abs(n[2]) < 0.9 else (1, 0, 0)))
+    return e1, _cross(n, e1)
+
+
+#### in_polygon
+#### Polygon
+# A ring of vectors, prepared for testing whether vectors are inside it.
+# Rings are taken to fit in the hemisphere around the mean of their
+# vertices, so they can be projected onto the plane touching the sphere
+# there (a gnomonic projection, which keeps great circle arcs straight)
+# and tested there. Vectors outside the cap around that mean that holds
+# every vertex are outside without going around the ring.
+class Polygon(object):
+
+    def __init__(self, ring):
+        total = (sum(v[0] for v in ring), sum(v[1] for v in ring),
+                sum(v[2] for v in ring))
+        self.center = None
+        if _dot(total, total) < EPSILON:
+            return
+        self.center = center = _normalize(total)
+        self.e1, self.e2 = _basis(center)
+        self.cos_radius = min([1] + [_dot(v, center) for v in ring])
+        self.points = [self.project(v) for v in ring 
+                if _dot(v, center) > EPSILON]
+
+    def project(self, v):
+        d = _dot(v, self.center)
+        return _dot(v, self.e1) / d, _dot(v, self.e2) / d
+
+    def contains(self, p):
+        if self.center is None:
+            return False
+        d = _dot(p, self.center)
+        if d <= EPSILON or d < self.cos_radius - EPSILON:
+            return False
+
+        x, y = self.project(p)
+        points = self.points
+        inside = False
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+            if (y1 > y) != (y2 > y) and \
+                    x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+
+# Whether the vector `p` is inside a ring of vectors
+def in_polygon(p, ring):
+    return Polygon(ring).contains(p)
+
+
+### Cap
+# The part of the sphere within `radius` degrees of the axis at `ra`,
+# `dec`.
+class Cap(object):
+
+    def __init__(self, ra, dec, radius):
+        self.axis = vector(ra, dec)
+        self.radius = radius
+        self.cos_radius = math.cos(math.radians(radius))
+        self.e1, self.e2 = _basis(self.axis)
+
+    def __repr__(self):
+        return "Cap(axis={}, radius={})".format(coordinates(self.axis), 
+                self.radius)
+
+    # Whether each of the given vectors is inside the cap
+    def inside(self, vectors):
+        axis, cos_radius = self.axis, self.cos_radius - EPSILON
+        return [_dot(v, axis) >= cos_radius for v in vectors]
+
+    # The points where the great circle arc from `a` to `b` crosses the
+    # edge of the cap, in order from `a`. The arc is `a cos φ + u sin φ`
+    # for φ from 0 to the angle between `a` and `b`, so the crossings
+    # are where `R cos(φ - α)` is the cosine of the radius.
+    def crossings(self, a, b):
+        cos_angle = _dot(a, b)
+        w = (b[0] - a[0] * cos_angle, b[1] - a[1] * cos_angle, 
+                b[2] - a[2] * cos_angle)
+        sin_angle = math.sqrt(_dot(w, w))
+        if sin_angle < EPSILON:
+            return []
+        u = (w[0] / sin_angle, w[1] / sin_angle, w[2] / sin_angle)
+        angle = math.atan2(sin_angle, cos_angle)
+
+        p, q = _dot(a, self.axis), _dot(u, self.axis)
+        r = math.hypot(p, q)
+        if r < EPSILON or abs(self.cos_radius) >= r:
+            return []
+        alpha, beta = math.atan2(q, p), math.acos(self.cos_radius / r)
+
+        phis = sorted(phi % (2 * math.pi) for phi in (alpha - beta, 
+            alpha + beta))
+        return [tuple(a[i] * math.cos(phi) + u[i] * math.sin(phi) 
+            for i in range(3)) for phi in phis if EPSILON < phi < angle]
+
+    # The angle of a vector around the axis
+    def angle(self, v):
+        return math.atan2(_dot(v, self.e2), _dot(v, self.e1))
+
+    # The vector on the edge of the cap at the given angle around the
+    # axis
+    def edge(self, theta):
+        sin_radius = math.sqrt(max(0, 1 - self.cos_radius ** 2))
+        c, s = math.cos(theta) * sin_radius, math.sin(theta) * sin_radius
+        return tuple(self.axis[i] * self.cos_radius + self.e1[i] * c + 
+                self.e2[i] * s for i in range(3))
+
+    # The points along the edge of the cap strictly between two angles,
+    # going `turn` radians (negative for clockwise) from `theta`, every
+    # `resolution` degrees or so.
+    def edge_points(self, theta, turn, resolution):
+        length = abs(turn) * math.degrees(math.sqrt(max(0, 
+            1 - self.cos_radius ** 2)))
+        steps = max(1, int(math.ceil(length / resolution)))
+        return [self.edge(theta + turn * i / steps) for i in range(1, steps)]
+
+    #### clip_line
+    # The parts of a line of vectors inside the cap, as lines of vectors
+    def clip_line(self, line):
+        flags = self.inside(line)
+        lines = []
+        current = [line[0]] if flags[0] else None
+        for a, b, inside_b in zip(line, line[1:], flags[1:]):
+            for p in self.crossings(a, b):
+                if current is None:
+                    current = [p]
+                else:
+                    current.append(p)
+                    lines.append(current)
+                    current = None
+            # Touching the edge without crossing it
+            if inside_b and current is None:
+                current = [b]
+            elif inside_b:
+                current.append(b)
+            elif current is not None:
+                lines.append(current)
+                current = None
+        if current is not None:
+            lines.append(current)
+        return [l for l in lines if len(l) > 1]
+
+    #### clip_ring
+    # The parts of a closed ring of vectors inside the cap, as closed
+    # rings, with points along the edge of the cap every `resolution`
+    # degrees where the ring is cut.
+    def clip_ring(self, ring, resolution=1):
+        if ring[0] == ring[-1]:
+            ring = ring[:-1]
+        flags = self.inside(ring)
+        if all(flags):
+            return [ring + ring[:1]]
+
+        # The parts of the ring inside the cap, from where the ring
+        # enters the cap to where it leaves it, walking the ring from a
+        # position outside the cap.
+        start = flags.index(False)
+        ring = ring[start:] + ring[:start]
+        parts = self.clip_line(ring + ring[:1])
+
+        if not parts:
+            # Either the cap is inside the ring or they don't meet
+            if in_polygon(self.axis, ring):
+                edge = self.edge_points(0, 2 * math.pi, resolution)
+                return [[self.edge(0)] + edge + [self.edge(0)]]
+            return []
+
+        # Follow the edge of the cap from each exit to the next entry, 
+        # along the part of the edge that's inside the ring
+        entries = [(self.angle(p[0]), i) for i, p in enumerate(parts)]
+        rings = []
+        unused = set(range(len(parts)))
+        while unused:
+            first = min(unused)
+            current = first
+            points = []
+            while True:
+                unused.discard(current)
+                points.extend(parts[current])
+                theta = self.angle(parts[current][-1])
+                turn, current = self.__next_entry(theta, entries, ring)
+                points.extend(self.edge_points(theta, turn, resolution))
+                if current == first or current not in unused:
+                    break
+            rings.append(points + points[:1])
+        return rings
+
+    # The turn along the edge of the cap from the angle `theta` to the
+    # next entry into the cap, and that entry's part, going whichever
+    # way around the edge is inside the ring.
+    def __next_entry(self, theta, entries, ring):
+        tau = 2 * math.pi
+        ahead = min(entries, key=lambda e: (e[0] - theta) % tau)
+        behind = min(entries, key=lambda e: (theta - e[0]) % tau)
+        turn = (ahead[0] - theta) % tau
+        if in_polygon(self.edge(theta + turn / 2), ring):
+            return turn, ahead[1]
+        return -((theta - behind[0]) % tau), behind[1]
+
+
+#### Clip
+# A region of the sky to clip lines and polygons to, as one or more
+# groups of caps. Everything inside all of the caps of any of the groups
+# is inside the region.
+class Clip(object):
+
+    def __init__(self, groups):
+        self.groups = groups
+
+    # A cone of `radius` degrees around a ra and dec in degrees
+    @classmethod
+    def cone(cls, ra, dec, radius):
+        return cls([[Cap(ra, dec, radius)]])
+
+    # A box from `ra_min` to `ra_max` (which may wrap through 0h) and
+    # `dec_min` to `dec_max`, in degrees
+    @classmethod
+    def box(cls, ra_min, ra_max, dec_min, dec_max):
+        caps = []
+        if dec_min > -90:
+            caps.append(Cap(0, 90, 90 - dec_min))
+        if dec_max < 90:
+            caps.append(Cap(0, -90, 90 + dec_max))
+
+        width = (ra_max - ra_min) % 360 or (360 if ra_max != ra_min else 0)
+        if width >= 360:
+            return cls([caps])
+        if width > 180:
+            middle = ra_min + width / 2
+            return cls(cls.box(ra_min, middle, dec_min, dec_max).groups +
+                    cls.box(middle, ra_max, dec_min, dec_max).groups)
+
+        # The hemispheres east of ra_min and west of ra_max
+        caps.append(Cap(ra_min + 90, 0, 90))
+        caps.append(Cap(ra_max - 90, 0, 90))
+        return cls([caps])
+
+    #### lines
+    # The parts of a line of (ra, dec) points in degrees inside the
+    # region, as lines of (ra, dec) points
+    def lines(self, points):
+        lines = []
+        for caps in self.groups:
+            parts = [[vector(ra, dec) for ra, dec in points]]
+            for cap in caps:
+                parts = [clipped for part in parts 
+                        for clipped in cap.clip_line(part)]
+            lines.extend([coordinates(v) for v in part] for part in parts)
+        return lines
+
+    #### polygons
+    # The parts of a closed ring of (ra, dec) points in degrees inside
+    # the region, as closed rings of (ra, dec) points
+    def polygons(self, points, resolution=1):
+        rings = []
+        for caps in self.groups:
+            parts = [[vector(ra, dec) for ra, dec in points]]
+            for cap in caps:
+                parts = [clipped for part in parts 
+                        for clipped in cap.clip_ring(part, resolution)]
+            rings.extend([coordinates(v) for v in part] for part in parts)
+        return rings
+
+    #### constellation
+    # A copy of a `Constellation` with its lines and boundaries clipped
+    # to the region, or `None` if none of it is inside.
+    def constellation(self, o, resolution=1):
+        def line(points):
+            return Line([Position(EquatorialCoordinate(ra, degrees=True),
+                EquatorialCoordinate(dec, degrees=True)) 
+                for ra, dec in points])
+        def points(line):
+            return [(p.ra.degrees, p.dec.degrees) for p in line.positions]
+
+        lines = [line(clipped) for l in o.lines 
+                for clipped in self.lines(points(l))]
+        boundaries = [line(clipped) for b in o.boundaries
+                for clipped in self.polygons(points(b), resolution)]
+        if not lines and not boundaries:
+            return None
+        return Constellation(o.abbr, o.name, lines, boundaries)
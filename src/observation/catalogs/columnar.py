@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import sys
+import mmap
+import json
+from array import array
+from collections import OrderedDict
+
+from objects import OBJECT_TYPES, CelestialObject
+
+### Columnar Catalogs
+# Catalogs written as a directory of typed column arrays, one file per
+# column, plus a `schema.json` describing them. Readers can memory-map
+# the columns (with `numpy.memmap` or `ColumnarCatalog` below) and start
+# immediately, without parsing anything, and only the columns that are
+# actually touched get paged in.
+#
+# Every column is a raw little-endian array. The schema gives each
+# column's file, numpy dtype and length. Strings are stored as a column
+# of UTF-8 bytes and a column of offsets into it: object `i`'s id is
+# `id_data[id_offsets[i]:id_offsets[i + 1]]`. Aliases have one more
+# level, `alias_index`, giving the range of alias numbers for each
+# object.
+#
+# Missing sizes and angles are NaN.
+
+SCHEMA_FILE = 'schema.json'
+SCHEMA_FORMAT = 'observation-charts-columns'
+SCHEMA_VERSION = 1
+
+# The array type code for unsigned 32 bit integers
+UINT32 = 'I' if array('I').itemsize == 4 else 'L'
+
+# The array type code and numpy dtype for each column
+COLUMNS = OrderedDict([
+    ('ra', ('d', '<f8')),
+    ('dec', ('d', '<f8')),
+    ('magnitude', ('f', '<f4')),
+    ('type', ('B', '|u1')),
+    ('size_major', ('f', '<f4')),
+    ('size_minor', ('f', '<f4')),
+    ('angle', ('f', '<f4')),
+    ('id_data', ('B', '|u1')),
+    ('id_offsets', (UINT32, '<u4')),
+    ('alias_data', ('B', '|u1')),
+    ('alias_offsets', (UINT32, '<u4')),
+    ('alias_index', (UINT32, '<u4')),
+])
+
+# The string columns, as (data, offsets)
+STRINGS = {
+    'ids': ('id_data', 'id_offsets'),
+    'aliases': ('alias_data', 'alias_offsets'),
+}
+
+NAN = float('nan')
+
+
+# Append the given strings to a data and offsets column pair
+def _append_strings(data, offsets, strings):
+    for s in strings:
+        data.frombytes(s.encode('utf-8'))
+        offsets.append(len(data))
+
+
+#### build_columns
+# Build the column arrays for the given `CelestialObject`s, as an
+# OrderedDict of column name to `array`.
+def build_columns(objects):
+    objects = [o for o in objects if isinstance(o, CelestialObject)]
+    columns = OrderedDict((name, array(typecode)) 
+            for name, (typecode, dtype) in COLUMNS.items())
+
+    columns['ra'].extend(o.ra.degrees for o in objects)
+    columns['dec'].extend(o.dec.degrees for o in objects)
+    columns['magnitude'].extend(o.magnitude for o in objects)
+    columns['type'].extend(o.type for o in objects)
+    columns['size_major'].extend(o.size.major if o.size is not None 
+            else NAN for o in objects)
+    columns['size_minor'].extend(o.size.minor if o.size is not None 
+            else NAN for o in objects)
+    columns['angle'].extend(o.angle if o.angle is not None 
+            else NAN for o in objects)
+
+    columns['id_offsets'].append(0)
+    _append_strings(columns['id_data'], columns['id_offsets'], 
+            (o.id for o in objects))
+
+    columns['alias_offsets'].append(0)
+    columns['alias_index'].append(0)
+    for o in objects:
+        aliases = o.aliases
+        _append_strings(columns['alias_data'], columns['alias_offsets'],
+                aliases)
+        columns['alias_index'].append(len(columns['alias_offsets']) - 1)
+
+    return columns
+
+
+# The schema describing the given columns
+def build_schema(columns):
+    return {
+        'format': SCHEMA_FORMAT,
+        'version': SCHEMA_VERSION,
+        'count': len(columns['ra']),
+        'types': OBJECT_TYPES,
+        'columns': OrderedDict((name, {
+                'file': name + '.bin',
+                'dtype': COLUMNS[name][1],
+                'length': len(column),
+            }) for name, column in columns.items()),
+        'strings': STRINGS,
+    }
+
+
+#### write_columns
+# Write the given objects as a columnar catalog in `directory`
+def write_columns(directory, objects):
+    columns = build_columns(objects)
+    schema = build_schema(columns)
+
+    os.makedirs(directory, exist_ok=True)
+    for name, column in columns.items():
+        if sys.byteorder == 'big':
+            column = array(column.typecode, column)
+            column.byteswap()
+        with open(os.path.join(directory, name + '.bin'), 'wb') as f:
+            column.tofile(f)
+
+    with open(os.path.join(directory, SCHEMA_FILE), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+    return schema
+
+
+# Decode string `i` from a data and offsets column pair
+def _string(data, offsets, i):
+    return bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+
+#### ColumnarCatalog
+# Read access to a columnar catalog. Columns are memory-mapped on first
+# use and returned as `memoryview`s.
+#
+#   stars = ColumnarCatalog('data/columns/hyg')
+#   bright = [i for i, m in enumerate(stars['magnitude']) if m < 2]
+#   names = [stars.id(i) for i in bright]
+#
+class ColumnarCatalog(object):
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, SCHEMA_FILE)) as f:
+            self.schema = json.load(f)
+        if self.schema.get('format') != SCHEMA_FORMAT:
+            raise ValueError("Not a columnar catalog", directory)
+
+        self.__files = []
+        self.__columns = {}
+
+    def __len__(self):
+        return self.schema['count']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Closing releases the columns handed out by `__getitem__`, so they
+    # can't be used afterwards. A map that's still exported elsewhere
+    # (a slice of a column, say) stays open until that's released.
+    def close(self):
+        self.__columns = {}
+        for f, m, views in self.__files:
+            for view in reversed(views):
+                view.release()
+            if m is not None:
+                try:
+                    m.close()
+                except BufferError:
+                    pass
+            f.close()
+        self.__files = []
+
+    def __getitem__(self, name):
+        if name not in self.__columns:
+            self.__columns[name] = self.__map(name)
+        return self.__columns[name]
+
+    def __map(self, name):
+        column = self.schema['columns'][name]
+        typecode = COLUMNS[name][0]
+        f = open(os.path.join(self.directory, column['file']), 'rb')
+        if column['length'] == 0:
+            view = memoryview(array(typecode))
+            self.__files.append((f, None, [view]))
+            return view
+
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if sys.byteorder == 'big':
+            # Columns are little-endian, so big-endian readers get a
+            # swapped copy instead of the map itself
+            values = array(typecode)
+            values.frombytes(m)
+            values.byteswap()
+            views = [memoryview(values)]
+        else:
+            base = memoryview(m)
+            views = [base, base.cast(typecode)]
+        self.__files.append((f, m, views))
+        return views[-1]
+
+    def id(self, i):
+        return _string(self['id_data'], self['id_offsets'], i)
+
+    def aliases(self, i):
+        index = self['alias_index']
+        return [_string(self['alias_data'], self['alias_offsets'], a) 
+                for a in range(index[i], index[i + 1])]
+
+    def type(self, i):
+        return OBJECT_TYPES[self['type'][i]]
@@ -26,7 +26,6 @@
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # 
 
-import unittest
 import itertools
 import csv
 
@@ -176,6 +175,10 @@ class Constellation(object):
             self.lines = []
         else:
             self.lines = lines
+        if boundaries is None:
+            self.boundaries = []
+        else:
+            self.boundaries = boundaries
 
     def __repr__(self):
         return "Constellation(abbr={abbr}, name={name}, lines={lines})".format(
@@ -191,6 +194,21 @@ class Constellation(object):
         
         return features
 
+# Return the `Position` for the given ra (hours) and dec (degrees)
+# strings from the `positions` dict, adding it if it's new. The same
+# stars show up on many lines, and the same corners on neighbouring
+# boundaries, so interning them saves parsing them again and lets
+# lines share vertices.
+def intern_position(positions, ra, dec):
+    key = (ra, dec)
+    position = positions.get(key)
+    if position is None:
+        position = Position(EquatorialCoordinate(ra, hours=True),
+                EquatorialCoordinate(dec, degrees=True))
+        positions[key] = position
+    return position
+
+
 ## ConstellationCatalog
 # A catalog of constellations with their lines.
 class ConstellationCatalog(dict):
@@ -198,6 +216,7 @@ class ConstellationCatalog(dict):
     def __init__(self, stream):
         super().__init__()
         reader = csv.reader(stream)
+        positions = {}
 
         # Each row should have the constellation abbreviation and
         # then alternating ra,dec columns for each position along
@@ -214,9 +233,7 @@ class ConstellationCatalog(dict):
             line = Line()
 
             for ra, dec in itertools.zip_longest(*([iter(row[1:])] * 2)):
-                ra_coord = EquatorialCoordinate(ra, hours=True)
-                dec_coord = EquatorialCoordinate(dec, degrees=True)
-                line.positions.append(Position(ra_coord, dec_coord))
+                line.positions.append(intern_position(positions, ra, dec))
     
             self[row[0]].lines.append(line)
 
@@ -234,25 +251,94 @@ class ConstellationCatalog(dict):
         return collection
 
 
-class TestConstellationCatalog(unittest.TestCase):
-    def test_init(self):
-        import io
-        orion = '''ORI,4.843611,8.9000,4.830833,6.9500,4.853611,5.6000,4.904167,2.4500,4.975833,1.7167,5.418889,6.3500,5.533611,-0.3000,5.408056,-2.3833,5.293333,-6.8500,5.242222,-8.2000,5.796111,-9.6667,5.679444,-1.9500,5.919444,7.4000,5.585556,9.9333,5.418889,6.3500
-ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
-ORI,5.919444,7.4000,6.039722,9.6500,6.126389,14.7667,5.906389,20.2667
-ORI,6.039722,9.6500,6.198889,14.2167,6.065278,20.1333'''
+## BoundaryCatalog
+# A catalog of constellation boundaries, from the J2000 boundary data
+# (`bound_20.dat`). Each value is a `Constellation` whose `boundaries`
+# are closed lines. Serpens comes in two parts, `SER1` and `SER2`; they
+# are both boundaries of `SER`.
+class BoundaryCatalog(dict):
+
+    def __init__(self, stream):
+        super().__init__()
+
+        # Each row is the right ascension in hours, declination in
+        # degrees, the constellation and the point type. Consecutive
+        # rows for one constellation make up one boundary.
+        current = None
+        line = None
+        positions = {}
+        for row in stream:
+            fields = row.split()
+            if not fields:
+                continue
+            ra, dec, part = fields[:3]
+
+            if part != current:
+                self.__close(line)
+                current = part
+                abbr = part[:3]
+                if abbr not in self:
+                    self[abbr] = Constellation(abbr, 
+                            CONSTELLATION_NAMES[abbr])
+                line = Line()
+                self[abbr].boundaries.append(line)
+
+            line.positions.append(intern_position(positions, ra, dec))
+
+        self.__close(line)
 
-        # orion = '''ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
-        # ORI,6.039722,9.6500,6.198889,14.2167,6.065278,20.1333'''
+    # Close the given boundary line by returning to its first position
+    def __close(self, line):
+        if line is not None and line.positions:
+            line.positions.append(line.positions[0])
 
-        stream = io.StringIO(initial_value=orion)
-        const_catalog = ConstellationCatalog(stream)
 
-        self.assertTrue('ORI' in const_catalog)
-        self.assertEqual(len(const_catalog['ORI'].lines), 4)
-        self.assertEqual(len(const_catalog['ORI'].lines[0].positions), 15)
+#### topology
+# A compact form of the given constellations: a single table of shared
+# vertices as [ra, dec] degrees, with each line and boundary given as a
+# list of indexes into it.
+#
+#   {
+#       "type": "ConstellationTopology",
+#       "vertices": [[73.25, 8.9], ...],
+#       "constellations": [
+#           {"id": "ORI", "abbr": "ORI", "name": "Orion", 
+#            "lines": [[0, 1, 2, ...], ...], "boundaries": [...]},
+#       ]
+#   }
+#
+def topology(constellations, invert_ra=False):
+    vertices = []
+    indexes = {}
 
+    def arc(line):
+        result = []
+        for p in line.positions:
+            key = (p.ra.degrees, p.dec.degrees)
+            if key not in indexes:
+                indexes[key] = len(vertices)
+                vertices.append([360 - key[0] if invert_ra else key[0], 
+                    key[1]])
+            result.append(indexes[key])
+        return result
 
-if __name__ == "__main__":
-    unittest.main()
+    # The lines and the boundaries of a constellation may come from
+    # different catalogs, so they're merged by abbreviation.
+    entries = {}
+    for c in constellations:
+        entry = entries.setdefault(c.abbr, {
+                "id": c.abbr,
+                "abbr": c.abbr,
+                "name": c.name,
+                "lines": [],
+                "boundaries": [],
+            })
+        entry["name"] = entry["name"] or c.name
+        entry["lines"].extend(arc(line) for line in c.lines)
+        entry["boundaries"].extend(arc(line) for line in c.boundaries)
 
+    return {
+        "type": "ConstellationTopology",
+        "vertices": vertices,
+        "constellations": list(entries.values()),
+    }
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import json
+import sqlite3
+
+from objects import OBJECT_TYPES, CelestialObject
+from constellations import Constellation
+from index import index_key
+
+### SQLite Catalog Databases
+# A single SQLite database holding exported objects, their aliases,
+# and constellation lines and boundaries, for tools that want to query
+# the catalogs without loading all of the JSON.
+#
+# Objects and constellation lines each have an R*Tree index on their
+# right ascension and declination bounds (in degrees), and objects are
+# indexed on magnitude, type and (normalized) alias.
+#
+# Lines that cross 0h right ascension have the ras below 180° shifted
+# up by 360°, so their bounds don't span the whole sky. Region queries
+# check both the region and the region shifted by 360° to find them.
+
+SCHEMA = '''
+CREATE TABLE objects (
+    id INTEGER PRIMARY KEY,
+    object_id TEXT NOT NULL,
+    catalog TEXT,
+    identifier TEXT,
+    type TEXT,
+    magnitude REAL,
+    ra REAL,
+    dec REAL,
+    size_major REAL,
+    size_minor REAL,
+    angle REAL
+);
+CREATE TABLE aliases (
+    object INTEGER NOT NULL REFERENCES objects(id),
+    position INTEGER NOT NULL,
+    alias TEXT NOT NULL,
+    catalog TEXT,
+    key TEXT NOT NULL
+);
+CREATE TABLE constellations (
+    abbr TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE lines (
+    id INTEGER PRIMARY KEY,
+    abbr TEXT NOT NULL REFERENCES constellations(abbr),
+    kind TEXT NOT NULL,
+    coordinates TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE object_bounds USING rtree(
+    id, min_ra, max_ra, min_dec, max_dec
+);
+CREATE VIRTUAL TABLE line_bounds USING rtree(
+    id, min_ra, max_ra, min_dec, max_dec
+);
+'''
+
+# Indexes are created after the bulk inserts
+INDEXES = '''
+CREATE UNIQUE INDEX objects_object_id ON objects (object_id);
+CREATE INDEX objects_magnitude ON objects (magnitude);
+CREATE INDEX objects_type ON objects (type, magnitude);
+CREATE INDEX aliases_key ON aliases (key);
+CREATE INDEX aliases_object ON aliases (object);
+CREATE INDEX lines_abbr ON lines (abbr);
+'''
+
+
+# The R*Tree bounds of the given list of (ra, dec) degree coordinates
+def coordinate_bounds(coordinates):
+    ras = [c[0] for c in coordinates]
+    decs = [c[1] for c in coordinates]
+    if max(ras) - min(ras) > 180:
+        ras = [ra + 360 if ra < 180 else ra for ra in ras]
+    return (min(ras), max(ras), min(decs), max(decs))
+
+
+# The R*Tree boxes to check for the given region. A region with
+# `ra_min` greater than `ra_max` wraps through 0h.
+def region_boxes(ra_min, ra_max, dec_min, dec_max):
+    if ra_min <= ra_max:
+        ra_ranges = [(ra_min, ra_max)]
+    else:
+        ra_ranges = [(ra_min, 360), (0, ra_max)]
+    return [(lo + shift, hi + shift, dec_min, dec_max)
+            for lo, hi in ra_ranges for shift in (0, 360)]
+
+
+# The (alias, catalog) pairs for an object. `aliases` are the
+# identifiers prefixed with their catalog, if they have one.
+def alias_catalogs(o):
+    return [(alias, alias[:len(alias) - len(identifier)] or None)
+            for alias, identifier in zip(o.aliases, o.aliases_dict)]
+
+
+#### write_database
+# Write the given `CelestialObject`s and `Constellation`s to a new
+# SQLite database at `path`, replacing any that's already there. All of
+# the inserts happen in a single transaction. Objects are unique by id;
+# when sources overlap (`--hyg` and `--partitions` of the same catalog,
+# say) the first of each is kept.
+def write_database(path, objects):
+    if os.path.exists(path):
+        os.remove(path)
+
+    celestial = []
+    ids = set()
+    for o in objects:
+        if isinstance(o, CelestialObject) and o.id not in ids:
+            ids.add(o.id)
+            celestial.append(o)
+    constellations = [o for o in objects if isinstance(o, Constellation)]
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        with connection:
+            connection.executescript(SCHEMA)
+
+            connection.executemany(
+                'INSERT INTO objects VALUES (?,?,?,?,?,?,?,?,?,?,?)',
+                ((i, o.id, o.catalog, o.identifier, OBJECT_TYPES[o.type], 
+                    o.magnitude, o.ra.degrees, o.dec.degrees,
+                    o.size.major if o.size is not None else None,
+                    o.size.minor if o.size is not None else None,
+                    o.angle)
+                    for i, o in enumerate(celestial)))
+
+            connection.executemany(
+                'INSERT INTO object_bounds VALUES (?,?,?,?,?)',
+                ((i, o.ra.degrees, o.ra.degrees, o.dec.degrees,
+                    o.dec.degrees) for i, o in enumerate(celestial)))
+
+            connection.executemany(
+                'INSERT INTO aliases VALUES (?,?,?,?,?)',
+                ((i, position, alias, catalog, index_key(alias))
+                    for i, o in enumerate(celestial)
+                    for position, (alias, catalog) in enumerate(
+                        alias_catalogs(o))))
+
+            connection.executemany(
+                'INSERT OR IGNORE INTO constellations VALUES (?,?)',
+                ((o.abbr, o.name) for o in constellations))
+
+            lines = [(o.abbr, kind, [(p.ra.degrees, p.dec.degrees) 
+                        for p in line.positions])
+                    for o in constellations
+                    for kind, o_lines in (('line', o.lines), 
+                        ('boundary', o.boundaries))
+                    for line in o_lines if line.positions]
+            connection.executemany(
+                'INSERT INTO lines VALUES (?,?,?,?)',
+                ((i, abbr, kind, json.dumps(coordinates))
+                    for i, (abbr, kind, coordinates) in enumerate(lines)))
+            connection.executemany(
+                'INSERT INTO line_bounds VALUES (?,?,?,?,?)',
+                ((i,) + coordinate_bounds(coordinates)
+                    for i, (abbr, kind, coordinates) in enumerate(lines)))
+
+            connection.executescript(INDEXES)
+    finally:
+        connection.close()
+
+    return path
+
+
+#### CatalogDatabase
+# Queries against a database written by `write_database`. Objects come
+# back as `sqlite3.Row`s of the `objects` table.
+class CatalogDatabase(object):
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Objects within the given region, optionally no fainter than the
+    # given magnitude, brightest first.
+    def region(self, ra_min, ra_max, dec_min, dec_max, magnitude=None):
+        boxes = region_boxes(ra_min, ra_max, dec_min, dec_max)
+        where = ' OR '.join(['(b.max_ra >= ? AND b.min_ra <= ? AND '
+            'b.max_dec >= ? AND b.min_dec <= ?)'] * len(boxes))
+        params = [v for lo, hi, dlo, dhi in boxes for v in (lo, hi, dlo, dhi)]
+        query = ('SELECT o.* FROM object_bounds b '
+                'JOIN objects o ON o.id = b.id WHERE (' + where + ')')
+        if magnitude is not None:
+            query += ' AND o.magnitude <= ?'
+            params.append(magnitude)
+        query += ' ORDER BY o.magnitude'
+        return self.connection.execute(query, params).fetchall()
+
+    # Objects no fainter than the given magnitude, optionally of the
+    # given `OBJECT_TYPES` types, brightest first.
+    def brighter_than(self, magnitude, types=None):
+        query = 'SELECT * FROM objects WHERE magnitude <= ?'
+        params = [magnitude]
+        if types:
+            query += ' AND type IN ({})'.format(','.join('?' * len(types)))
+            params.extend(types)
+        query += ' ORDER BY magnitude'
+        return self.connection.execute(query, params).fetchall()
+
+    # Objects with the given alias, i.e. 'M 42' or 'Betelgeuse'. Aliases
+    # are normalized the same way as the catalog CSV indexes.
+    def lookup(self, alias):
+        return self.connection.execute(
+            'SELECT o.* FROM aliases a JOIN objects o ON o.id = a.object '
+            'WHERE a.key = ? ORDER BY a.position', 
+            (index_key(alias),)).fetchall()
+
+    def aliases(self, object_id):
+        return [r[0] for r in self.connection.execute(
+            'SELECT a.alias FROM aliases a JOIN objects o ON o.id = a.object '
+            'WHERE o.object_id = ? ORDER BY a.position', (object_id,))]
+
+    # Constellation lines (and boundaries) that pass through the given
+    # region, as (abbr, kind, coordinates) tuples.
+    def lines(self, ra_min, ra_max, dec_min, dec_max, kind=None):
+        boxes = region_boxes(ra_min, ra_max, dec_min, dec_max)
+        where = ' OR '.join(['(b.max_ra >= ? AND b.min_ra <= ? AND '
+            'b.max_dec >= ? AND b.min_dec <= ?)'] * len(boxes))
+        params = [v for lo, hi, dlo, dhi in boxes for v in (lo, hi, dlo, dhi)]
+        query = ('SELECT l.abbr, l.kind, l.coordinates FROM line_bounds b '
+                'JOIN lines l ON l.id = b.id WHERE (' + where + ')')
+        if kind is not None:
+            query += ' AND l.kind = ?'
+            params.append(kind)
+        query += ' ORDER BY l.id'
+        return [(r[0], r[1], json.loads(r[2])) 
+                for r in self.connection.execute(query, params)]
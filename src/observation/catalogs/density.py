@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+
+from objects import CelestialObject
+
+### Sky Density Maps
+# Star counts and integrated brightness binned into equal-area cells,
+# so charts can shade the faint sky background from a small grid rather
+# than every faint star.
+
+# The area of the whole sky in square degrees
+SKY_AREA = 4 * math.pi * (180 / math.pi) ** 2
+
+
+#### SkyGrid
+# An equal-area grid on the sky. Cells are evenly spaced in right
+# ascension and in the sine of the declination, which makes every cell
+# the same area. Cells are numbered row by row from the south pole, with
+# `ra_cells` cells in each of the `dec_cells` rows.
+class SkyGrid(object):
+
+    def __init__(self, ra_cells=72, dec_cells=36):
+        self.ra_cells = ra_cells
+        self.dec_cells = dec_cells
+
+    def __len__(self):
+        return self.ra_cells * self.dec_cells
+
+    def __repr__(self):
+        return "SkyGrid(ra_cells={ra_cells}, dec_cells={dec_cells})".format(
+                ra_cells=self.ra_cells, dec_cells=self.dec_cells)
+
+    # The area of each cell in square degrees
+    @property
+    def cell_area(self):
+        return SKY_AREA / len(self)
+
+    # The cell numbers for lists of right ascensions and declinations in
+    # degrees.
+    def cells(self, ras, decs):
+        ra_scale = self.ra_cells / 360
+        dec_scale = self.dec_cells / 2
+        last_row = self.dec_cells - 1
+        return [min(int((math.sin(math.radians(dec)) + 1) * dec_scale), 
+                    last_row) * self.ra_cells + 
+                int(ra * ra_scale) % self.ra_cells
+                for ra, dec in zip(ras, decs)]
+
+    def cell(self, ra, dec):
+        return self.cells([ra], [dec])[0]
+
+    # The (ra_min, ra_max, dec_min, dec_max) bounds of a cell in degrees
+    def bounds(self, cell):
+        row, col = divmod(cell, self.ra_cells)
+        dec = lambda r: math.degrees(math.asin(2 * r / self.dec_cells - 1))
+        return (col * 360 / self.ra_cells, (col + 1) * 360 / self.ra_cells,
+                dec(row), dec(row + 1))
+
+    # The cells that overlap the given bounds. `ra_min` greater than
+    # `ra_max` wraps through 0h.
+    def cells_in(self, ra_min, ra_max, dec_min, dec_max):
+        first_row, first_col = divmod(self.cell(ra_min, dec_min), 
+                self.ra_cells)
+        last_row, last_col = divmod(self.cell(ra_max, dec_max), 
+                self.ra_cells)
+        if ra_max >= 360 or (ra_min <= ra_max and ra_max - ra_min >= 360):
+            cols = range(self.ra_cells)
+        elif ra_min <= ra_max:
+            cols = range(first_col, last_col + 1)
+        else:
+            cols = list(range(first_col, self.ra_cells)) + \
+                    list(range(0, last_col + 1))
+        return [row * self.ra_cells + col 
+                for row in range(first_row, last_row + 1) for col in cols]
+
+    # A closed polygon ring for a cell. The edges along declination
+    # parallels get a point every `step` degrees of right ascension so
+    # they stay parallels once projected.
+    def polygon(self, cell, step=5):
+        ra_min, ra_max, dec_min, dec_max = self.bounds(cell)
+        steps = max(int(math.ceil((ra_max - ra_min) / step)), 1)
+        ras = [ra_min + (ra_max - ra_min) * i / steps 
+                for i in range(steps + 1)]
+        return ([[ra, dec_min] for ra in ras] + 
+                [[ra, dec_max] for ra in reversed(ras)] + 
+                [[ra_min, dec_min]])
+
+
+#### DensityMap
+# Counts and integrated flux (relative to a magnitude 0 star) per cell
+# of a `SkyGrid`.
+class DensityMap(object):
+
+    def __init__(self, grid, counts, flux, magnitudes=None):
+        self.grid = grid
+        self.counts = counts
+        self.flux = flux
+        self.magnitudes = magnitudes
+
+    # The integrated magnitude per square degree of a cell
+    def surface_magnitude(self, cell):
+        if self.flux[cell] <= 0:
+            return None
+        return -2.5 * math.log10(self.flux[cell] / self.grid.cell_area)
+
+    # The grid as plain lists
+    def json(self):
+        return {
+            "type": "SkyGrid",
+            "ra_cells": self.grid.ra_cells,
+            "dec_cells": self.grid.dec_cells,
+            "magnitudes": self.magnitudes,
+            "counts": self.counts,
+            "flux": [round(f, 6) for f in self.flux],
+        }
+
+    # A GeoJSON FeatureCollection with a polygon for each non-empty cell
+    def geojson(self, invert_ra=False):
+        features = []
+        for cell, count in enumerate(self.counts):
+            if not count:
+                continue
+            ring = self.grid.polygon(cell)
+            if invert_ra:
+                ring = [[360 - ra, dec] for ra, dec in reversed(ring)]
+            features.append({
+                "type": "Feature",
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [ring],
+                },
+                "properties": {
+                    "id": "cell" + str(cell),
+                    "count": count,
+                    "flux": round(self.flux[cell], 6),
+                    "magnitude": round(self.surface_magnitude(cell), 3),
+                },
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+
+#### density_map
+# Bin the given objects into the grid, optionally only those with
+# magnitudes in the (brightest, faintest) range `magnitudes`.
+def density_map(objects, grid=None, magnitudes=None):
+    if grid is None:
+        grid = SkyGrid()
+
+    objects = [o for o in objects if isinstance(o, CelestialObject)]
+    if magnitudes is not None:
+        objects = [o for o in objects 
+                if magnitudes[0] <= o.magnitude <= magnitudes[1]]
+
+    cells = grid.cells([o.ra.degrees for o in objects],
+            [o.dec.degrees for o in objects])
+
+    counts = [0] * len(grid)
+    flux = [0.0] * len(grid)
+    for cell, o in zip(cells, objects):
+        counts[cell] += 1
+        flux[cell] += 10 ** (-0.4 * o.magnitude)
+
+    return DensityMap(grid, counts, flux, magnitudes)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+### Dataset Diffs
+# A patch between two versions of an exported dataset, so clients that
+# already have the previous version only need to fetch what changed.
+# Features (or objects, for the custom JSON format) are matched by
+# their id. A patch looks like:
+#
+#   {
+#       "type": "DatasetPatch",
+#       "from_version": 3,
+#       "to_version": 4,
+#       "added": [<feature>, ...],
+#       "removed": ["NGC1234", ...],
+#       "changed": [<feature>, ...]
+#   }
+#
+# GeoJSON FeatureCollections carry their version as a `version` member;
+# datasets without one are version 0.
+
+PATCH_TYPE = 'DatasetPatch'
+
+
+# The features (or objects) in an exported dataset
+def dataset_features(dataset):
+    if isinstance(dataset, dict):
+        return dataset['features']
+    return dataset
+
+
+def dataset_version(dataset):
+    if isinstance(dataset, dict):
+        return dataset.get('version', 0)
+    return 0
+
+
+def feature_id(feature):
+    if 'properties' in feature:
+        return feature['properties']['id']
+    return feature['id']
+
+
+#### diff
+# The patch from the `previous` dataset to the `current` one. Versions
+# default to the datasets' own.
+def diff(previous, current, from_version=None, to_version=None):
+    if from_version is None:
+        from_version = dataset_version(previous)
+    if to_version is None:
+        to_version = dataset_version(current)
+
+    previous_features = dict((feature_id(f), f) 
+            for f in dataset_features(previous))
+    current_ids = set()
+    added = []
+    changed = []
+
+    for f in dataset_features(current):
+        id = feature_id(f)
+        current_ids.add(id)
+        if id not in previous_features:
+            added.append(f)
+        elif previous_features[id] != f:
+            changed.append(f)
+
+    removed = [id for id in previous_features if id not in current_ids]
+
+    return {
+        'type': PATCH_TYPE,
+        'from_version': from_version,
+        'to_version': to_version,
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+    }
+
+
+#### apply_patch
+# Apply a patch to the dataset it was made from, returning the patched
+# dataset. Raises a `ValueError` if the dataset is the wrong version.
+def apply_patch(dataset, patch):
+    if dataset_version(dataset) != patch['from_version']:
+        raise ValueError("Patch is for a different version", 
+                patch['from_version'], dataset_version(dataset))
+
+    removed = set(patch['removed'])
+    changed = dict((feature_id(f), f) for f in patch['changed'])
+    features = [changed.get(feature_id(f), f) 
+            for f in dataset_features(dataset)
+            if feature_id(f) not in removed]
+    features.extend(patch['added'])
+
+    if isinstance(dataset, dict):
+        dataset = dict(dataset)
+        dataset['features'] = features
+        dataset['version'] = patch['to_version']
+        return dataset
+    return features
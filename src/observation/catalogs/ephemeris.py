@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+import datetime
+import functools
+from array import array
+
+from objects import CelestialObject
+from visibility import sidereal_time, SIDEREAL_RATE, _half_arc
+
+### Ephemeris
+# Rise, transit and set times for whole catalogs at a site over a range
+# of dates.
+#
+# An object's right ascension and declination don't change from night
+# to night, so everything that depends on them (the transit hour angle
+# and the half-arc above the horizon) is worked out once per object.
+# Each further day only moves the transit earlier by the difference
+# between the sidereal and solar day, so a year of times is just an
+# offset from the first day.
+#
+# Times are minutes after 0h UT on each date. `NO_EVENT` (-1) marks a
+# day without the event: circumpolar objects never rise or set, and
+# objects that never get above the horizon don't either.
+
+# The altitude of the center of an object at rising and setting,
+# allowing for refraction at the horizon.
+HORIZON = -0.5667
+
+NO_EVENT = -1
+
+# The sidereal time gained each solar day, in hours
+SIDEREAL_GAIN = (SIDEREAL_RATE - 1) * 24
+
+
+#### EphemerisTable
+# The rise, transit and set times for a set of objects, keyed by object
+# id. Each value is a `(rise, transit, set)` tuple of `array('h')`s
+# with one entry per day.
+class EphemerisTable(dict):
+
+    def __init__(self, latitude, longitude, start, days, 
+            altitude=HORIZON):
+        super().__init__()
+        self.latitude = latitude
+        self.longitude = longitude
+        self.start = start
+        self.days = days
+        self.altitude = altitude
+
+    def dates(self):
+        return [self.start + datetime.timedelta(days=d) 
+                for d in range(self.days)]
+
+    def rise(self, id):
+        return self[id][0]
+
+    def transit(self, id):
+        return self[id][1]
+
+    def set(self, id):
+        return self[id][2]
+
+    # A copy of this table, arrays and all
+    def copy(self):
+        table = EphemerisTable(self.latitude, self.longitude, self.start,
+                self.days, self.altitude)
+        table.update((id, tuple(array('h', times) for times in events))
+                for id, events in self.items())
+        return table
+
+    # A JSON-friendly version of this table
+    def json(self):
+        return {
+            "site": {
+                "latitude": self.latitude, 
+                "longitude": self.longitude,
+            },
+            "start": self.start.isoformat(),
+            "days": self.days,
+            "altitude": self.altitude,
+            "objects": {id: {
+                    "rise": list(rise),
+                    "transit": list(transit),
+                    "set": list(set),
+                } for id, (rise, transit, set) in self.items()},
+        }
+
+
+#### ephemeris
+# Compute the `EphemerisTable` for the given object ids, right
+# ascensions (hours) and declinations (degrees) at a site (longitude
+# positive east) over `days` days starting from the `start` date.
+def ephemeris(ids, ras, decs, latitude, longitude, start, days,
+        altitude=HORIZON):
+    table = EphemerisTable(latitude, longitude, start, days, altitude)
+
+    phi = math.radians(latitude)
+    sin_phi = math.sin(phi)
+    cos_phi = math.cos(phi)
+    sin_h = math.sin(math.radians(altitude))
+
+    # The sidereal time at 0h UT on the first day, at the site
+    lst0 = sidereal_time(datetime.datetime.combine(start,
+        datetime.time())) + longitude / 15
+
+    # How much earlier, in minutes, everything happens on each day
+    offsets = [d * SIDEREAL_GAIN / SIDEREAL_RATE * 60 for d in range(days)]
+
+    for id, ra, dec in zip(ids, ras, decs):
+        # The first day's transit, in solar minutes after 0h UT
+        transit0 = ((ra - lst0) % 24) / SIDEREAL_RATE * 60
+        h0 = _half_arc(sin_h, sin_phi, cos_phi, 
+                math.sin(math.radians(dec)), math.cos(math.radians(dec)))
+
+        transits = array('h', [round(transit0 - o) % 1440 for o in offsets])
+
+        if 0 <= h0 < 12:
+            arc = h0 / SIDEREAL_RATE * 60
+            rise0 = transit0 - arc
+            set0 = transit0 + arc
+            rises = array('h', [round(rise0 - o) % 1440 for o in offsets])
+            sets = array('h', [round(set0 - o) % 1440 for o in offsets])
+        else:
+            rises = array('h', [NO_EVENT]) * days
+            sets = array('h', [NO_EVENT]) * days
+
+        table[id] = (rises, transits, sets)
+
+    return table
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_ephemeris(ids, ras, decs, latitude, longitude, start, days,
+        altitude):
+    return ephemeris(ids, ras, decs, latitude, longitude, start, days,
+            altitude)
+
+
+# `ephemeris` for tuples of ids, right ascensions and declinations,
+# caching the most recent tables. Every caller gets its own copy of the
+# cached table, so changing one doesn't change the others.
+def cached_ephemeris(ids, ras, decs, latitude, longitude, start, days,
+        altitude=HORIZON):
+    return _cached_ephemeris(ids, ras, decs, latitude, longitude, start, 
+            days, altitude).copy()
+
+
+#### Ephemeris
+# Rise, transit and set times for a list of objects. Tables are cached
+# per site, date range and altitude, so repeated queries for the same
+# objects and site (from a worker, say) are only computed once.
+class Ephemeris(object):
+
+    def __init__(self, objects):
+        objects = [o for o in objects if isinstance(o, CelestialObject)]
+        self.ids = tuple(o.id for o in objects)
+        self.ras = tuple(o.ra.hours for o in objects)
+        self.decs = tuple(o.dec.degrees for o in objects)
+
+    def table(self, latitude, longitude, start, days, altitude=HORIZON):
+        return cached_ephemeris(self.ids, self.ras, self.decs, 
+                latitude, longitude, start, days, altitude)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+import functools
+
+### Coordinate Frames
+# Conversions between the equatorial, ecliptic and galactic frames, and
+# the reference lines of each frame (graticules, the ecliptic and the
+# galactic equator) as GeoJSON.
+#
+# Each frame is a rotation of the equatorial frame, given as the matrix
+# whose rows are the frame's x, y and z axes in equatorial coordinates.
+# Converting between two frames is one matrix product per position, so
+# whole catalogs are converted as columns of longitudes and latitudes
+# in degrees. For the equatorial frame those are right ascension and
+# declination.
+
+FRAMES = ('equatorial', 'ecliptic', 'galactic')
+
+# The IDs of the GeoJSON features for the equators of each frame
+EQUATORS = {
+    'equatorial': 'celestial-equator',
+    'ecliptic': 'ecliptic',
+    'galactic': 'galactic-equator',
+}
+
+# The galactic frame is defined against J2000 (Hipparcos, 1997)
+GALACTIC = (
+    (-0.0548755604, -0.8734370902, -0.4838350155),
+    (0.4941094279, -0.4448296300, 0.7469822445),
+    (-0.8676661490, -0.1980763734, 0.4559837762),
+)
+
+IDENTITY = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+
+
+# The mean obliquity of the ecliptic, in degrees, at the given epoch in
+# Julian years (IAU 2006).
+def obliquity(epoch=2000.0):
+    t = (epoch - 2000) / 100
+    return (84381.406 - 46.836769 * t - 0.0001831 * t * t) / 3600
+
+
+# The rotation from the equatorial frame to the given frame
+def frame_matrix(frame, epoch=2000.0):
+    if frame == 'equatorial':
+        return IDENTITY
+    if frame == 'galactic':
+        return GALACTIC
+    if frame == 'ecliptic':
+        e = math.radians(obliquity(epoch))
+        return ((1, 0, 0), 
+                (0, math.cos(e), math.sin(e)), 
+                (0, -math.sin(e), math.cos(e)))
+    raise ValueError("unknown frame {}".format(frame))
+
+
+#### rotation
+# The matrix that converts vectors in `from_frame` to `to_frame`
+@functools.lru_cache(maxsize=32)
+def rotation(from_frame, to_frame, epoch=2000.0):
+    to_matrix = frame_matrix(to_frame, epoch)
+    from_matrix = frame_matrix(from_frame, epoch)
+    # from_frame -> equatorial is the transpose of its matrix
+    return tuple(tuple(sum(to_matrix[i][k] * from_matrix[j][k] 
+                for k in range(3)) for j in range(3)) for i in range(3))
+
+
+#### convert
+# Convert lists of longitudes and latitudes, in degrees, from one frame
+# to another. Returns the converted longitudes, from 0 to 360, and
+# latitudes.
+def convert(lons, lats, from_frame, to_frame, epoch=2000.0):
+    if from_frame == to_frame:
+        return list(lons), list(lats)
+
+    (a, b, c), (d, e, f), (g, h, i) = rotation(from_frame, to_frame, epoch)
+
+    cos_lats = [math.cos(math.radians(lat)) for lat in lats]
+    xs = [cl * math.cos(math.radians(lon)) for lon, cl in zip(lons, cos_lats)]
+    ys = [cl * math.sin(math.radians(lon)) for lon, cl in zip(lons, cos_lats)]
+    zs = [math.sin(math.radians(lat)) for lat in lats]
+
+    out_xs = [a * x + b * y + c * z for x, y, z in zip(xs, ys, zs)]
+    out_ys = [d * x + e * y + f * z for x, y, z in zip(xs, ys, zs)]
+    out_zs = [g * x + h * y + i * z for x, y, z in zip(xs, ys, zs)]
+
+    return ([math.degrees(math.atan2(y, x)) % 360 
+                for x, y in zip(out_xs, out_ys)],
+            [math.degrees(math.asin(max(-1, min(1, z)))) for z in out_zs])
+
+
+#### frame_coordinates
+# The coordinates of the given objects in another frame, converted in a
+# single batch. Returns a dict of `(lon, lat)`, keyed by the `id()` of
+# each `CelestialObject` and each `Position` on a constellation's lines
+# and boundaries.
+def frame_coordinates(objects, frame, epoch=2000.0):
+    from objects import CelestialObject
+    from constellations import Constellation
+
+    positions = []
+    for o in objects:
+        if isinstance(o, CelestialObject):
+            positions.append(o)
+        elif isinstance(o, Constellation):
+            positions.extend(p for line in o.lines + o.boundaries 
+                    for p in line.positions)
+
+    lons, lats = convert([p.ra.degrees for p in positions],
+            [p.dec.degrees for p in positions], 'equatorial', frame, epoch)
+    return {id(p): c for p, c in zip(positions, zip(lons, lats))}
+
+
+# A line in `grid` frame coordinates as a list of [lon, lat] in `frame`
+def _frame_line(lons, lats, grid, frame, epoch, invert_ra):
+    lons, lats = convert(lons, lats, grid, frame, epoch)
+    return [[360 - lon if invert_ra else lon, lat] 
+            for lon, lat in zip(lons, lats)]
+
+
+#### graticule
+# The lines of constant longitude and latitude of the `grid` frame,
+# every `step` degrees, as a GeoJSON MultiLineString feature in `frame`
+# coordinates. Each line has a point every `resolution` degrees. The
+# meridians stop short of the poles at the last parallel.
+#
+# Features are cached, so they shouldn't be modified.
+@functools.lru_cache(maxsize=32)
+def graticule(grid, frame='equatorial', step=15, resolution=1, 
+        epoch=2000.0, invert_ra=False):
+    samples = int(math.ceil(360 / resolution))
+    extent = 90 - step if 90 % step == 0 else 90 - 90 % step
+    lines = []
+
+    for lon in range(0, 360, step):
+        count = int(math.ceil(2 * extent / resolution))
+        lats = [-extent + 2 * extent * n / count for n in range(count + 1)]
+        lines.append(_frame_line([lon] * len(lats), lats, grid, frame,
+            epoch, invert_ra))
+
+    for lat in range(-extent, extent + 1, step):
+        lons = [360 * n / samples for n in range(samples + 1)]
+        lines.append(_frame_line(lons, [lat] * len(lons), grid, frame,
+            epoch, invert_ra))
+
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "MultiLineString",
+            "coordinates": lines,
+        },
+        "properties": {
+            "id": grid + '-graticule',
+            "frame": grid,
+            "graticule": True,
+        }
+    }
+
+
+#### equator
+# The equator of the `grid` frame (the ecliptic or the galactic
+# equator) as a GeoJSON LineString feature in `frame` coordinates, with
+# a point every `resolution` degrees.
+#
+# Features are cached, so they shouldn't be modified.
+@functools.lru_cache(maxsize=32)
+def equator(grid, frame='equatorial', resolution=1, epoch=2000.0,
+        invert_ra=False):
+    samples = int(math.ceil(360 / resolution))
+    lons = [360 * n / samples for n in range(samples + 1)]
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "LineString",
+            "coordinates": _frame_line(lons, [0] * len(lons), grid, frame,
+                epoch, invert_ra),
+        },
+        "properties": {
+            "id": EQUATORS[grid],
+            "frame": grid,
+        }
+    }
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import re
+import csv
+import mmap
+
+### Catalog Indexes
+# A catalog index is a sidecar file that sits next to a catalog CSV
+# file and maps every object's identifier and aliases to the byte
+# offset of its row in the CSV. Looking up a single object then means a
+# binary search through the (memory-mapped) index and decoding one row
+# of the (memory-mapped) CSV, instead of parsing the whole catalog.
+#
+# The index file is plain text. The first line records the size and
+# modification time of the CSV it was built from, so a stale index can
+# be detected and rebuilt. Every line after that is `key\toffset`,
+# sorted by key.
+#
+# This presumes one row per line, which holds for the HCNGC and HYG
+# CSV files.
+
+# The default index file extension, appended to the CSV file name
+INDEX_SUFFIX = '.idx'
+
+# The first field of the index header line
+INDEX_MAGIC = '#observation-charts-index'
+
+# Keys are normalized so that 'M 42', 'm42' and 'M42' all find the
+# Orion Nebula.
+index_key_re = re.compile(r'[\s\-_]+')
+index_key = lambda alias: index_key_re.sub('', alias).casefold()
+
+
+# Return the header line identifying the given CSV file
+def _index_header(csv_path):
+    stat = os.stat(csv_path)
+    return '\t'.join((INDEX_MAGIC, str(stat.st_size),
+        str(stat.st_mtime_ns))) + '\n'
+
+
+#### build_index
+# Build the index for the given CSV file. Each row is decoded once with
+# `object_class` (`NGCObject`, `HYGStar`) to find its aliases.
+def build_index(csv_path, object_class, index_path=None):
+    if index_path is None:
+        index_path = csv_path + INDEX_SUFFIX
+
+    entries = []
+    with open(csv_path, 'rb') as csv_file:
+        header = next(csv.reader([csv_file.readline().decode('utf-8')]))
+        offset = csv_file.tell()
+        for line in iter(csv_file.readline, b''):
+            if line.strip():
+                row = next(csv.reader([line.decode('utf-8')]))
+                o = object_class(**dict(zip(header, row)))
+                keys = set([index_key(o.identifier)] +
+                        [index_key(a) for a in o.aliases])
+                entries.extend((k.encode('utf-8'), offset)
+                        for k in keys if k)
+            offset += len(line)
+
+    entries.sort()
+
+    with open(index_path, 'wb') as index_file:
+        index_file.write(_index_header(csv_path).encode('utf-8'))
+        index_file.writelines(b''.join((k, b'\t', str(o).encode('ascii'),
+            b'\n')) for k, o in entries)
+
+    return index_path
+
+
+#### CatalogIndex
+# Random access to the objects in a catalog CSV file by identifier or
+# alias. The index is built (or rebuilt, if the CSV has changed) on
+# first use.
+#
+#   stars = CatalogIndex('hygxyz.csv', HYGStar)
+#   betelgeuse = stars['Betelgeuse']
+#
+class CatalogIndex(object):
+
+    def __init__(self, csv_path, object_class, index_path=None):
+        if index_path is None:
+            index_path = csv_path + INDEX_SUFFIX
+
+        self.csv_path = csv_path
+        self.index_path = index_path
+        self.object_class = object_class
+
+        header = _index_header(csv_path)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as index_file:
+                stale = index_file.readline() != header
+        except FileNotFoundError:
+            stale = True
+
+        if stale:
+            build_index(csv_path, object_class, index_path)
+
+        self.__csv_file = open(csv_path, 'rb')
+        self.__csv = mmap.mmap(self.__csv_file.fileno(), 0,
+                access=mmap.ACCESS_READ)
+        self.__header = next(csv.reader(
+            [self.__csv[:self.__csv.find(b'\n')].decode('utf-8').rstrip('\r')]))
+
+        self.__index_file = open(index_path, 'rb')
+        self.__index = mmap.mmap(self.__index_file.fileno(), 0,
+                access=mmap.ACCESS_READ)
+        self.__start = self.__index.find(b'\n') + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.__index.close()
+        self.__index_file.close()
+        self.__csv.close()
+        self.__csv_file.close()
+
+    # Binary search for the first index line whose key is not less
+    # than `key`. Returns the byte position of that line.
+    def __bisect(self, key):
+        index = self.__index
+        lo = self.__start
+        hi = len(index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = index.rfind(b'\n', lo, mid)
+            start = lo if start == -1 else start + 1
+            end = index.find(b'\n', start)
+            if index[start:index.find(b'\t', start, end)] < key:
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    # The CSV byte offsets of every row matching the given identifier
+    # or alias.
+    def offsets(self, alias):
+        key = index_key(alias).encode('utf-8')
+        index = self.__index
+        position = self.__bisect(key)
+        offsets = []
+        while position < len(index):
+            end = index.find(b'\n', position)
+            line_key, offset = index[position:end].split(b'\t')
+            if line_key != key:
+                break
+            offsets.append(int(offset))
+            position = end + 1
+        return offsets
+
+    # Decode the CSV row at the given byte offset
+    def row(self, offset):
+        end = self.__csv.find(b'\n', offset)
+        if end == -1:
+            end = len(self.__csv)
+        line = self.__csv[offset:end].decode('utf-8').rstrip('\r')
+        return dict(zip(self.__header, next(csv.reader([line]))))
+
+    def get(self, alias, default=None):
+        offsets = self.offsets(alias)
+        if not offsets:
+            return default
+        return self.object_class(**self.row(offsets[0]))
+
+    def __getitem__(self, alias):
+        o = self.get(alias)
+        if o is None:
+            raise KeyError(alias)
+        return o
+
+    def __contains__(self, alias):
+        return len(self.offsets(alias)) > 0
@@ -27,29 +27,53 @@
 # 
 
 import argparse
+import datetime
+import os
 import re
+import sys
 
-from objects import OBJECT_TYPES, CelestialObject, NGCCatalog, HYGStarCatalog
-from constellations import ConstellationCatalog, Constellation
+import importlib
+from collections.abc import Mapping
 
 import json
 
+# Most exports only use a few of the catalogs modules, and startup time
+# is most of the time of a small export, so modules are imported where
+# they're used, not here. The choices of options are listed here too,
+# so that parsing them doesn't import anything; they're the keys of
+# `projections.PROJECTIONS` and `frames.FRAMES`.
+PROJECTION_NAMES = ('equirectangular', 'stereographic')
+FRAME_NAMES = ('equatorial', 'ecliptic', 'galactic')
+
+# The output [lon, lat] of a `CelestialObject` or a `Position`, in the
+# encoder's frame if its coordinates have been converted.
+def output_coordinates(encoder, p):
+    lon, lat = encoder.coordinates.get(id(p), (p.ra.degrees, p.dec.degrees))
+    return [lon if not encoder.args.invert_ra else 360 - lon, lat]
+
+
 class CatalogEncoder(json.JSONEncoder):
+    # Placed labels, by object id
+    labels = {}
+
+    # Coordinates in another frame, from `frame_coordinates`
+    coordinates = {}
+
     def default(self, o):
+        from objects import OBJECT_TYPES, CelestialObject
         if isinstance(o, CelestialObject):
             # Custom JSON format
             o = {
                     "id": o.id,
                     "magnitude": o.magnitude,
                     "type": OBJECT_TYPES[o.type],
-                    "coordinates": [
-                            o.ra.degrees if not self.args.invert_ra else 360 - o.ra.degrees, 
-                            o.dec.degrees
-                        ],
+                    "coordinates": output_coordinates(self, o),
                     "size": [o.size.major, o.size.minor] \
                             if o.size is not None else [],
                     "angle": o.angle if o.angle is not None else 0,
                 }
+            if o['id'] in self.labels:
+                o['label'] = self.labels[o['id']]._asdict()
 
             return o
 
@@ -58,17 +82,21 @@ class CatalogEncoder(json.JSONEncoder):
 
     
 class CatalogsGeoJSONEncoder(json.JSONEncoder):
+    # Placed labels, by object id
+    labels = {}
+
+    # Coordinates in another frame, from `frame_coordinates`
+    coordinates = {}
+
     def default(self, o):
+        from objects import OBJECT_TYPES, CelestialObject
         if isinstance(o, CelestialObject):
             # GEOJSON feature
             feature = {
                     "type": "Feature", 
                     "geometry": {
                         "type": "Point",
-                        "coordinates": [
-                                o.ra.degrees if not self.args.invert_ra else 360 - o.ra.degrees, 
-                                o.dec.degrees
-                            ],
+                        "coordinates": output_coordinates(self, o),
                     },
                     "properties": {
                         "id": o.id,
@@ -84,6 +112,37 @@ class CatalogsGeoJSONEncoder(json.JSONEncoder):
                 }
             if self.args.includename:
                 feature['properties']['name'] = o.id
+            if o.id in self.labels:
+                feature['properties']['label'] = self.labels[o.id]._asdict()
+
+            return feature
+
+        from constellations import Constellation
+        from milkyway import MilkyWayView
+
+        # Constellations loaded from the boundary data only have
+        # boundaries. Each boundary is a polygon with a single ring.
+        if isinstance(o, Constellation) and o.boundaries and not o.lines:
+            polygons = []
+            for boundary in o.boundaries:
+                points = []
+                for p in boundary.positions:
+                    points.append(output_coordinates(self, p))
+                polygons.append([points])
+
+            feature = {
+                    "type": "Feature", 
+                    "geometry": {
+                        "type": "MultiPolygon", 
+                        "coordinates": polygons,
+                    },
+                    "properties": {
+                        "id": o.abbr + '-boundary',
+                        "abbr": o.abbr,
+                        "name": o.name,
+                        "boundary": True,
+                    }
+                }
 
             return feature
 
@@ -92,9 +151,7 @@ class CatalogsGeoJSONEncoder(json.JSONEncoder):
             for line in o.lines:
                 points = []
                 for p in line.positions:
-                    points.append([
-                            p.ra.degrees if not self.args.invert_ra else 360 - p.ra.degrees, 
-                            p.dec.degrees])
+                    points.append(output_coordinates(self, p))
                 lines.append(points)
             
             feature = {
@@ -112,16 +169,75 @@ class CatalogsGeoJSONEncoder(json.JSONEncoder):
 
             return feature
 
+        if isinstance(o, MilkyWayView):
+            return o.feature(self.args.frame, self.args.epoch, 
+                    self.args.invert_ra)
+
         return json.JSONEncoder.default(self, o)
 
 
-def main():
+#### CatalogClasses
+# A mapping of catalog kinds to catalog classes, given by name as
+# 'module.Class'. Each class's module is imported the first time the
+# class is asked for.
+class CatalogClasses(Mapping):
+
+    def __init__(self, names):
+        self.__names = names
+
+    def __getitem__(self, kind):
+        module, name = self.__names[kind].rsplit('.', 1)
+        return getattr(importlib.import_module(module), name)
+
+    def __iter__(self):
+        return iter(self.__names)
+
+    def __len__(self):
+        return len(self.__names)
+
+
+# The catalog classes for each of the catalog file arguments
+CATALOGS = CatalogClasses({
+    'hyg': 'objects.HYGStarCatalog',
+    'ngc': 'objects.NGCCatalog',
+    'constellations': 'constellations.ConstellationCatalog',
+    'boundaries': 'constellations.BoundaryCatalog',
+    'milkyway': 'milkyway.MilkyWayCatalog',
+})
+
+
+# Load the catalog of the given kind (one of the `CATALOGS` keys) from
+# the given file path. The Milky Way's simplified outlines are cached
+# next to its CSV.
+def load_catalog(kind, path):
+    if kind == 'milkyway':
+        from milkyway import load_milky_way
+        return load_milky_way(path)
+    with open(path) as stream:
+        return CATALOGS[kind](stream)
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Output GeoJSON for each of the given celestial catalogs.')
     # parser.add_argument('output', type=str, help='specifies the output file')
     parser.add_argument('--ngc', type=str, 
             help="specifies the NGC catalog file path")
     parser.add_argument('--hyg', type=str, 
             help="specifies the NGC catalog file path")
+    parser.add_argument('--partitions', type=str, 
+            help="specifies a partitioned star catalog directory (see --build-partitions)")
+    parser.add_argument('--build-partitions', type=str, 
+            help="partition the --hyg catalog by sky cell into the given directory, without loading it")
+    parser.add_argument('--region', type=str, 
+            help="limit objects to 'ra_min,ra_max,dec_min,dec_max' in degrees")
+    parser.add_argument('--cone', type=str, 
+            help="limit objects to 'ra,dec,radius' in degrees")
+    parser.add_argument('--no-clip', action="store_true", default=False,
+            help="include constellation lines, boundaries and the Milky Way whole in --region and --cone exports instead of clipping them")
+    parser.add_argument('--types', type=str, 
+            help="limit objects to these comma-separated types, i.e. 'Galaxy,Open Cluster'")
+    parser.add_argument('--constellation', type=str, 
+            help="limit objects and constellations to these comma-separated constellations, i.e. 'ORI,TAU'. Stars without a Bayer or Flamsteed designation are only placed in a constellation with --boundaries")
     parser.add_argument('--out', type=str, 
             help="specifies the output json file path")
     
@@ -131,6 +247,11 @@ def main():
     parser.add_argument('--constellations', type=str, 
             help="specifies the constellations file path")
 
+    parser.add_argument('--boundaries', type=str, 
+            help="specifies the constellation boundaries file path (i.e. bound_20.dat)")
+    parser.add_argument('--milkyway', type=str, 
+            help="specifies the Milky Way outlines file path (i.e. milkyway.csv)")
+
     parser.add_argument('--specifically', type=str, default='.*',
             help="a regular expression that matches specific object ids or aliases to include")
 
@@ -142,9 +263,155 @@ def main():
             help="output in GeoJSON Feature format")
     parser.add_argument('--includename', action="store_true", default=False,
             help="include the object id as its name in the output")
-    
-    args = parser.parse_args()
 
+    parser.add_argument('--labels', action="store_true", default=False,
+            help="place non-overlapping labels for the objects on a chart with the given projection")
+    parser.add_argument('--projection', type=str, default='stereographic',
+            choices=PROJECTION_NAMES,
+            help="the chart projection used to place labels")
+    parser.add_argument('--center', type=str, default='0,0',
+            help="the center of the chart projection as 'ra,dec' in degrees")
+    parser.add_argument('--width', type=int, default=1000,
+            help="the chart width in pixels")
+    parser.add_argument('--height', type=int, default=1000,
+            help="the chart height in pixels")
+    parser.add_argument('--scale', type=float,
+            help="the chart projection scale (defaults to half the chart width)")
+    parser.add_argument('--font-size', type=float, default=10,
+            help="the label font size in pixels")
+
+    parser.add_argument('--latitude', type=float,
+            help="only include objects visible from this latitude during --month")
+    parser.add_argument('--month', type=str,
+            help="the month (1-12) to check visibility for, or a range like 1-12 to write one file per month using {month} or {name} in --out")
+    parser.add_argument('--year', type=int,
+            help="the year to check visibility for (defaults to this year)")
+    parser.add_argument('--hours', type=str, default='20,2',
+            help="the local observing hours each night as 'start,end' (default 20,2)")
+    parser.add_argument('--min-altitude', type=float, default=0,
+            help="the altitude in degrees an object must rise above to be visible")
+
+    parser.add_argument('--ephemeris', action="store_true", default=False,
+            help="output rise, transit and set times for the objects at --latitude/--longitude instead of the objects")
+    parser.add_argument('--longitude', type=float, default=0,
+            help="the site longitude in degrees, positive east, for --ephemeris and --best")
+    parser.add_argument('--start', type=str,
+            help="the first date for --ephemeris as YYYY-MM-DD (defaults to January 1st of --year)")
+    parser.add_argument('--days', type=int,
+            help="the number of days for --ephemeris (defaults to the rest of the year)")
+
+    parser.add_argument('--frame', type=str, default='equatorial',
+            choices=FRAME_NAMES,
+            help="the coordinate frame of the output coordinates (default equatorial)")
+    parser.add_argument('--epoch', type=float, default=2000.0,
+            help="the epoch of the ecliptic frame in years (default 2000)")
+    parser.add_argument('--graticule', type=str,
+            help="with --geojson, add the coordinate grids of these comma-separated frames")
+    parser.add_argument('--graticule-step', type=int, default=15,
+            help="the spacing of --graticule lines in degrees (default 15)")
+    parser.add_argument('--equators', type=str,
+            help="with --geojson, add the equators of these comma-separated frames (i.e. ecliptic,galactic)")
+    parser.add_argument('--resolution', type=float, default=1,
+            help="the spacing of the points on --graticule and --equators lines and on the edges of clipped boundaries, and the detail of --milkyway outlines, in degrees (default 1)")
+
+    parser.add_argument('--best', type=int,
+            help="output the given number of best targets to observe from --latitude/--longitude on --date instead of the objects")
+    parser.add_argument('--aperture', type=float, default=100,
+            help="the telescope aperture in millimeters for --best (default 100)")
+    parser.add_argument('--date', type=str,
+            help="the date of the night for --best as YYYY-MM-DD (defaults to today)")
+
+    parser.add_argument('--sqlite', type=str,
+            help="write the objects to a SQLite database at the given path instead of JSON")
+
+    parser.add_argument('--columns', type=str,
+            help="write the objects as memory-mappable column arrays to the given directory instead of JSON")
+
+    parser.add_argument('--svg', type=str,
+            help="render the objects as an SVG chart with the chart projection to the given path instead of JSON")
+
+    parser.add_argument('--bundles', type=str,
+            help="write a chart bundle for each constellation to the given directory instead of JSON")
+    parser.add_argument('--processes', type=int,
+            help="the number of processes to build --bundles with (defaults to the number of CPUs)")
+
+    parser.add_argument('--share', type=str,
+            help="hold the objects in a shared memory block with the given name for other processes to attach to, until interrupted")
+
+    parser.add_argument('--version', type=int,
+            help="the dataset version to record in GeoJSON output (defaults to one more than --previous)")
+    parser.add_argument('--previous', type=str,
+            help="the previous version of this export, to write a --patch against")
+    parser.add_argument('--patch', type=str,
+            help="with --geojson, write the added, removed and changed objects since --previous to the given path")
+
+    parser.add_argument('--search-index', type=str,
+            help="also write a name and alias search index for the objects to the given path")
+
+    parser.add_argument('--density', action="store_true", default=False,
+            help="output star counts and integrated brightness per equal-area sky cell instead of the objects")
+    parser.add_argument('--density-cells', type=str, default='72,36',
+            help="the number of density cells in right ascension and declination as 'ra,dec' (default 72,36)")
+    parser.add_argument('--density-magnitudes', type=str,
+            help="only count objects in this magnitude range for --density, as 'brightest,faintest' (overrides --magnitude)")
+
+    parser.add_argument('--topology', action="store_true", default=False,
+            help="output the constellation lines and boundaries as indexes into a shared vertex table instead of the objects")
+
+    parser.add_argument('--cache-dir', type=str,
+            help="reuse earlier results for the same options and catalogs from the given cache directory")
+    parser.add_argument('--cache-size', type=int, default=256,
+            help="the maximum size of --cache-dir in megabytes (default 256)")
+
+    parser.add_argument('--worker', action="store_true", default=False,
+            help="keep the catalogs loaded and read export requests as JSON lines from stdin")
+    parser.add_argument('--socket', type=str,
+            help="with --worker, read requests from the given Unix socket path instead of stdin")
+
+    return parser
+
+
+# The brightest and faintest magnitudes to select for the given
+# arguments. A density map counts the objects in its own magnitude
+# range, which replaces --magnitude.
+def magnitude_range(args):
+    if args.density and args.density_magnitudes:
+        return tuple(float(m) for m in args.density_magnitudes.split(','))
+    return None, args.magnitude
+
+
+# The catalog query for the given arguments. With a `BoundaryCatalog`,
+# objects that don't know their constellation are placed by it.
+def catalog_query(args, boundaries=None):
+    from query import Magnitude, Types, InConstellation, Region, Cone, Ids
+    brightest, faintest = magnitude_range(args)
+    query = Magnitude(brightest, faintest) & Ids(args.specifically)
+    if args.types:
+        query &= Types(*args.types.split(','))
+    if args.constellation:
+        query &= InConstellation(*args.constellation.split(','),
+                boundaries=boundaries)
+    if args.region:
+        query &= Region(*[float(r) for r in args.region.split(',')])
+    if args.cone:
+        query &= Cone(*[float(c) for c in args.cone.split(',')])
+    return query
+
+
+# The chart projection for the given arguments
+def chart_projection(args):
+    ra, dec = [float(c) for c in args.center.split(',')]
+    scale = args.scale if args.scale is not None else args.width / 2
+    from projections import PROJECTIONS
+    return PROJECTIONS[args.projection](center=(ra, dec), scale=scale,
+            translate=(args.width / 2, args.height / 2))
+
+
+# Select and encode the objects for the given arguments. Catalogs are
+# loaded with the given `load_catalog` function, which lets a
+# long-running worker reuse catalogs it has already loaded. Returns the
+# selected objects and the JSON string.
+def export(args, load_catalog=load_catalog):
     json_args = {}
     if args.indent:
         json_args = {'sort_keys':True, 'indent':args.indent}
@@ -152,43 +419,405 @@ def main():
     objects = []
 
     specifically = re.compile(args.specifically)
+    boundaries = None
+    if args.constellation and args.boundaries:
+        boundaries = load_catalog('boundaries', args.boundaries)
+    query = catalog_query(args, boundaries)
+
+    region = None
+    if args.region:
+        region = [float(r) for r in args.region.split(',')]
+    cone = None
+    if args.cone:
+        cone = [float(c) for c in args.cone.split(',')]
+
+    # Regional exports only carry the parts of lines and boundaries that
+    # are inside the region
+    clip = None
+    if (region or cone) and not args.no_clip:
+        from clipping import Clip
+        clip = Clip.box(*region) if region else Clip.cone(*cone)
 
     if args.hyg:
-        hyg_catalog = HYGStarCatalog(open(args.hyg))
-        objects.extend([ o for o in hyg_catalog.values() 
-            if (o.magnitude <= args.magnitude) and 
-                (specifically.search(o.id) or
-                specifically.search(''.join(o.aliases)))])
+        hyg_catalog = load_catalog('hyg', args.hyg)
+        objects.extend(query.run(hyg_catalog))
+
+    # Partitions only read the cells in the region, or around the cone
+    if args.partitions:
+        from partitions import PartitionedCatalog
+        partition_region = region
+        if cone:
+            from milkyway import cone_region
+            partition_region = cone_region(*cone)
+        objects.extend(query.run(PartitionedCatalog(args.partitions).query(
+            partition_region, magnitude_range(args)[1])))
 
     if args.ngc:
-        ngc_catalog = NGCCatalog(open(args.ngc))
-        for o in ngc_catalog.values():
-            if (o.magnitude <= args.magnitude) and \
-                    any([specifically.search(a) for a in o.aliases]):
-                print("APPENDING", o.aliases)
-                objects.append(o)
+        ngc_catalog = load_catalog('ngc', args.ngc)
+        objects.extend(query.run(ngc_catalog))
+
+    abbrs = None
+    if args.constellation:
+        abbrs = set(a.upper() for a in args.constellation.split(','))
 
     if args.constellations:
-        const_catalog = ConstellationCatalog(open(args.constellations))
+        const_catalog = load_catalog('constellations', args.constellations)
         objects.extend([o for o in const_catalog.values() 
-            if (specifically.search(o.abbr))])
-    
+            if (specifically.search(o.abbr)) and 
+                (abbrs is None or o.abbr in abbrs)])
+
+    if args.boundaries:
+        boundary_catalog = load_catalog('boundaries', args.boundaries)
+        objects.extend([o for o in boundary_catalog.values() 
+            if (specifically.search(o.abbr)) and 
+                (abbrs is None or o.abbr in abbrs)])
+
+    if clip is not None and (args.constellations or args.boundaries):
+        from constellations import Constellation
+        objects = [clip.constellation(o, args.resolution) 
+                if isinstance(o, Constellation) else o for o in objects]
+        objects = [o for o in objects if o is not None]
+
+    if args.latitude is not None and args.month is not None:
+        year = args.year or datetime.date.today().year
+        hours = [float(h) for h in args.hours.split(',')]
+        from visibility import month_window, visible_objects
+        window = month_window(year, int(args.month), hours)
+        objects = visible_objects(objects, args.latitude, window,
+                args.min_altitude)
+
+    # The Milky Way is drawn whether it's up or not, at the detail the
+    # chart can show and only where it crosses the region
+    if args.milkyway:
+        from milkyway import select_outlines, cone_region
+        milkyway_catalog = load_catalog('milkyway', args.milkyway)
+        outline_region = None
+        if region:
+            outline_region = tuple(region)
+        elif cone:
+            outline_region = cone_region(*cone)
+        views = select_outlines(milkyway_catalog.values(), outline_region,
+                args.resolution)
+        if clip is not None:
+            for view in views:
+                view.lines = [clipped for line in view.lines 
+                        for clipped in clip.lines(line)]
+        objects.extend(view for view in views if view.lines)
+
+    if args.ephemeris:
+        if args.latitude is None:
+            raise ValueError("--ephemeris needs a --latitude")
+        from ephemeris import Ephemeris
+
+        if args.start:
+            start = datetime.datetime.strptime(args.start, '%Y-%m-%d').date()
+        else:
+            start = datetime.date(args.year or datetime.date.today().year,
+                    1, 1)
+        days = args.days
+        if days is None:
+            days = (datetime.date(start.year + 1, 1, 1) - start).days
+
+        table = Ephemeris(objects).table(args.latitude, args.longitude,
+                start, days)
+        return objects, json.dumps(table.json(), **json_args)
+
+    if args.best:
+        if args.latitude is None:
+            raise ValueError("--best needs a --latitude")
+        from planner import best_targets, targets_json
+
+        if args.date:
+            date = datetime.datetime.strptime(args.date, '%Y-%m-%d').date()
+        else:
+            date = datetime.date.today()
+        hours = [float(h) for h in args.hours.split(',')]
+
+        targets = best_targets(objects, args.latitude, args.longitude, 
+                date, args.aperture, k=args.best, hours=hours,
+                min_altitude=args.min_altitude)
+        return objects, json.dumps(targets_json(targets), **json_args)
+
+    if args.search_index:
+        from search import build_search_index
+        build_search_index(objects).save(args.search_index)
+
+    if args.density:
+        from density import SkyGrid, density_map
+        ra_cells, dec_cells = [int(c) for c in args.density_cells.split(',')]
+        magnitudes = None
+        if args.density_magnitudes:
+            magnitudes = [float(m) for m in args.density_magnitudes.split(',')]
+        density = density_map(objects, SkyGrid(ra_cells, dec_cells), 
+                magnitudes)
+        if args.geojson:
+            return objects, json.dumps(
+                    density.geojson(invert_ra=args.invert_ra), **json_args)
+        return objects, json.dumps(density.json(), **json_args)
+
+    if args.topology:
+        from constellations import Constellation, topology
+        return objects, json.dumps(topology([o for o in objects 
+            if isinstance(o, Constellation)], invert_ra=args.invert_ra),
+            **json_args)
+
+    if args.sqlite:
+        from database import write_database
+        write_database(args.sqlite, objects)
+        return objects, ""
+
+    if args.columns:
+        from columnar import write_columns
+        write_columns(args.columns, objects)
+        return objects, ""
+
+    # The objects are shared by `main`
+    if args.share:
+        return objects, ""
+
+    labels = {}
+    if args.labels:
+        from objects import CelestialObject
+        from labels import LabelLayout
+        layout = LabelLayout(chart_projection(args), args.width,
+                args.height, font_size=args.font_size)
+        labels = layout.place([o for o in objects 
+            if isinstance(o, CelestialObject)])
+
+    if args.svg:
+        from render import render_chart
+        render_chart(args.svg, objects, chart_projection(args), args.width,
+                args.height, labels=labels, magnitude=args.magnitude)
+        return objects, ""
+
+    # Only GeoJSON output records its version, so patches between the
+    # plain JSON lists couldn't be applied in order
+    if args.patch and not args.geojson:
+        raise ValueError("--patch needs --geojson")
+
+    version = args.version
+    previous = None
+    if args.previous:
+        with open(args.previous) as previous_file:
+            previous = json.load(previous_file)
+        if version is None:
+            from diff import dataset_version
+            version = dataset_version(previous) + 1
+
+    coordinates = {}
+    if args.frame != 'equatorial':
+        from frames import frame_coordinates
+        coordinates = frame_coordinates(objects, args.frame, args.epoch)
+
+    # Reference lines are only features, they aren't objects
+    features = []
+    if args.graticule or args.equators:
+        if not args.geojson:
+            raise ValueError("--graticule and --equators need --geojson")
+        from frames import graticule, equator
+        for grid in (args.graticule or '').split(','):
+            if grid:
+                features.append(graticule(grid, args.frame, 
+                    args.graticule_step, args.resolution, args.epoch,
+                    args.invert_ra))
+        for grid in (args.equators or '').split(','):
+            if grid:
+                features.append(equator(grid, args.frame, args.resolution,
+                    args.epoch, args.invert_ra))
+
     json_string = ""
     if args.geojson:
         collection = {
             "type": "FeatureCollection", 
-            "features": objects,
+            "features": objects + features,
         }
+        if version is not None:
+            collection["version"] = version
         json_encoder = CatalogsGeoJSONEncoder(**json_args)
         json_encoder.args = args
+        json_encoder.labels = labels
+        json_encoder.coordinates = coordinates
         json_string = json_encoder.encode(collection)
     else:
         json_encoder = CatalogEncoder(**json_args)
         json_encoder.args = args
+        json_encoder.labels = labels
+        json_encoder.coordinates = coordinates
         json_string = json_encoder.encode(objects)
 
+    if args.patch:
+        if previous is None:
+            raise ValueError("--patch needs a --previous export")
+        from diff import diff
+        patch = diff(previous, json.loads(json_string), to_version=version)
+        with open(args.patch, 'w') as patch_file:
+            json.dump(patch, patch_file, **json_args)
+
+    return objects, json_string
+
+
+# Options that don't change what gets exported
+UNCACHED_OPTIONS = ('out', 'cache_dir', 'cache_size', 'worker', 'socket')
+
+
+# Exports that write more than their output aren't cached
+def cacheable(args):
+    return not (args.sqlite or args.columns or args.share or 
+            args.patch or args.search_index)
+
+
+# Whether an export depends on today's date, because one of the dates
+# it needs was left to default to it
+def uses_today(args):
+    if args.year is None and args.latitude is not None and \
+            args.month is not None:
+        return True
+    if args.ephemeris and args.start is None and args.year is None:
+        return True
+    return bool(args.best) and args.date is None
+
+
+#### cached_export
+# `export` through a cache: an `ExportCache`, or `None` for no caching.
+# Returns the number of objects and the JSON string. Charts rendered
+# with `--svg` are cached too, and written out again on a hit.
+def cached_export(args, cache, load_catalog=load_catalog):
+    if cache is None or not cacheable(args):
+        objects, json_string = export(args, load_catalog)
+        return len(objects), json_string
+
+    params = dict((k, v) for k, v in vars(args).items() 
+            if k not in UNCACHED_OPTIONS)
+    # Some dates default to today, and a chart is the same wherever it's
+    # written
+    if uses_today(args):
+        params['today'] = datetime.date.today().isoformat()
+    params['svg'] = bool(args.svg)
+    from cache import catalog_fingerprint
+    fingerprint = catalog_fingerprint([p for p in (args.hyg, args.ngc, 
+        args.constellations, args.boundaries, args.milkyway, args.previous) 
+        if p] + 
+        ([os.path.join(args.partitions, 'manifest.json')] 
+            if args.partitions else []))
+
+    entry = cache.get(params, fingerprint)
+    if entry is not None:
+        count, result = entry
+        if args.svg:
+            with open(args.svg, 'w', encoding='utf-8') as svg_file:
+                svg_file.write(result)
+            return count, ""
+        return count, result
+
+    objects, json_string = export(args, load_catalog)
+    result = json_string
+    if args.svg:
+        with open(args.svg, encoding='utf-8') as svg_file:
+            result = svg_file.read()
+    cache.put(params, fingerprint, [len(objects), result])
+    return len(objects), json_string
+
+
+# The months given by a `--month` argument like '3', '1-12' or '1,4,7'
+def month_list(month):
+    months = []
+    for part in month.split(','):
+        first, _, last = part.partition('-')
+        months.extend(range(int(first), int(last or first) + 1))
+    return months
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.worker:
+        from worker import Worker
+        worker = Worker()
+        if args.socket:
+            worker.serve_socket(args.socket)
+        else:
+            worker.serve(sys.stdin, sys.stdout)
+        return
+
+    if args.build_partitions:
+        if not args.hyg:
+            raise SystemExit("--build-partitions needs a --hyg catalog")
+        from partitions import build_partitions
+        manifest = build_partitions(args.hyg, args.build_partitions)
+        print(manifest['count'], "stars in", len(manifest['cells']), "cells")
+        return
+
+    if args.bundles:
+        # bundles uses this module's catalogs and encoder
+        from bundles import build_bundles
+        paths = {'hyg': args.hyg, 'ngc': args.ngc, 
+                'constellations': args.constellations,
+                'boundaries': args.boundaries}
+        index = build_bundles(args.bundles, paths, 
+                magnitude=args.magnitude, processes=args.processes)
+        print(len([e for e in index if e['file']]), "bundles", args.bundles)
+        return
+
+    cache = None
+    if args.cache_dir:
+        from cache import ExportCache
+        cache = ExportCache(args.cache_dir, 
+                max_bytes=args.cache_size * 1024 * 1024)
+
+    # Write one file per month if we were given more than one. The
+    # catalogs only get loaded once.
+    if args.month is not None and len(month_list(args.month)) > 1:
+        if not args.out or '{' not in args.out:
+            raise SystemExit("--out must include {month} or {name} "
+                    "when exporting more than one month")
+
+        import calendar
+        import copy
+
+        catalogs = {}
+        def load_once(kind, path):
+            if (kind, path) not in catalogs:
+                catalogs[(kind, path)] = load_catalog(kind, path)
+            return catalogs[(kind, path)]
+
+        for month in month_list(args.month):
+            month_args = copy.copy(args)
+            month_args.month = str(month)
+            month_args.out = args.out.format(month=month,
+                    name=calendar.month_abbr[month].lower())
+            count, json_string = cached_export(month_args, cache, load_once)
+
+            print(count, "objects", month_args.out)
+            with open(month_args.out, 'w') as outfile:
+                outfile.write(json_string)
+        return
+
+    if args.share:
+        import signal
+        from shared import SharedCatalog
+        objects, json_string = export(args)
+        print(len(objects), "objects")
+        shared = SharedCatalog.create(objects, name=args.share)
+        print("sharing", shared.name)
+        sys.stdout.flush()
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            shared.close()
+            shared.unlink()
+        return
+
+    count, json_string = cached_export(args, cache)
+
+    print(count, "objects")
+    if cache is not None:
+        print("cache", ", ".join("{} {}".format(n, k) 
+            for k, n in sorted(cache.stats.items())))
 
-    print(len(objects), "objects")
+    if args.sqlite or args.columns or args.svg:
+        return
     
     if args.out:
         outfile = open(args.out, 'w')
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+from collections import namedtuple
+
+### Label Placement
+# Labels are placed once, at export time, for a given projection and
+# scale, rather than in the browser. Objects are labelled in order of
+# brightness. Each label tries a few positions around its object and
+# takes the first one that fits inside the chart and doesn't overlap a
+# label that has already been placed; if none fit, the object goes
+# unlabelled. Overlap tests only look at the labels in the nearby cells
+# of a spatial hash, so dense regions stay cheap.
+
+# Label: the text and its SVG position, `x`, `y` being the baseline
+# point of the text and `anchor` its SVG `text-anchor`.
+Label = namedtuple('Label', ('text', 'x', 'y', 'anchor'))
+
+# The candidate positions for a label, in order of preference: right
+# of the object, left, above and below.
+LABEL_POSITIONS = ('right', 'left', 'above', 'below')
+
+
+# The catalogs whose names are proper names (HYG `ProperName`). The
+# names of other objects, like NGC objects' uncataloged aliases, aren't
+# fit for labels.
+NAMED_CATALOGS = ('HIP',)
+
+
+# The text to use for an object's label: its proper name if it has one,
+# otherwise its id.
+def label_text(o):
+    if o.catalog in NAMED_CATALOGS:
+        names = o.names
+        if names:
+            return names[0]
+    return o.id
+
+
+#### LabelLayout
+# Greedy label placement for the given projection on a chart of the
+# given width and height. Label sizes are estimated from the font size,
+# with `char_width` the average width of a character relative to it.
+class LabelLayout(object):
+
+    def __init__(self, projection, width, height, font_size=10,
+            char_width=0.6, offset=4, cell_size=None):
+        self.projection = projection
+        self.width = width
+        self.height = height
+        self.font_size = font_size
+        self.char_width = char_width
+        self.offset = offset
+        self.cell_size = cell_size or font_size * 4
+
+        # The spatial hash of placed label boxes, (col, row): [boxes]
+        self.__cells = {}
+
+    # The cells of the spatial hash that the given box touches
+    def __box_cells(self, box):
+        size = self.cell_size
+        return [(c, r) 
+                for c in range(int(box[0] // size), int(box[2] // size) + 1)
+                for r in range(int(box[1] // size), int(box[3] // size) + 1)]
+
+    def __fits(self, box):
+        if box[0] < 0 or box[1] < 0 or \
+                box[2] > self.width or box[3] > self.height:
+            return False
+
+        for cell in self.__box_cells(box):
+            for other in self.__cells.get(cell, ()):
+                if box[0] < other[2] and other[0] < box[2] and \
+                        box[1] < other[3] and other[1] < box[3]:
+                    return False
+
+        return True
+
+    def __add(self, box):
+        for cell in self.__box_cells(box):
+            self.__cells.setdefault(cell, []).append(box)
+
+    # The label and its bounding box (x0, y0, x1, y1) for the given
+    # text at the given position around the point x, y.
+    def candidate(self, text, x, y, position):
+        width = len(text) * self.font_size * self.char_width
+        height = self.font_size
+        offset = self.offset
+
+        if position == 'right':
+            label = Label(text, x + offset, y + height / 3, 'start')
+            box = (x + offset, y - height / 2, 
+                    x + offset + width, y + height / 2)
+        elif position == 'left':
+            label = Label(text, x - offset, y + height / 3, 'end')
+            box = (x - offset - width, y - height / 2, 
+                    x - offset, y + height / 2)
+        elif position == 'above':
+            label = Label(text, x, y - offset, 'middle')
+            box = (x - width / 2, y - offset - height, 
+                    x + width / 2, y - offset)
+        else:
+            label = Label(text, x, y + offset + height, 'middle')
+            box = (x - width / 2, y + offset, 
+                    x + width / 2, y + offset + height)
+
+        return label, box
+
+    # Place labels for the given objects. Returns a dict of object id to
+    # `Label` for each object that could be labelled.
+    def place(self, objects, text=label_text):
+        labels = {}
+
+        for o in sorted(objects, key=lambda o: o.magnitude):
+            point = self.projection(o.ra.degrees, o.dec.degrees)
+            if point is None or not (0 <= point.x <= self.width and
+                    0 <= point.y <= self.height):
+                continue
+
+            o_text = text(o)
+            for position in LABEL_POSITIONS:
+                label, box = self.candidate(o_text, point.x, point.y,
+                        position)
+                if self.__fits(box):
+                    self.__add(box)
+                    labels[o.id] = label
+                    break
+
+        return labels
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import csv
+import json
+import math
+
+from frames import convert
+
+### The Milky Way
+# The outlines of the Milky Way from Dan Burton's Milky Way overlay
+# (`data/milkyway.csv`, converted from `DanBurton/MilkyWay.xls` by
+# `data/milkywaymassage.py`): the southern and northern edges, the
+# dark nebulas inside them and the Magellanic Clouds.
+#
+# Each outline is simplified once, when the catalog is loaded, to a few
+# levels of detail, from the full outline to one that's only good for
+# a whole-sky chart. Each level is split into parts of a few points,
+# each with its bounding box, so a chart of a small region only gets
+# the parts of the outlines that cross it, at the detail it can show.
+#
+# Simplifying every outline takes longer than reading the CSV, so the
+# levels are cached in a JSON sidecar file next to the CSV, which is
+# rebuilt when the CSV changes (the same way as catalog indexes).
+
+# The sidecar file extension, appended to the CSV file name
+LEVELS_SUFFIX = '.levels'
+LEVELS_FORMAT = 1
+
+# The simplification tolerances of each level of detail, in degrees.
+# Level 0 is the outline as given.
+TOLERANCES = (0, 0.25, 1, 4)
+
+# The number of segments in each part of a level
+PART_SIZE = 16
+
+# The kinds of outlines in the CSV
+KINDS = ('edge', 'dark', 'cloud')
+
+
+# A unit vector for a ra and dec in degrees
+def _vector(ra, dec):
+    ra, dec = math.radians(ra), math.radians(dec)
+    return (math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra),
+            math.sin(dec))
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0])
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _angle(a, b):
+    return math.degrees(math.atan2(math.sqrt(sum(c * c 
+        for c in _cross(a, b))), _dot(a, b)))
+
+
+# The angular distance in degrees from `p` to the great circle arc from
+# `a` to `b`, all unit vectors.
+def _arc_distance(p, a, b):
+    n = _cross(a, b)
+    norm = math.sqrt(_dot(n, n))
+    if norm < 1e-12:
+        return _angle(p, a)
+    n = (n[0] / norm, n[1] / norm, n[2] / norm)
+
+    # Only the part of the great circle between a and b counts
+    if _dot(_cross(a, p), n) >= 0 and _dot(_cross(p, b), n) >= 0:
+        return math.degrees(math.asin(min(1, abs(_dot(p, n)))))
+    return min(_angle(p, a), _angle(p, b))
+
+
+#### simplify
+# Simplify a line of (ra, dec) points in degrees with the
+# Douglas-Peucker algorithm on the sphere, keeping the points that are
+# more than `tolerance` degrees from the simplified line. The first
+# and last points are always kept, so closed outlines stay closed.
+def simplify(points, tolerance):
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+
+    vectors = [_vector(ra, dec) for ra, dec in points]
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        distance, index = 0, None
+        for i in range(first + 1, last):
+            d = _arc_distance(vectors[i], vectors[first], vectors[last])
+            if d > distance:
+                distance, index = d, i
+        if index is not None and distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+#### bounding_box
+# The bounding box of (ra, dec) points in degrees as `(ra_min, ra_max,
+# dec_min, dec_max)`. The right ascension range is the smallest one
+# that takes in every point, and may wrap through 0h, with `ra_min`
+# greater than `ra_max`.
+def bounding_box(points):
+    ras = sorted(ra % 360 for ra, dec in points)
+    decs = [dec for ra, dec in points]
+
+    # The range starts after the largest gap between right ascensions
+    gaps = [(b - a, i) for i, (a, b) in enumerate(zip(ras, ras[1:]))]
+    gaps.append((ras[0] + 360 - ras[-1], len(ras) - 1))
+    gap, i = max(gaps)
+    ra_min, ra_max = ras[(i + 1) % len(ras)], ras[i]
+    return (ra_min, ra_max, min(decs), max(decs))
+
+
+# The right ascension ranges, without wrapping, of a range that may wrap
+def _ra_ranges(ra_min, ra_max):
+    if ra_min <= ra_max:
+        return [(ra_min, ra_max)]
+    return [(ra_min, 360), (0, ra_max)]
+
+
+# Whether two bounding boxes overlap
+def overlaps(a, b):
+    if a[3] < b[2] or b[3] < a[2]:
+        return False
+    return any(a_min <= b_max and b_min <= a_max
+            for a_min, a_max in _ra_ranges(a[0], a[1])
+            for b_min, b_max in _ra_ranges(b[0], b[1]))
+
+
+#### cone_region
+# The bounding box of a cone of `radius` degrees around a ra and dec
+# in degrees.
+def cone_region(ra, dec, radius):
+    dec_min, dec_max = dec - radius, dec + radius
+    if dec_max >= 90 or dec_min <= -90:
+        return (0, 360, max(dec_min, -90), min(dec_max, 90))
+    half = math.degrees(math.asin(min(1, math.sin(math.radians(radius)) 
+        / math.cos(math.radians(dec)))))
+    return ((ra - half) % 360, (ra + half) % 360, dec_min, dec_max)
+
+
+# Split a line into parts of `PART_SIZE` segments, each with its
+# bounding box. Neighbouring parts share their end points.
+def _parts(points):
+    parts = []
+    for start in range(0, max(len(points) - 1, 1), PART_SIZE):
+        part = points[start:start + PART_SIZE + 1]
+        parts.append((bounding_box(part), part))
+    return parts
+
+
+### MilkyWayOutline
+# One outline of the Milky Way, with its simplified levels of detail.
+# `levels` has a list of `(bounding_box, points)` parts for each of the
+# `TOLERANCES`, with points as (ra, dec) in degrees.
+class MilkyWayOutline(object):
+
+    def __init__(self, id, kind, name, points=None, levels=None):
+        self.id = id
+        self.kind = kind
+        self.name = name
+        if levels is None:
+            levels = [_parts(simplify(points, t)) for t in TOLERANCES]
+        self.levels = levels
+
+    def __repr__(self):
+        return "MilkyWayOutline(id={id}, kind={kind}, name={name})".format(
+                id=self.id, kind=self.kind, name=self.name)
+
+    #### lines
+    # The lines of this outline at the given level that are inside a
+    # bounding box (all of them if `region` is `None`). Consecutive
+    # parts that are inside are joined into one line.
+    def lines(self, level=0, region=None):
+        lines = []
+        line = None
+        for box, points in self.levels[level]:
+            if region is not None and not overlaps(box, region):
+                line = None
+                continue
+            if line is None:
+                line = list(points)
+                lines.append(line)
+            else:
+                line.extend(points[1:])
+        return lines
+
+    def json(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "levels": [[[list(box), [list(p) for p in points]] 
+                for box, points in parts] for parts in self.levels],
+        }
+
+
+#### MilkyWayView
+# The lines of an outline selected for a chart, with `select_outlines`.
+# (Not a namedtuple, which JSON encoders would write as a list.)
+class MilkyWayView(object):
+    __slots__ = ('id', 'kind', 'name', 'lines')
+
+    def __init__(self, id, kind, name, lines):
+        self.id = id
+        self.kind = kind
+        self.name = name
+        self.lines = lines
+
+    def __repr__(self):
+        return "MilkyWayView(id={id}, kind={kind}, lines={lines})".format(
+                id=self.id, kind=self.kind, lines=len(self.lines))
+
+    # A GeoJSON feature for these lines in the given frame
+    def feature(self, frame='equatorial', epoch=2000.0, invert_ra=False):
+        lines = []
+        for line in self.lines:
+            lons, lats = convert([ra for ra, dec in line],
+                    [dec for ra, dec in line], 'equatorial', frame, epoch)
+            lines.append([[360 - lon if invert_ra else lon, lat] 
+                for lon, lat in zip(lons, lats)])
+
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "MultiLineString",
+                "coordinates": lines,
+            },
+            "properties": {
+                "id": self.id,
+                "type": "Milky Way",
+                "kind": self.kind,
+                "name": self.name,
+            }
+        }
+
+
+# The level of detail to use for a chart that shows `resolution`
+# degrees, the coarsest level that doesn't lose more than that.
+def detail_level(resolution):
+    return max(i for i, t in enumerate(TOLERANCES) if t <= max(resolution, 0))
+
+
+#### select_outlines
+# The lines of each outline inside a bounding box (see `cone_region`)
+# at the detail for a chart that shows `resolution` degrees, as
+# `MilkyWayView`s. Outlines with no lines inside aren't included.
+def select_outlines(outlines, region=None, resolution=0, kinds=KINDS):
+    level = detail_level(resolution)
+    views = []
+    for outline in outlines:
+        if outline.kind not in kinds:
+            continue
+        lines = outline.lines(level, region)
+        if lines:
+            views.append(MilkyWayView(outline.id, outline.kind,
+                outline.name, lines))
+    return views
+
+
+## MilkyWayCatalog
+# A catalog of Milky Way outlines, by id. Each row of the CSV has the
+# kind of outline, its name and then alternating ra (hours),dec
+# (degrees) columns, like the constellation lines.
+class MilkyWayCatalog(dict):
+
+    def __init__(self, stream=None, outlines=None):
+        super().__init__()
+        if stream is not None:
+            outlines = []
+            for number, row in enumerate(csv.reader(stream), 1):
+                if not row:
+                    continue
+                values = [float(v) for v in row[2:]]
+                points = [(ra * 15, dec) 
+                        for ra, dec in zip(values[::2], values[1::2])]
+                outlines.append(MilkyWayOutline('MW' + str(number), 
+                    row[0], row[1], points))
+
+        for outline in outlines or []:
+            self[outline.id] = outline
+
+    def select(self, region=None, resolution=0, kinds=KINDS):
+        return select_outlines(self.values(), region, resolution, kinds)
+
+    def json(self):
+        return [outline.json() for outline in self.values()]
+
+
+# The header identifying the CSV file the levels were built from
+def _levels_source(csv_path):
+    stat = os.stat(csv_path)
+    return [LEVELS_FORMAT, list(TOLERANCES), PART_SIZE, stat.st_size, 
+            stat.st_mtime_ns]
+
+
+#### load_milky_way
+# Load the Milky Way catalog from a CSV file, using the cached levels
+# from its sidecar file if they're still current, and caching them if
+# they're not.
+def load_milky_way(csv_path, levels_path=None):
+    if levels_path is None:
+        levels_path = csv_path + LEVELS_SUFFIX
+
+    source = _levels_source(csv_path)
+    try:
+        with open(levels_path) as levels_file:
+            cached = json.load(levels_file)
+    except (FileNotFoundError, ValueError):
+        cached = None
+
+    if cached is not None and cached['source'] == source:
+        return MilkyWayCatalog(outlines=[MilkyWayOutline(o['id'], 
+            o['kind'], o['name'], levels=[[(tuple(box), 
+                [tuple(p) for p in points]) for box, points in parts] 
+                for parts in o['levels']]) for o in cached['outlines']])
+
+    with open(csv_path) as stream:
+        catalog = MilkyWayCatalog(stream)
+    with open(levels_path, 'w') as levels_file:
+        json.dump({'source': source, 'outlines': catalog.json()}, 
+                levels_file, separators=(',', ':'))
+    return catalog
@@ -29,11 +29,10 @@
 import re
 import csv
 
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict
+from operator import itemgetter
 
-import unittest
-
-from utils import Size, EquatorialCoordinate
+from utils import Size, EquatorialCoordinate, LazyRegex
 
 ### Object Types
 # The standardized object types for Observation Charts
@@ -91,6 +90,10 @@ class CelestialObject(object):
     # `magnitude`, the apparent magnitude of the object in the sky
     magnitude = None
 
+    # `constellation`, the abbreviation of the constellation the object
+    # is in, i.e. 'Ori', if the catalog gives one
+    constellation = None
+
     # `catalog`, the primary source catalog for this object 
     catalog = None
 
@@ -158,7 +161,14 @@ class CelestialObject(object):
             self.__aliases = OrderedDict([(self.identifier, self.catalog),])
         return ["".join(filter(None, reversed(pair))) 
                 for pair in self.__aliases.items()]
-    
+
+    # `names` is a list of the aliases that don't belong to a catalog,
+    # i.e. 'Betelgeuse' or 'The Orion Nebula'.
+    @property
+    def names(self):
+        if self.__aliases is None:
+            self.__aliases = OrderedDict([(self.identifier, self.catalog),])
+        return [a for a, c in self.__aliases.items() if c is None and a]
 
     # Common API for adding aliases. Aliases *can* have catalogs, but
     # are not required. Example would be the Orion Nebula: It is
@@ -176,37 +186,11 @@ class CelestialObject(object):
         self.__aliases[alias] = catalog
 
 
-class TestCelestialObject(unittest.TestCase):
-    # Aliases are the primary functionality of the CelestialObject. It
-    # isn't exactly abstract, it can be used to an actual object, but
-    # objects are likely to come from a catalog, and it would be better
-    # to use a catalog-specific class to handle any catalog-specific
-    # quirks.
-    def test_aliases_dict(self):
-        c = CelestialObject('1976', 'NGC')
-        self.assertEqual(c.aliases_dict, ['1976',])
-
-    def test_catalogs(self):
-        c = CelestialObject('1976', 'NGC')
-        self.assertEqual(c.catalogs, ['NGC',])
-
-    def test_add_alias(self):
-        c = CelestialObject('1976', 'NGC')
-
-        c.add_alias('42', 'M')
-        self.assertEqual(c.aliases_dicts, ['1976', '42'])
-        self.assertEqual(c.catalogs, ['NGC', 'M'])
-
-        c.add_alias('The Orion Nebula')
-        self.assertEqual(c.aliases_dicts, ['1976', '42', 'The Orion Nebula'])
-        self.assertEqual(c.catalogs, ['NGC', 'M'])
-
-
 #### NGCObject
 
 # This regular expression matches the object size format of the HCNGC
 # catalog. Size is given major diameter x minor diameter in arc minutes.
-ngc_size_re = re.compile(r'([0-9\.]+)[\'`"] ?([xX] ?([0-9\.]+)[\'`"])?')
+ngc_size_re = LazyRegex(r'([0-9\.]+)[\'`"] ?([xX] ?([0-9\.]+)[\'`"])?')
 
 # A mapping of NGC types to the Observation Charts types
 ngc_object_types = {
@@ -228,11 +212,18 @@ ngc_object_types = {
         'Neb?': 7
 }
 
+# The HCNGC columns that `NGCObject` actually uses. The catalog has
+# around thirty columns, `NGCCatalog` only reads these.
+NGC_COLUMNS = ('NGCNo', 'RA_2000', 'DEC_2000', 'Const', 'ObjectType',
+        'Size', 'Bmag', 'Vmag', 'AlsoCatalogedAs', 'PA')
+
 # Object from the New General Catalog of deep sky objects.
 class NGCObject(CelestialObject):
 
     # Initialization is meant to take a csv.DictReader row as keyword
-    # args. 
+    # args. Only the raw strings are kept here; the coordinates, size
+    # and aliases are parsed the first time they're accessed, so
+    # objects that get filtered out never pay for that parsing.
     def __init__(self, **kwargs):
         self.__NGCNo = kwargs['NGCNo']
         self.__RA_2000 = kwargs['RA_2000']
@@ -245,18 +236,10 @@ class NGCObject(CelestialObject):
         self.__AlsoCatalogedAs = kwargs['AlsoCatalogedAs']
         self.__PA = kwargs['PA']
 
-        self.ra = EquatorialCoordinate(self.__RA_2000)
-        self.dec = EquatorialCoordinate(self.__DEC_2000)
-
-        # parse the size
-        size_match = ngc_size_re.match(self.__Size)
-        if size_match:
-            major = size_match.groups()[0] 
-            minor = size_match.groups()[2]
-            self.size = Size(major=float(major), 
-                    minor=(float(minor) if minor is not None else 0))
-        else:
-            self.size = Size(major=0, minor=0)
+        # Lazily decoded values
+        self.__ra = None
+        self.__dec = None
+        self.__size = None
 
         # Some objects don't have a Vmag... I'm not sure why.
         try:
@@ -278,77 +261,96 @@ class NGCObject(CelestialObject):
         # Lookup the NGC type and map to one of our types
         self.type = ngc_object_types[self.__ObjectType]
 
-        # The HCNGC Catalog gives us some aliases. Add them.
-        # This is imperfect because the catalog doesn't use a consistent
-        # seperator between catalog and identifier.
+    @property
+    def ra(self):
+        if self.__ra is None:
+            self.__ra = EquatorialCoordinate(self.__RA_2000)
+        return self.__ra
+
+    @property
+    def dec(self):
+        if self.__dec is None:
+            self.__dec = EquatorialCoordinate(self.__DEC_2000)
+        return self.__dec
+
+    @property
+    def constellation(self):
+        return self.__Const or None
+
+    # parse the size
+    @property
+    def size(self):
+        if self.__size is None:
+            size_match = ngc_size_re.match(self.__Size)
+            if size_match:
+                major = size_match.groups()[0] 
+                minor = size_match.groups()[2]
+                self.__size = Size(major=float(major), 
+                        minor=(float(minor) if minor is not None else 0))
+            else:
+                self.__size = Size(major=0, minor=0)
+        return self.__size
+
+    # The HCNGC Catalog gives us some aliases. Add them the first time
+    # any of the alias properties are used.
+    # This is imperfect because the catalog doesn't use a consistent
+    # seperator between catalog and identifier.
+    def __decode_aliases(self):
+        if self.__AlsoCatalogedAs is None:
+            return
+
+        also_cataloged_as = self.__AlsoCatalogedAs
+        self.__AlsoCatalogedAs = None
+
+        # '…' marks an empty field
         aliases = [re.split('[ -]', a.strip(), 1)
-            for a in self.__AlsoCatalogedAs.split(',')]
+            for a in also_cataloged_as.split(',')
+            if a.strip() and a.strip() != '…']
         for pair in aliases:
-            self.add_alias(*reversed(pair))
-
-
-class TestNGCObject(unittest.TestCase):
-    def setUp(self):
-        self.ngc_object_dict = {
-                'ObjectType': 'OC+Neb', 
-                'L': '1', 
-                'HistoricalNotes': 'H.C.', 
-                'NGCNo': '1976', 
-                'GC': '1179', 
-                'VSfcBrt': '…', 
-                'Const': 'Ori', 
-                'ObjectClassif': '3:02:03', 
-                'GSCSmallRegionNr': '4774', 
-                'DEC_2000': '-05º 23\' 27"', 
-                'ICEquiv': '…', 
-                'TelescopeType': 'Refractor', 
-                'PA': '…', 
-                'Size': "90'X60'", 
-                'JH': '360', 
-                'Diam_inch': '-', 
-                'Bmag': '4', 
-                'NGCEquiv': '…', 
-                'RA_2000': '05h 35m 17.2s', 
-                'AlsoCatalogedAs': 'M 42, LBN 974, Sh2-281', 
-                'POSS RedPlateNr': '1477', 
-                'HeraldBobroffASTROATLAS': 'C-53,D-24', 
-                'Year': '1610', 
-                'POSSBluePlateNr': '1477', 
-                'Vmag': '…', 
-                'WH': '…', 
-                'Uranometria2000': '225,226,270,271', 
-                'ObservingNotes': 'S.G.', 
-                'SourcesUsed': 'N,O,S,l,s,6,8,0,M,D,n', 
-                'OriginalNGCSummaryDescription': '!!! Theta Orionis and the great neb', 
-                'Discoverer': 'Nicolas Peiresc'}
-        
-    def test_size(self):
-        ngc_object = NGCObject(**self.ngc_object_dict)
-        self.assertEqual(ngc_object.identifier, '1976')
+            super().add_alias(*reversed(pair))
+
+    @property
+    def catalogs(self):
+        self.__decode_aliases()
+        return super().catalogs
+
+    @property
+    def aliases_dict(self):
+        self.__decode_aliases()
+        return super().aliases_dict
+
+    @property
+    def aliases(self):
+        self.__decode_aliases()
+        return super().aliases
+
+    @property
+    def names(self):
+        self.__decode_aliases()
+        return super().names
+
+    def add_alias(self, alias, catalog=None):
+        self.__decode_aliases()
+        super().add_alias(alias, catalog)
 
 
 #### The NGC Catalog.
 # This class simply inherits from OrderedDict. It takes a file (or
 # stream), parses it, and populates the dict.
+# Only the `NGC_COLUMNS` are pulled out of each row.
 class NGCCatalog(OrderedDict):
     def __init__(self, stream):
         super().__init__()
-        reader = csv.DictReader(stream)
+        reader = csv.reader(stream)
+        header = next(reader)
+        columns = itemgetter(*[header.index(c) for c in NGC_COLUMNS])
         for row in reader:
-            ngc_object = NGCObject(**row)
+            if not row:
+                continue
+            ngc_object = NGCObject(**dict(zip(NGC_COLUMNS, columns(row))))
             self[ngc_object.identifier] = ngc_object
 
 
-class TestNGCCatalog(unittest.TestCase):
-    def test_init(self):
-        import io
-        ngc_orion = '''NGCNo,L,GC,JH,WH,RA_2000,DEC_2000,Const,OriginalNGCSummaryDescription,Discoverer,Year,TelescopeType,Diam_inch,ObjectType,ObjectClassif,Size,PA,Vmag,Bmag,VSfcBrt,NGCEquiv,ICEquiv,AlsoCatalogedAs,HistoricalNotes,ObservingNotes,Uranometria2000,HeraldBobroffASTROATLAS,GSCSmallRegionNr,POSSBluePlateNr,POSS RedPlateNr,SourcesUsed
-5194,1,3572,1622,…,13h 29m 52.1s,"+47º 11' 43""",CVn,"!!!, Great Spiral neb",Charles Messier,1773,Refractor,3.3,Gxy,Sc I,11'X7.8',163,8.5,9.1,13.1,…,…,"M 51A, UGC 8493, ARP 85, MCG+08-25-012, CGCG 246.008, VV 403, IRAS 13277+4727, PGC 47404",H.C.,S.G.,76,"C-11,C-29",3460,1593,1593,"N,O,S,U,1,Z,m,0,6,8,D,n"
-1976,1,1179,360,…,05h 35m 17.2s,"-05º 23' 27""",Ori,!!! Theta Orionis and the great neb,Nicolas Peiresc,1610,Refractor,-,OC+Neb,3:02:03,90'X60',…,…,4,…,…,…,"M 42, LBN 974, Sh2-281",H.C.,S.G.,"225,226,270,271","C-53,D-24",4774,1477,1477,"N,O,S,l,s,6,8,0,M,D,n"'''
-        stream = io.StringIO(initial_value=ngc_orion)
-        ngc_catalog = NGCCatalog(stream)
-        self.assertTrue('1976' in ngc_catalog)
-
         
 #### HYGStar
 # A star from the HYG  catalog. The star's HR number is prefered as
@@ -385,6 +387,11 @@ class HYGStar(CelestialObject):
         self.dec = EquatorialCoordinate(self.__Dec, degrees=True)
         self.magnitude = float(self.__Mag)
 
+        # The constellation is the last part of the Bayer/Flamsteed
+        # designation, i.e. 'Ori' in '58Alp Ori'
+        if self.__BayerFlamsteed.strip():
+            self.constellation = self.__BayerFlamsteed.split()[-1]
+
         # HYG gives us a lot of aliases. Add them.
         self.add_alias(self.__HD, 'HD')
         self.add_alias(self.__HR, 'HR')
@@ -395,42 +402,6 @@ class HYGStar(CelestialObject):
         # self.add_alias(self.__BayerFlamsteed, )
 
 
-class TestHYGStar(unittest.TestCase):
-    def setUp(self):
-        self.hyg_object_dict = {
-                'VX': '-1.693e-05', 
-                'Distance': '131.061598951507', 
-                'X': '2.738', 
-                'StarID': '27919', 
-                'HD': '39801', 
-                'Z': '16.89611', 
-                'VZ': '9.611e-06', 
-                'BayerFlamsteed': '58Alp Ori', 
-                'VY': '2.0769e-05', 
-                'PMRA': '27.33', 
-                'Mag': '0.45', 
-                'HR': '2061', 
-                'Y': '129.93909', 
-                'Spectrum': 'M2Ib', 
-                'ColorIndex': '1.500', 
-                'RA': '5.91952477', 
-                'HIP': '27989', 
-                'AbsMag': '-5.1373773102256', 
-                'Dec': '07.40703634', 
-                'PMDec': '10.86', 
-                'ProperName': 'Betelgeuse', 
-                'Gliese': '', 
-                'RV': '21'}
-
-    def test_init(self):
-        # Betelgeuse, HIP 27989
-        hyg_object = HYGStar(**self.hyg_object_dict)
-        self.assertEqual(hyg_object.identifier, '27989')
-        self.assertEqual(hyg_object.ra.hours, 5.91952477)
-        self.assertEqual(hyg_object.ra.degrees, 88.79287155)
-        self.assertEqual(hyg_object.dec.degrees, 7.40703634)
-
-
 #### The HYG Catalog
 # This class simply inherits from OrderedDict. It takes a file (or
 # stream), parses it, and populates the dict.
@@ -441,17 +412,3 @@ class HYGStarCatalog(OrderedDict):
         for row in reader:
             hyg_star = HYGStar(**row)
             self[hyg_star.identifier] = hyg_star
-
-
-class TestHYGStarCatalog(unittest.TestCase):
-    def test_init(self):
-        import io
-        hyg_betelgeuse = '''StarID,HIP,HD,HR,Gliese,BayerFlamsteed,ProperName,RA,Dec,Distance,PMRA,PMDec,RV,Mag,AbsMag,Spectrum,ColorIndex,X,Y,Z,VX,VY,VZ
-27919,27989,39801,2061,,58Alp Ori,Betelgeuse,5.91952477,07.40703634,131.061598951507,27.33,10.86,21,0.45,-5.1373773102256,M2Ib,1.500,2.738,129.93909,16.89611,-1.693e-05,2.0769e-05,9.611e-06'''
-        stream = io.StringIO(initial_value=hyg_betelgeuse)
-        hyg_catalog = HYGStarCatalog(stream)
-        self.assertTrue('27989' in hyg_catalog)
-
-if __name__ == "__main__":
-    unittest.main()
-
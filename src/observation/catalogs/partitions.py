@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import csv
+import json
+import heapq
+import tempfile
+from itertools import islice
+
+from objects import HYGStar
+from density import SkyGrid
+from query import in_ra_range
+
+### Partitioned Catalogs
+# Star catalogs too big to load as objects, split on disk by sky cell.
+#
+# Building a partitioned catalog streams a HYG-style CSV file in chunks
+# of `chunk_size` rows. Each chunk is keyed by the `SkyGrid` cell and
+# magnitude of its rows, sorted, and written to a run file; the runs
+# are then merged into one CSV file per cell, sorted by magnitude. Only
+# one chunk is in memory while sorting, and one row per run while
+# merging, however big the catalog is.
+#
+# A `manifest.json` lists the cells with their files, row counts and
+# magnitude ranges. Queries for a region and magnitude limit only open
+# the cells that overlap the region and have stars bright enough, and
+# stop reading each one at the first star that's too faint.
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT = 'observation-charts-partitions'
+
+# The number of rows sorted in memory at a time
+CHUNK_SIZE = 100000
+
+
+def _cell_file(cell):
+    return 'cell-{:05d}.csv'.format(cell)
+
+
+# The (cell, magnitude, row) keys of CSV rows, skipping rows without
+# usable coordinates or magnitudes. Right ascension is in hours.
+def _keyed_rows(rows, grid, ra_column, dec_column, magnitude_column):
+    for row in rows:
+        try:
+            ra = float(row[ra_column]) * 15
+            dec = float(row[dec_column])
+            magnitude = float(row[magnitude_column])
+        except (ValueError, IndexError):
+            continue
+        yield grid.cell(ra, dec), magnitude, row
+
+
+# Read back a run file as (cell, magnitude, row) keys
+def _read_run(path):
+    with open(path, newline='', encoding='utf-8') as run_file:
+        for record in csv.reader(run_file):
+            yield int(record[0]), float(record[1]), record[2:]
+
+
+#### build_partitions
+# Partition the HYG-style CSV file at `csv_path` into `directory`.
+# Returns the manifest.
+def build_partitions(csv_path, directory, grid=None, 
+        chunk_size=CHUNK_SIZE, ra='RA', dec='Dec', magnitude='Mag'):
+    if grid is None:
+        grid = SkyGrid()
+    os.makedirs(directory, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=directory) as runs_directory:
+        runs = []
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader)
+            columns = [header.index(c) for c in (ra, dec, magnitude)]
+
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+                keyed = sorted(_keyed_rows(chunk, grid, *columns), 
+                        key=lambda k: k[:2])
+                run_path = os.path.join(runs_directory, 
+                        'run-{}.csv'.format(len(runs)))
+                with open(run_path, 'w', newline='', 
+                        encoding='utf-8') as run_file:
+                    writer = csv.writer(run_file)
+                    writer.writerows([cell, repr(m)] + row 
+                            for cell, m, row in keyed)
+                runs.append(run_path)
+
+        cells = {}
+        cell_file = None
+        current = None
+        merged = heapq.merge(*[_read_run(r) for r in runs], 
+                key=lambda k: k[:2])
+        try:
+            for cell, m, row in merged:
+                if cell != current:
+                    if cell_file is not None:
+                        cell_file.close()
+                    current = cell
+                    cell_file = open(os.path.join(directory, 
+                        _cell_file(cell)), 'w', newline='', encoding='utf-8')
+                    writer = csv.writer(cell_file)
+                    writer.writerow(header)
+                    cells[cell] = {'file': _cell_file(cell), 'count': 0,
+                            'brightest': m, 'faintest': m}
+                writer.writerow(row)
+                cells[cell]['count'] += 1
+                cells[cell]['faintest'] = m
+        finally:
+            if cell_file is not None:
+                cell_file.close()
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'grid': [grid.ra_cells, grid.dec_cells],
+        'columns': {'ra': ra, 'dec': dec, 'magnitude': magnitude},
+        'header': header,
+        'count': sum(c['count'] for c in cells.values()),
+        'cells': dict((str(cell), c) for cell, c in sorted(cells.items())),
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+#### PartitionedCatalog
+# Queries against a partitioned catalog. Regions are given as 
+# `(ra_min, ra_max, dec_min, dec_max)` in degrees, `ra_min` greater than
+# `ra_max` wrapping through 0h.
+#
+#   stars = PartitionedCatalog('data/partitions/hyg')
+#   for star in stars.query(region=(75, 95, -10, 10), magnitude=8):
+#       ...
+#
+class PartitionedCatalog(object):
+
+    def __init__(self, directory, object_class=HYGStar):
+        self.directory = directory
+        self.object_class = object_class
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != MANIFEST_FORMAT:
+            raise ValueError("Not a partitioned catalog", directory)
+        self.grid = SkyGrid(*self.manifest['grid'])
+
+    def __len__(self):
+        return self.manifest['count']
+
+    # The cells worth reading for a region and magnitude limit
+    def cells(self, region=None, magnitude=None):
+        cells = self.manifest['cells']
+        if region is None:
+            numbers = sorted(int(c) for c in cells)
+        else:
+            numbers = [c for c in self.grid.cells_in(*region) 
+                    if str(c) in cells]
+        return [c for c in numbers if magnitude is None or 
+                cells[str(c)]['brightest'] <= magnitude]
+
+    # The rows of a cell, as dicts, down to the magnitude limit
+    def rows(self, cell, magnitude=None):
+        entry = self.manifest['cells'].get(str(cell))
+        if entry is None:
+            return
+        magnitude_column = self.manifest['columns']['magnitude']
+        with open(os.path.join(self.directory, entry['file']), newline='',
+                encoding='utf-8') as cell_file:
+            for row in csv.DictReader(cell_file):
+                if magnitude is not None and \
+                        float(row[magnitude_column]) > magnitude:
+                    break
+                yield row
+
+    # The objects in a region down to a magnitude limit
+    def query(self, region=None, magnitude=None):
+        for cell in self.cells(region, magnitude):
+            for row in self.rows(cell, magnitude):
+                o = self.object_class(**row)
+                if region is None or (
+                        in_ra_range(o.ra.degrees, region[0], region[1]) and
+                        region[2] <= o.dec.degrees <= region[3]):
+                    yield o
+
+    # All the objects in one cell down to a magnitude limit, brightest
+    # first, for exporting a cell as a tile.
+    def tile(self, cell, magnitude=None):
+        return [self.object_class(**row) 
+                for row in self.rows(cell, magnitude)]
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+import heapq
+import datetime
+from collections import namedtuple
+
+from objects import CelestialObject
+from visibility import sidereal_time
+
+### Planner
+# The best targets for a night at a site with a given telescope.
+#
+# Each object is scored on four terms, each between 0 and 1, and the
+# score is their sum:
+#
+#   * brightness: how far the object is above the limiting magnitude
+#     of the aperture, after extinction at its best airmass. Anything
+#     below the limit isn't a target at all.
+#   * altitude: the sine of its highest altitude during the night.
+#   * time: the fraction of the night it spends above the minimum
+#     altitude.
+#   * surface brightness: how concentrated its light is. A faint
+#     magnitude spread over a large area is harder to see than the
+#     magnitude alone suggests.
+#
+# The night is sampled every `step` minutes, and the altitudes of the
+# whole catalog are worked out one sample at a time over plain lists of
+# coordinates. Only the top `k` scores are sorted.
+
+# The extinction, in magnitudes per airmass
+EXTINCTION = 0.25
+
+# The magnitude margin that gets the full brightness score
+MAGNITUDE_RANGE = 5.0
+
+# Surface brightnesses, in magnitudes per square arcminute, that get
+# the full and no surface brightness score.
+SURFACE_BRIGHT = 10.0
+SURFACE_FAINT = 15.0
+
+# Target: a ranked object. `best_time` is the UT datetime of its highest
+# altitude, and `hours` the time it spends above the minimum altitude.
+Target = namedtuple('Target', ('id', 'score', 'magnitude', 
+    'surface_brightness', 'altitude', 'airmass', 'hours', 'best_time'))
+
+
+# The faintest magnitude visible with the given aperture, in millimeters
+def limiting_magnitude(aperture):
+    return 2.7 + 5 * math.log10(aperture)
+
+
+# The airmass at the given altitude in degrees (Kasten and Young, 1989).
+# Objects below the horizon have no airmass to speak of, and the
+# formula breaks down a few degrees below it, so they get infinity.
+def airmass(altitude):
+    if altitude < 0:
+        return math.inf
+    return 1 / (math.sin(math.radians(altitude)) +
+            0.50572 * (altitude + 6.07995) ** -1.6364)
+
+
+# The surface brightness, in magnitudes per square arcminute, of an
+# object of the given magnitude and `Size` in arcminutes. Objects
+# without a size are treated as points and get their magnitude.
+def surface_brightness(magnitude, size):
+    if size is None or size.major <= 0:
+        return magnitude
+    minor = size.minor if size.minor and size.minor > 0 else size.major
+    return magnitude + 2.5 * math.log10(math.pi / 4 * size.major * minor)
+
+
+# The UT times at which to sample the night that starts on the evening
+# of the given date, for the given local `(start, end)` hours.
+def night_times(date, longitude, hours=(20, 2), step=15):
+    start_hour, end_hour = hours
+    length = (end_hour - start_hour) % 24 or 24
+    start = datetime.datetime(date.year, date.month, date.day) + \
+            datetime.timedelta(hours=start_hour - longitude / 15)
+    return [start + datetime.timedelta(minutes=m) 
+            for m in range(0, int(length * 60) + 1, step)]
+
+
+#### best_altitudes
+# The highest altitude, in degrees, reached by each of the given
+# positions (right ascensions in hours, declinations in degrees) at the
+# given times, the index of the time it was reached at, and the number
+# of times it was above `min_altitude`.
+def best_altitudes(ras, decs, latitude, longitude, times, min_altitude=0):
+    phi = math.radians(latitude)
+    sin_phi = math.sin(phi)
+    cos_phi = math.cos(phi)
+    sin_min = math.sin(math.radians(min_altitude))
+
+    # The hour angle of each object is the local sidereal time less its
+    # right ascension.
+    ra_radians = [math.radians(ra * 15) for ra in ras]
+    a = [sin_phi * math.sin(math.radians(d)) for d in decs]
+    b = [cos_phi * math.cos(math.radians(d)) for d in decs]
+
+    best = [-2.0] * len(ras)
+    best_index = [0] * len(ras)
+    above = [0] * len(ras)
+    for t, when in enumerate(times):
+        lst = math.radians((sidereal_time(when) + longitude / 15) * 15)
+        sin_alts = [ai + bi * math.cos(lst - r) 
+                for ai, bi, r in zip(a, b, ra_radians)]
+        for i, s in enumerate(sin_alts):
+            if s > best[i]:
+                best[i] = s
+                best_index[i] = t
+            if s >= sin_min:
+                above[i] += 1
+
+    return ([math.degrees(math.asin(min(s, 1))) for s in best], 
+            best_index, above)
+
+
+#### best_targets
+# The `k` best `CelestialObject`s to observe from the given site on the
+# night starting on `date` with a telescope of the given aperture in
+# millimeters, as `Target`s, best first.
+def best_targets(objects, latitude, longitude, date, aperture, k=10,
+        hours=(20, 2), min_altitude=0, step=15):
+    objects = [o for o in objects if isinstance(o, CelestialObject)]
+    times = night_times(date, longitude, hours, step)
+    altitudes, best_index, above = best_altitudes(
+            [o.ra.hours for o in objects], [o.dec.degrees for o in objects],
+            latitude, longitude, times, min_altitude)
+
+    limit = limiting_magnitude(aperture)
+    night_hours = (len(times) - 1) * step / 60
+
+    candidates = [i for i, n in enumerate(above) if n]
+    airmasses = {i: airmass(altitudes[i]) for i in candidates}
+    margins = {i: limit - objects[i].magnitude - 
+            EXTINCTION * (airmasses[i] - 1) for i in candidates}
+    candidates = [i for i in candidates if margins[i] > 0]
+    surfaces = {i: surface_brightness(objects[i].magnitude, 
+        objects[i].size) for i in candidates}
+
+    scores = {i: min(margins[i] / MAGNITUDE_RANGE, 1) + 
+            math.sin(math.radians(altitudes[i])) + 
+            above[i] / len(times) +
+            min(max((SURFACE_FAINT - surfaces[i]) / 
+                (SURFACE_FAINT - SURFACE_BRIGHT), 0), 1)
+        for i in candidates}
+
+    return [Target(id=objects[i].id, 
+                score=scores[i], 
+                magnitude=objects[i].magnitude,
+                surface_brightness=surfaces[i],
+                altitude=altitudes[i],
+                airmass=airmasses[i],
+                hours=min(above[i] * step / 60, night_hours),
+                best_time=times[best_index[i]])
+            for i in heapq.nlargest(k, candidates, key=scores.__getitem__)]
+
+
+# The JSON-encodable form of a list of `Target`s
+def targets_json(targets):
+    return [{
+            "id": t.id,
+            "score": round(t.score, 3),
+            "magnitude": t.magnitude,
+            "surface_brightness": round(t.surface_brightness, 2),
+            "altitude": round(t.altitude, 1),
+            "airmass": round(t.airmass, 2),
+            "hours": round(t.hours, 2),
+            "best_time": t.best_time.strftime('%Y-%m-%dT%H:%MZ'),
+        } for t in targets]
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+
+from utils import Point
+
+### Projections
+# Projections map celestial coordinates (right ascension and declination
+# in degrees) onto the flat chart, in SVG pixel coordinates. They follow
+# the D3 projections used by the JavaScript charts: a `center` to
+# rotate to, a `scale` and a `translate` offset. The sky is seen from
+# the inside, so east (increasing right ascension) is to the left, and
+# the SVG y axis points down.
+#
+# Projecting a point that is clipped away returns `None`.
+
+# Normalize an angle in degrees to -180..180
+wrap_degrees = lambda d: (d + 180) % 360 - 180
+
+
+class Projection(object):
+
+    def __init__(self, center=(0, 0), scale=1, translate=(0, 0)):
+        self.center = center
+        self.scale = scale
+        self.translate = translate
+
+        self._ra0 = math.radians(center[0])
+        self._dec0 = math.radians(center[1])
+        self._sin_dec0 = math.sin(self._dec0)
+        self._cos_dec0 = math.cos(self._dec0)
+
+    def __repr__(self):
+        return "{cls}(center={center}, scale={scale}, translate={translate})".format(
+                cls=self.__class__.__name__, center=self.center,
+                scale=self.scale, translate=self.translate)
+
+    # The raw projection of the given ra and dec in radians, as a
+    # unitless x, y tuple with y pointing up, or `None` if clipped.
+    def raw(self, ra, dec):
+        raise NotImplementedError
+
+    def __call__(self, ra, dec):
+        xy = self.raw(math.radians(ra), math.radians(dec))
+        if xy is None:
+            return None
+        return Point(self.translate[0] + self.scale * xy[0],
+                self.translate[1] - self.scale * xy[1])
+
+    # Project lists of ra and dec values
+    def project(self, ras, decs):
+        return [self(ra, dec) for ra, dec in zip(ras, decs)]
+
+
+#### StereographicProjection
+# The projection the charts use. Points further than `clip_angle`
+# degrees from the center are clipped.
+class StereographicProjection(Projection):
+
+    def __init__(self, center=(0, 0), scale=1, translate=(0, 0),
+            clip_angle=90):
+        super().__init__(center=center, scale=scale, translate=translate)
+        self.clip_angle = clip_angle
+        self._cos_clip = math.cos(math.radians(clip_angle))
+
+    def raw(self, ra, dec):
+        cos_dec = math.cos(dec)
+        sin_dec = math.sin(dec)
+        cos_dra = math.cos(ra - self._ra0)
+        cos_c = self._sin_dec0 * sin_dec + \
+                self._cos_dec0 * cos_dec * cos_dra
+        if cos_c < self._cos_clip or cos_c <= -1:
+            return None
+        k = 1 / (1 + cos_c)
+        return (-k * cos_dec * math.sin(ra - self._ra0),
+                k * (self._cos_dec0 * sin_dec -
+                    self._sin_dec0 * cos_dec * cos_dra))
+
+
+#### EquirectangularProjection
+# A plain ra/dec grid, cut at 180° from the center's right ascension.
+class EquirectangularProjection(Projection):
+
+    def raw(self, ra, dec):
+        return (-math.radians(wrap_degrees(math.degrees(ra - self._ra0))),
+                dec - self._dec0)
+
+
+# The projections by name, for command line options
+PROJECTIONS = {
+    'stereographic': StereographicProjection,
+    'equirectangular': EquirectangularProjection,
+}
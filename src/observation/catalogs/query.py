@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import re
+import math
+import bisect
+import weakref
+from collections.abc import Mapping
+
+from objects import OBJECT_TYPES, CelestialObject
+
+### Catalog Queries
+# Queries select `CelestialObject`s from catalogs with predicates on
+# magnitude, type, constellation, region and id, combined with `&`:
+#
+#   query = Magnitude(faintest=8) & Types('Galaxy', 'Open Cluster') & \
+#           Region(75, 95, -10, 10)
+#   objects = query.run(ngc_catalog.values())
+#
+# A query runs as a plan rather than one object at a time. A catalog's
+# objects are sorted by magnitude once, the first time it's queried, so
+# the magnitude range is a pair of binary searches that cut off every
+# object outside it. The remaining
+# predicates then run cheapest first, each over the columns (lists of
+# ra, dec, type and so on) of the objects that are still candidates, as
+# a list of booleans. The expensive predicates (regions need decoded
+# coordinates, ids need decoded aliases) only see the few objects that
+# got past the cheap ones.
+
+
+# Whether a right ascension is in a range that may wrap through 0h,
+# `ra_min` being greater than `ra_max`.
+def in_ra_range(ra, ra_min, ra_max):
+    if ra_min <= ra_max:
+        return ra_min <= ra <= ra_max
+    return ra >= ra_min or ra <= ra_max
+
+
+# The magnitude orders of the catalogs queried so far, by the id of the
+# catalog, with a weak reference to it. (Catalogs are dicts, so they
+# can't be the keys of a `WeakKeyDictionary`.)
+_magnitude_orders = {}
+
+
+#### magnitude_order
+# The `CelestialObject`s of a catalog (a mapping, or any iterable of
+# objects), the indexes of those objects sorted by magnitude, and the
+# sorted magnitudes. Mappings are sorted once and the result is kept
+# for as long as the catalog is; catalogs aren't changed after they're
+# loaded.
+def magnitude_order(catalog):
+    key = id(catalog)
+    if isinstance(catalog, Mapping):
+        order = _magnitude_orders.get(key)
+        if order is not None and order[0]() is catalog and \
+                order[1] == len(catalog):
+            return order[2:]
+
+    values = catalog.values() if isinstance(catalog, Mapping) else catalog
+    objects = [o for o in values if isinstance(o, CelestialObject)]
+    magnitudes = [o.magnitude for o in objects]
+    by_magnitude = sorted(range(len(objects)), key=magnitudes.__getitem__)
+    sorted_magnitudes = [magnitudes[i] for i in by_magnitude]
+
+    if isinstance(catalog, Mapping):
+        try:
+            ref = weakref.ref(catalog, 
+                    lambda ref: _magnitude_orders.pop(key, None))
+        except TypeError:
+            pass
+        else:
+            _magnitude_orders[key] = (ref, len(catalog), objects, 
+                    by_magnitude, sorted_magnitudes)
+    return objects, by_magnitude, sorted_magnitudes
+
+
+#### Predicate
+# The base for predicates. `mask` returns a boolean for each of the
+# given objects; `cost` orders predicates in a plan. Predicates that
+# keep every object are `everything` and are left out of plans.
+class Predicate(object):
+    cost = 1
+    everything = False
+
+    def mask(self, objects):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return Query([self]) & other
+
+    def __repr__(self):
+        return "{cls}({args})".format(cls=self.__class__.__name__,
+                args=', '.join('{}={!r}'.format(k, v) 
+                    for k, v in sorted(vars(self).items())))
+
+
+#### Magnitude
+# Objects with magnitudes in the range `brightest` to `faintest`. Either
+# end may be left open.
+class Magnitude(Predicate):
+    cost = 0
+
+    def __init__(self, brightest=None, faintest=None):
+        self.brightest = brightest
+        self.faintest = faintest
+
+    def mask(self, objects):
+        brightest = -math.inf if self.brightest is None else self.brightest
+        faintest = math.inf if self.faintest is None else self.faintest
+        return [brightest <= m <= faintest 
+                for m in [o.magnitude for o in objects]]
+
+
+#### Types
+# Objects of the given `OBJECT_TYPES`, by name or index
+class Types(Predicate):
+    cost = 0
+
+    def __init__(self, *types):
+        self.types = frozenset(OBJECT_TYPES.index(t) if isinstance(t, str)
+                else t for t in types)
+
+    def mask(self, objects):
+        types = self.types
+        return [t in types for t in [o.type for o in objects]]
+
+
+#### InConstellation
+# Objects in any of the given constellations, by abbreviation. Objects
+# know their constellation from the catalog (the NGC `Const` column, or
+# a HYG star's Bayer/Flamsteed designation). Given `boundaries` (a
+# `BoundaryCatalog`), objects that don't know theirs are placed inside
+# the constellations' boundaries.
+class InConstellation(Predicate):
+    cost = 1
+
+    def __init__(self, *abbrs, boundaries=None):
+        self.abbrs = frozenset(a.upper() for a in abbrs)
+        self.boundaries = boundaries
+        self.__polygons = None
+        # Placing objects needs their coordinates
+        if boundaries is not None:
+            self.cost = 3
+
+    def __repr__(self):
+        return "InConstellation(abbrs={!r}, boundaries={})".format(
+                self.abbrs, self.boundaries is not None)
+
+    # The prepared boundaries of the constellations
+    def polygons(self):
+        if self.__polygons is None:
+            from clipping import Polygon, vector
+            self.__polygons = [Polygon([vector(p.ra.degrees, p.dec.degrees)
+                    for p in line.positions])
+                for abbr in sorted(self.abbrs) 
+                if abbr in self.boundaries
+                for line in self.boundaries[abbr].boundaries]
+        return self.__polygons
+
+    def mask(self, objects):
+        abbrs = self.abbrs
+        mask = [c is not None and c.upper() in abbrs 
+                for c in [o.constellation for o in objects]]
+        if self.boundaries is None:
+            return mask
+
+        from clipping import vector
+        polygons = self.polygons()
+        for i, o in enumerate(objects):
+            if o.constellation is None:
+                v = vector(o.ra.degrees, o.dec.degrees)
+                mask[i] = any(p.contains(v) for p in polygons)
+        return mask
+
+
+#### Region
+# Objects within right ascension and declination bounds in degrees.
+# `ra_min` greater than `ra_max` wraps through 0h.
+class Region(Predicate):
+    cost = 2
+
+    def __init__(self, ra_min, ra_max, dec_min, dec_max):
+        self.ra_min = ra_min
+        self.ra_max = ra_max
+        self.dec_min = dec_min
+        self.dec_max = dec_max
+
+    def mask(self, objects):
+        ras = [o.ra.degrees for o in objects]
+        decs = [o.dec.degrees for o in objects]
+        return [self.dec_min <= dec <= self.dec_max and 
+                in_ra_range(ra, self.ra_min, self.ra_max)
+                for ra, dec in zip(ras, decs)]
+
+
+#### Cone
+# Objects within `radius` degrees of a center in degrees
+class Cone(Predicate):
+    cost = 3
+
+    def __init__(self, ra, dec, radius):
+        self.ra = ra
+        self.dec = dec
+        self.radius = radius
+
+    def mask(self, objects):
+        ra0 = math.radians(self.ra)
+        sin_dec0 = math.sin(math.radians(self.dec))
+        cos_dec0 = math.cos(math.radians(self.dec))
+        cos_radius = math.cos(math.radians(self.radius))
+        ras = [o.ra.radians for o in objects]
+        decs = [o.dec.radians for o in objects]
+        return [sin_dec0 * math.sin(dec) + 
+                cos_dec0 * math.cos(dec) * math.cos(ra - ra0) >= cos_radius
+                for ra, dec in zip(ras, decs)]
+
+
+#### Ids
+# Objects with an id or alias that matches a regular expression. The
+# patterns in `MATCH_ALL` keep everything without looking at (and
+# decoding) any aliases.
+MATCH_ALL = frozenset(['', '.*', '^.*', '.*$', '^.*$'])
+
+class Ids(Predicate):
+    cost = 4
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.everything = pattern in MATCH_ALL
+        self.__search = re.compile(pattern).search
+
+    def mask(self, objects):
+        search = self.__search
+        return [any(search(a) for a in o.aliases) for o in objects]
+
+    def __repr__(self):
+        return "Ids(pattern={!r})".format(self.pattern)
+
+
+#### Query
+# All of a list of predicates.
+class Query(object):
+
+    def __init__(self, predicates=()):
+        self.predicates = list(predicates)
+
+    def __and__(self, other):
+        if isinstance(other, Query):
+            return Query(self.predicates + other.predicates)
+        return Query(self.predicates + [other])
+
+    def __repr__(self):
+        return ' & '.join(repr(p) for p in self.predicates) or 'Query()'
+
+    # The magnitude range of all the `Magnitude` predicates, and the
+    # other predicates in the order they run.
+    def plan(self):
+        brightest, faintest = None, None
+        for p in self.predicates:
+            if isinstance(p, Magnitude):
+                if p.brightest is not None:
+                    brightest = p.brightest if brightest is None \
+                            else max(brightest, p.brightest)
+                if p.faintest is not None:
+                    faintest = p.faintest if faintest is None \
+                            else min(faintest, p.faintest)
+        others = sorted((p for p in self.predicates 
+            if not isinstance(p, Magnitude) and not p.everything), 
+            key=lambda p: p.cost)
+        return (brightest, faintest), others
+
+    #### run
+    # The `CelestialObject`s in `catalog` (a mapping, or any iterable of
+    # objects) that match, in their original order or, with
+    # `order='magnitude'`, brightest first. With a `limit`, only that
+    # many are returned.
+    def run(self, catalog, order='catalog', limit=None):
+        (brightest, faintest), others = self.plan()
+
+        if brightest is not None or faintest is not None or \
+                order == 'magnitude':
+            objects, by_magnitude, sorted_magnitudes = \
+                    magnitude_order(catalog)
+            start = 0 if brightest is None else \
+                    bisect.bisect_left(sorted_magnitudes, brightest)
+            end = len(objects) if faintest is None else \
+                    bisect.bisect_right(sorted_magnitudes, faintest)
+            candidates = by_magnitude[start:end]
+        else:
+            objects = [o for o in (catalog.values() 
+                if isinstance(catalog, Mapping) else catalog) 
+                if isinstance(o, CelestialObject)]
+            candidates = list(range(len(objects)))
+
+        for p in others:
+            mask = p.mask([objects[i] for i in candidates])
+            candidates = [i for i, keep in zip(candidates, mask) if keep]
+
+        if order == 'catalog':
+            candidates.sort()
+        if limit is not None:
+            candidates = candidates[:limit]
+        return [objects[i] for i in candidates]
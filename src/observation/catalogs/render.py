@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+from xml.sax.saxutils import escape, quoteattr
+
+from objects import CelestialObject
+from constellations import Constellation
+from milkyway import MilkyWayView
+
+### SVG Charts
+# Render charts straight to SVG, without a browser, using the same
+# projections (`projections`) and the same symbols as the JavaScript
+# charts:
+#
+#   * stars are black circles sized by magnitude
+#   * galaxies are red ellipses, sized and oriented by their size and
+#     position angle
+#   * open clusters are yellow circles with a dotted border
+#   * globular clusters are yellow circles with a cross
+#   * planetary nebulas are green circles with a cross
+#   * bright nebulas are green squares
+#   * the Milky Way is outlined in blue, with its dark nebulas dashed
+#
+# Only objects and line segments that fall inside the chart are
+# written. Elements are written to the output stream as they are
+# generated, so a chart never has to be held in memory as a whole.
+
+# The default style, following `css/chart-base.css`
+STYLE = '''
+svg.observation-chart { background-color: white; }
+.graticule { fill: none; stroke-width: 0.25; stroke: rgba(35, 31, 32, 0.25); }
+.star { fill: black; fill-opacity: 0.9; }
+.galaxy { fill: rgb(236, 28, 36); fill-opacity: 0.9; stroke-width: 0.32; stroke: rgb(35, 31, 32); }
+.open-cluster { fill: rgb(255, 242, 0); stroke-width: 0.8; stroke-linecap: round; stroke: rgb(35, 31, 32); stroke-dasharray: 0, 2.5; }
+.globular-cluster circle { fill: rgb(255, 242, 0); stroke-width: 0.32; stroke: rgb(35, 31, 32); }
+.globular-cluster path, .planetary-nebula path { stroke-width: 0.32; stroke: rgb(35, 31, 32); }
+.planetary-nebula circle { fill: rgb(128, 204, 40); stroke-width: 0.32; stroke: rgb(35, 31, 32); }
+.bright-nebula { fill: rgb(128, 204, 40); stroke-width: 0.32; stroke: rgb(35, 31, 32); }
+.constellation { fill: none; stroke-width: 0.64; stroke: rgb(173, 222, 138); }
+.milky-way { fill: none; stroke-width: 0.5; stroke: rgba(0, 114, 188, 0.5); }
+.milky-way.dark { stroke-dasharray: 1, 1.5; }
+.boundary { fill: none; stroke-width: 0.5; stroke: rgba(35, 31, 32, 0.5); stroke-dasharray: 2, 2; }
+.label { font-size: 10px; font-family: "Trebuchet MS", Helvetica, sans-serif; fill: rgba(35, 31, 32, 0.75); }
+'''
+
+# The CSS class of each object type, by `OBJECT_TYPES` index. Types
+# without a class aren't drawn.
+SYMBOL_CLASSES = {
+    0: 'star',
+    1: 'star',
+    2: 'star',
+    3: 'galaxy',
+    4: 'open-cluster',
+    5: 'globular-cluster',
+    6: 'planetary-nebula',
+    7: 'bright-nebula',
+}
+
+# The magnitude that gets the largest symbols
+BRIGHTEST = -1.5
+
+
+# Format a number for SVG output
+def _n(value):
+    return '{:.2f}'.format(value).rstrip('0').rstrip('.')
+
+
+#### SVGChart
+# A chart of the given size for a projection. Symbol sizes scale
+# linearly with magnitude, from `star_scale[1]` pixels at magnitude
+# -1.5 to `star_scale[0]` at `magnitude`; deep sky symbols use
+# `object_scale` the same way.
+#
+#   chart = SVGChart(StereographicProjection(center=(83.8, 0),
+#       scale=1000, translate=(500, 500)), 1000, 1000)
+#   with open('orion.svg', 'w') as f:
+#       chart.render(objects, f)
+#
+class SVGChart(object):
+
+    def __init__(self, projection, width, height, magnitude=6,
+            star_scale=(0.5, 6), object_scale=(2, 8), galaxy_scale=(1.5, 20),
+            style=STYLE):
+        self.projection = projection
+        self.width = width
+        self.height = height
+        self.magnitude = magnitude
+        self.star_scale = star_scale
+        self.object_scale = object_scale
+        self.galaxy_scale = galaxy_scale
+        self.style = style
+
+    # The symbol radius for a magnitude on the given scale
+    def radius(self, magnitude, scale):
+        smallest, largest = scale
+        span = self.magnitude - BRIGHTEST
+        t = (self.magnitude - magnitude) / span if span else 1
+        return smallest + (largest - smallest) * min(max(t, 0), 1)
+
+    # Whether a point is within `margin` pixels of the chart
+    def inside(self, point, margin=0):
+        return point is not None and \
+                -margin <= point.x <= self.width + margin and \
+                -margin <= point.y <= self.height + margin
+
+    # The size in pixels of an angle in arcminutes at the given
+    # position, measured along the declination.
+    def arcminutes(self, ra, dec, point, arcminutes):
+        offset = self.projection(ra, dec + arcminutes / 60 
+                if dec < 0 else dec - arcminutes / 60)
+        if offset is None:
+            return 0
+        return math.hypot(offset.x - point.x, offset.y - point.y)
+
+    #### symbol
+    # The SVG element for a `CelestialObject`, or `None` if it's off the
+    # chart or isn't drawn.
+    def symbol(self, o):
+        cls = SYMBOL_CLASSES.get(o.type)
+        if cls is None:
+            return None
+
+        ra, dec = o.ra.degrees, o.dec.degrees
+        point = self.projection(ra, dec)
+        if point is None:
+            return None
+
+        x, y = _n(point.x), _n(point.y)
+        id_attr = quoteattr(o.id)
+
+        if cls == 'star':
+            r = self.radius(o.magnitude, self.star_scale)
+            if not self.inside(point, r):
+                return None
+            return '<circle id={} class="star" cx="{}" cy="{}" r="{}"/>'.format(
+                    id_attr, x, y, _n(r))
+
+        if cls == 'galaxy':
+            size = o.size
+            major = minor = 0
+            if size is not None and size.major > 0:
+                major = self.arcminutes(ra, dec, point, size.major) / 2
+                minor = self.arcminutes(ra, dec, point, 
+                        size.minor or size.major) / 2
+            smallest, largest = self.galaxy_scale
+            rx = min(max(major, smallest), largest)
+            ry = min(max(minor, smallest * 0.5), rx)
+            if not self.inside(point, rx):
+                return None
+            return ('<ellipse id={} class="galaxy" cx="{}" cy="{}" rx="{}" ry="{}" '
+                    'transform="rotate({},{},{})"/>').format(id_attr, x, y,
+                        _n(rx), _n(ry), _n(o.angle or 0), x, y)
+
+        r = self.radius(o.magnitude, self.object_scale)
+        if not self.inside(point, r):
+            return None
+
+        if cls == 'open-cluster':
+            return '<circle id={} class="open-cluster" cx="{}" cy="{}" r="{}"/>'.format(
+                    id_attr, x, y, _n(r))
+
+        if cls == 'bright-nebula':
+            return '<rect id={} class="bright-nebula" x="{}" y="{}" width="{}" height="{}"/>'.format(
+                    id_attr, _n(point.x - r), _n(point.y - r), _n(2 * r), 
+                    _n(2 * r))
+
+        # Globular clusters and planetary nebulas are a circle and a
+        # cross; the planetary nebula's circle is half the size.
+        circle_r = r if cls == 'globular-cluster' else r / 2
+        return ('<g id={} class="{}"><circle cx="{}" cy="{}" r="{}"/>'
+                '<path d="M{},{}H{}M{},{}V{}"/></g>').format(id_attr, cls, 
+                    x, y, _n(circle_r), 
+                    _n(point.x - r), y, _n(point.x + r), 
+                    x, _n(point.y - r), _n(point.y + r))
+
+    #### path
+    # The SVG path data for a `Line`, with only the segments that cross
+    # the chart. The path is broken where points are clipped, where it
+    # leaves the chart and where it jumps across a projection's cut.
+    def path(self, line):
+        return self.coordinates_path([(p.ra.degrees, p.dec.degrees) 
+            for p in line.positions])
+
+    # The SVG path data for a line of (ra, dec) in degrees
+    def coordinates_path(self, coordinates):
+        points = [self.projection(ra, dec) for ra, dec in coordinates]
+        commands = []
+        pen_at = None
+        for a, b in zip(points, points[1:]):
+            if a is None or b is None or \
+                    abs(a.x - b.x) > self.width / 2 or \
+                    max(a.x, b.x) < 0 or min(a.x, b.x) > self.width or \
+                    max(a.y, b.y) < 0 or min(a.y, b.y) > self.height:
+                pen_at = None
+                continue
+            if pen_at is not a:
+                commands.append('M{},{}'.format(_n(a.x), _n(a.y)))
+            commands.append('L{},{}'.format(_n(b.x), _n(b.y)))
+            pen_at = b
+        return ''.join(commands)
+
+    # The SVG elements for a `Constellation`'s lines and boundaries
+    def constellation(self, o):
+        for cls, lines in (('constellation', o.lines), 
+                ('boundary', o.boundaries)):
+            d = ''.join(self.path(line) for line in lines)
+            if d:
+                yield '<path id={} class="{}" d="{}"/>'.format(
+                        quoteattr(o.abbr + ('' if cls == 'constellation' 
+                            else '-boundary')), cls, d)
+
+    # The SVG element for the lines of a Milky Way outline
+    # (`milkyway.MilkyWayView`)
+    def milky_way(self, o):
+        d = ''.join(self.coordinates_path(line) for line in o.lines)
+        if d:
+            return '<path id={} class="milky-way {}" d="{}"/>'.format(
+                    quoteattr(o.id), o.kind, d)
+
+    #### elements
+    # All of the SVG elements for the chart, in drawing order: the
+    # Milky Way, constellations, deep sky objects, then stars, with the brightest
+    # stars drawn last, then any labels (`labels.LabelLayout.place`).
+    def elements(self, objects, labels=None):
+        yield '<?xml version="1.0" encoding="UTF-8"?>'
+        yield ('<svg xmlns="http://www.w3.org/2000/svg" class="observation-chart" '
+                'width="{w}" height="{h}" viewBox="0 0 {w} {h}">').format(
+                        w=self.width, h=self.height)
+        if self.style:
+            yield '<style>{}</style>'.format(escape(' '.join(self.style.split())))
+
+        yield '<g class="milky-way">'
+        for o in objects:
+            if isinstance(o, MilkyWayView):
+                element = self.milky_way(o)
+                if element is not None:
+                    yield element
+        yield '</g>'
+
+        yield '<g class="constellations">'
+        for o in objects:
+            if isinstance(o, Constellation):
+                yield from self.constellation(o)
+        yield '</g>'
+
+        celestial = [o for o in objects if isinstance(o, CelestialObject)]
+
+        yield '<g class="objects">'
+        for o in celestial:
+            if SYMBOL_CLASSES.get(o.type) != 'star':
+                element = self.symbol(o)
+                if element is not None:
+                    yield element
+        yield '</g>'
+
+        yield '<g class="stars">'
+        stars = [o for o in celestial 
+                if SYMBOL_CLASSES.get(o.type) == 'star']
+        for o in sorted(stars, key=lambda o: -o.magnitude):
+            element = self.symbol(o)
+            if element is not None:
+                yield element
+        yield '</g>'
+
+        if labels:
+            yield '<g class="labels">'
+            for object_id, label in labels.items():
+                yield '<text class="label" x="{}" y="{}" text-anchor="{}">{}</text>'.format(
+                        _n(label.x), _n(label.y), label.anchor, 
+                        escape(label.text))
+            yield '</g>'
+
+        yield '</svg>'
+
+    # Write the chart to a text stream, one element per line. Returns
+    # the number of elements written.
+    def render(self, objects, stream, labels=None):
+        count = 0
+        for element in self.elements(objects, labels):
+            stream.write(element)
+            stream.write('\n')
+            count += 1
+        return count
+
+
+#### render_chart
+# Render the objects to an SVG file at `path`
+def render_chart(path, objects, projection, width, height, labels=None,
+        **kwargs):
+    chart = SVGChart(projection, width, height, **kwargs)
+    with open(path, 'w', encoding='utf-8') as f:
+        return chart.render(objects, f, labels)
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import re
+import json
+import heapq
+from bisect import bisect_left
+from collections import namedtuple
+
+from objects import CelestialObject
+from constellations import Constellation
+
+### Name and Alias Search
+# A prebuilt index over the names and aliases of catalog objects for
+# search-as-you-type: 'betel' finds Betelgeuse, 'm 42' and 'NGC1976'
+# find the Orion Nebula, and 'betelguese' still finds Betelgeuse.
+#
+# Aliases are normalized to lower case letters and digits. Each alias
+# is a prefix key, and so is every later word of a multi-word name, so
+# 'orion' finds 'The Orion Nebula'. Prefix matches come from a binary
+# search over the sorted keys. The big ranges that short prefixes
+# produce have their best entries precomputed. When there aren't
+# enough prefix matches, trigram overlap finds fuzzy matches.
+#
+# Brighter objects rank higher. The whole index is plain lists and
+# dicts, so it can be saved as a static JSON file and used by clients.
+
+SearchResult = namedtuple('SearchResult', ('id', 'alias', 'magnitude', 'score'))
+
+# The format version of saved indexes
+INDEX_VERSION = 1
+
+# Prefixes up to this length whose key ranges are bigger than
+# `PREFIX_RANGE` entries have their best entries precomputed.
+PREFIX_LENGTH = 4
+PREFIX_RANGE = 64
+
+# How many entries to keep for each precomputed prefix
+PREFIX_ENTRIES = 40
+
+# Trigrams that appear in more than this fraction of entries (like
+# 'ngc') are ignored for fuzzy matching, unless there's nothing else.
+COMMON_TRIGRAM = 0.05
+
+# The minimum trigram similarity for a fuzzy match
+FUZZY_THRESHOLD = 0.25
+
+normalize_re = re.compile(r'[^0-9a-z]+')
+normalize = lambda s: normalize_re.sub('', s.casefold())
+
+
+# The prefix keys for an alias: the whole alias, and each later word
+def alias_keys(alias):
+    words = [normalize(w) for w in alias.split()]
+    keys = [''.join(words[i:]) for i in range(len(words))]
+    return [k for k in keys if k]
+
+
+def trigrams(key):
+    padded = '$' + key + '$'
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+# The ranking boost for an object's magnitude, from 0.15 for the
+# brightest to 0 for magnitude 20 and fainter.
+def brightness(magnitude):
+    if magnitude is None:
+        return 0
+    return 0.15 * min(max((20 - magnitude) / 22, 0), 1)
+
+
+#### SearchIndex
+class SearchIndex(object):
+
+    # `data` is the dict built by `build_search_index` or loaded from
+    # a saved index.
+    def __init__(self, data):
+        self.data = data
+        self.objects = data['objects']
+        self.entries = data['entries']
+        self.keys = [k for k, e in data['keys']]
+        self.key_entries = [e for k, e in data['keys']]
+        self.trigrams = data['trigrams']
+        self.prefixes = data['prefixes']
+        self.normalized = [normalize(a) for a, o in self.entries]
+        self.trigram_counts = [len(trigrams(a)) for a in self.normalized]
+        self.ranks = [brightness(self.objects[o][1]) - 0.005 * len(a)
+                for a, o in self.entries]
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.data, f, separators=(',', ':'))
+
+    # The entries for keys starting with the normalized query, best
+    # first. Keys equal to the query always come first, since a crowded
+    # prefix's precomputed entries may not include them.
+    def __prefix_entries(self, query):
+        start = bisect_left(self.keys, query)
+        if query in self.prefixes:
+            end = bisect_left(self.keys, query + '\x00', start)
+            exact = list(dict.fromkeys(self.key_entries[start:end]))
+            return exact + [e for e in self.prefixes[query] 
+                    if e not in exact]
+
+        end = bisect_left(self.keys, query + '￿', start)
+        entries = set(self.key_entries[start:end])
+        return heapq.nlargest(PREFIX_ENTRIES, entries, 
+                key=self.ranks.__getitem__)
+
+    # Entries sharing trigrams with the normalized query, with their
+    # similarity.
+    def __fuzzy_entries(self, query):
+        query_trigrams = trigrams(query)
+        postings = [self.trigrams[t] for t in query_trigrams 
+                if t in self.trigrams]
+        limit = COMMON_TRIGRAM * len(self.entries)
+        rare = [p for p in postings if len(p) <= limit]
+        if rare:
+            postings = rare
+
+        counts = {}
+        for posting in postings:
+            for e in posting:
+                counts[e] = counts.get(e, 0) + 1
+
+        results = []
+        for e, shared in counts.items():
+            entry_trigrams = self.trigram_counts[e]
+            similarity = shared / (len(query_trigrams) + entry_trigrams - shared)
+            if similarity >= FUZZY_THRESHOLD:
+                results.append((e, similarity))
+        return results
+
+    # The `k` best matching objects for the given query
+    def search(self, query, k=10):
+        query = normalize(query)
+        if not query:
+            return []
+
+        # The best score for each object, and the alias it came from
+        best = {}
+        def consider(e, score):
+            alias, o = self.entries[e]
+            score += brightness(self.objects[o][1])
+            if o not in best or best[o][0] < score:
+                best[o] = (score, alias)
+
+        for e in self.__prefix_entries(query):
+            alias = self.normalized[e]
+            if alias == query:
+                consider(e, 1.0)
+            else:
+                consider(e, 0.7 - 0.005 * (len(alias) - len(query)))
+
+        if len(best) < k:
+            for e, similarity in self.__fuzzy_entries(query):
+                consider(e, 0.6 * similarity)
+
+        top = heapq.nlargest(k, best.items(), key=lambda b: b[1][0])
+        return [SearchResult(self.objects[o][0], alias, 
+                    self.objects[o][1], score)
+                for o, (score, alias) in top]
+
+
+#### build_search_index
+# Build a `SearchIndex` for the given `CelestialObject`s and
+# `Constellation`s.
+def build_search_index(objects):
+    index_objects = []
+    entries = []
+    for o in objects:
+        if isinstance(o, CelestialObject):
+            aliases = o.aliases
+            index_objects.append((o.id, o.magnitude))
+        elif isinstance(o, Constellation):
+            aliases = [o.abbr, o.name]
+            index_objects.append((o.abbr, None))
+        else:
+            continue
+
+        for alias in aliases:
+            if alias and normalize(alias):
+                entries.append((alias, len(index_objects) - 1))
+
+    keys = sorted((k, e) for e, (alias, o) in enumerate(entries) 
+            for k in alias_keys(alias))
+
+    postings = {}
+    for e, (alias, o) in enumerate(entries):
+        for t in trigrams(normalize(alias)):
+            postings.setdefault(t, []).append(e)
+
+    index = SearchIndex({
+        'version': INDEX_VERSION,
+        'objects': index_objects,
+        'entries': entries,
+        'keys': keys,
+        'trigrams': postings,
+        'prefixes': {},
+    })
+
+    # Precompute the best entries for short prefixes with many keys
+    key_list = index.keys
+    prefixes = set(k[:n] for k in key_list 
+            for n in range(1, min(len(k), PREFIX_LENGTH) + 1))
+    for prefix in prefixes:
+        start = bisect_left(key_list, prefix)
+        end = bisect_left(key_list, prefix + '￿', start)
+        if end - start > PREFIX_RANGE:
+            index.prefixes[prefix] = heapq.nlargest(PREFIX_ENTRIES,
+                    set(index.key_entries[start:end]),
+                    key=index.ranks.__getitem__)
+
+    return index
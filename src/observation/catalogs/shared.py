@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import sys
+import json
+import bisect
+import struct
+from array import array
+from multiprocessing import shared_memory, resource_tracker
+
+from objects import OBJECT_TYPES
+from index import index_key
+from columnar import UINT32, build_columns
+
+### Shared Catalogs
+# A catalog held in a single `multiprocessing.shared_memory` block, so
+# that any number of worker processes can use one copy of it. One
+# process loads the catalog and creates the block; the others attach to
+# it by name, read-only, without parsing or copying anything.
+#
+# The block holds the same columns as a columnar catalog (`columnar`),
+# plus an alias index: every normalized identifier and alias (see
+# `index.index_key`), sorted, with the number of the object it belongs
+# to. The block starts with the length of a JSON header that gives the
+# offset, type code and length of each column:
+#
+#   [uint32 header length][header JSON][padding][column][column]...
+#
+# Columns are in the machine's byte order, since the block never leaves
+# the machine, and each starts on an 8 byte boundary.
+
+SHARED_FORMAT = 'observation-charts-shared'
+
+# The alias index columns
+INDEX_COLUMNS = (
+    ('key_data', 'B'),
+    ('key_offsets', UINT32),
+    ('key_objects', UINT32),
+)
+
+ALIGNMENT = 8
+
+_length = struct.Struct('<I')
+
+
+# Round up to the next column boundary
+def _aligned(n):
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+#### build_alias_index
+# The alias index columns for the given columns: the sorted keys of
+# every object's identifier and aliases, and the object numbers they
+# belong to.
+def build_alias_index(columns):
+    alias_data = columns['alias_data'].tobytes()
+    alias_offsets = columns['alias_offsets']
+    alias_index = columns['alias_index']
+    id_data = columns['id_data'].tobytes()
+    id_offsets = columns['id_offsets']
+
+    entries = set()
+    for i in range(len(id_offsets) - 1):
+        strings = [id_data[id_offsets[i]:id_offsets[i + 1]]] + \
+                [alias_data[alias_offsets[a]:alias_offsets[a + 1]]
+                    for a in range(alias_index[i], alias_index[i + 1])]
+        entries.update((index_key(s.decode('utf-8')).encode('utf-8'), i) 
+                for s in strings)
+    entries = sorted(e for e in entries if e[0])
+
+    key_data = array('B')
+    key_offsets = array(UINT32, [0])
+    key_objects = array(UINT32)
+    for key, i in entries:
+        key_data.frombytes(key)
+        key_offsets.append(len(key_data))
+        key_objects.append(i)
+
+    return {'key_data': key_data, 'key_offsets': key_offsets,
+            'key_objects': key_objects}
+
+
+# The keys of the alias index as a sequence, for bisecting
+class _Keys(object):
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]])
+
+
+#### _untrack
+# Before Python 3.13 (which added `track=False`), attaching to a block
+# registers it with the resource tracker, which is only used on POSIX.
+# The tracker knows blocks by their name with its leading slash.
+def _untrack(name):
+    resource_tracker.unregister('/' + name.lstrip('/'), 'shared_memory')
+
+
+#### SharedCatalog
+# A catalog in shared memory. `SharedCatalog.create` loads objects into
+# a new block; `SharedCatalog(name)` attaches to an existing one.
+# Columns are read-only `memoryview`s, as with `ColumnarCatalog`.
+#
+#   # In the loading process
+#   shared = SharedCatalog.create(NGCCatalog(f).values(), name='ngc')
+#
+#   # In a worker process
+#   ngc = SharedCatalog('ngc')
+#   m42 = ngc.lookup('M 42')[0]
+#   ngc['magnitude'][m42], ngc.aliases(m42)
+#
+# The creating process owns the block and should `unlink` it when the
+# catalog is no longer needed; every process should `close` it.
+class SharedCatalog(object):
+
+    def __init__(self, name, create=False, size=0):
+        # Only the creating process should be tracked: the resource
+        # tracker removes tracked blocks when their process exits.
+        if sys.version_info >= (3, 13):
+            self.__memory = shared_memory.SharedMemory(name=name,
+                    create=create, size=size, track=create)
+        else:
+            self.__memory = shared_memory.SharedMemory(name=name,
+                    create=create, size=size)
+            if not create and os.name == 'posix':
+                _untrack(self.__memory.name)
+        self.__owner = create
+        if not create:
+            self.__load()
+
+    @classmethod
+    def create(cls, objects, name=None):
+        columns = build_columns(objects)
+        columns.update(build_alias_index(columns))
+
+        header = {'format': SHARED_FORMAT, 'count': len(columns['ra']),
+                'types': OBJECT_TYPES, 'columns': {}}
+        offset = 0
+        for column_name, column in columns.items():
+            header['columns'][column_name] = {
+                'offset': offset,
+                'typecode': column.typecode,
+                'length': len(column),
+            }
+            offset = _aligned(offset + len(column) * column.itemsize)
+
+        # The column offsets are relative to the end of the header
+        header_bytes = json.dumps(header).encode('utf-8')
+        start = _aligned(_length.size + len(header_bytes))
+
+        shared = cls(name, create=True, size=max(start + offset, 1))
+        buf = shared.__memory.buf
+        _length.pack_into(buf, 0, len(header_bytes))
+        buf[_length.size:_length.size + len(header_bytes)] = header_bytes
+        for column_name, column in columns.items():
+            column_offset = start + header['columns'][column_name]['offset']
+            data = column.tobytes()
+            buf[column_offset:column_offset + len(data)] = data
+        del buf
+
+        shared.__load()
+        return shared
+
+    def __load(self):
+        buf = self.__memory.buf.toreadonly()
+        length = _length.unpack_from(buf, 0)[0]
+        self.header = json.loads(bytes(
+            buf[_length.size:_length.size + length]).decode('utf-8'))
+        if self.header.get('format') != SHARED_FORMAT:
+            raise ValueError("Not a shared catalog", self.name)
+
+        start = _aligned(_length.size + length)
+        self.__columns = {}
+        for column_name, column in self.header['columns'].items():
+            typecode = column['typecode']
+            if column['length'] == 0:
+                self.__columns[column_name] = memoryview(array(typecode))
+                continue
+            offset = start + column['offset']
+            size = column['length'] * array(typecode).itemsize
+            self.__columns[column_name] = \
+                    buf[offset:offset + size].cast(typecode)
+        self.__keys = _Keys(self['key_data'], self['key_offsets'])
+
+    @property
+    def name(self):
+        return self.__memory.name
+
+    def __len__(self):
+        return self.header['count']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Release this process's views of the block. The block itself stays
+    # until the owner unlinks it.
+    def close(self):
+        for column in self.__columns.values():
+            column.release()
+        self.__columns = {}
+        self.__keys = None
+        self.__memory.close()
+
+    def unlink(self):
+        self.__memory.unlink()
+
+    def __getitem__(self, name):
+        return self.__columns[name]
+
+    def __string(self, data, offsets, i):
+        data = self[data]
+        offsets = self[offsets]
+        return bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def id(self, i):
+        return self.__string('id_data', 'id_offsets', i)
+
+    def aliases(self, i):
+        index = self['alias_index']
+        return [self.__string('alias_data', 'alias_offsets', a) 
+                for a in range(index[i], index[i + 1])]
+
+    def type(self, i):
+        return OBJECT_TYPES[self['type'][i]]
+
+    # The numbers of the objects with the given identifier or alias
+    def lookup(self, alias):
+        key = index_key(alias).encode('utf-8')
+        objects = self['key_objects']
+        start = bisect.bisect_left(self.__keys, key)
+        end = bisect.bisect_right(self.__keys, key, start)
+        return [objects[k] for k in range(start, end)]
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import threading
+from collections.abc import Mapping
+
+from objects import CelestialObject
+from constellations import Constellation, Line
+from milkyway import MilkyWayOutline, MilkyWayCatalog, load_milky_way
+
+### Catalog Snapshots
+# The catalogs are mutable dicts of mutable objects, and some of the
+# objects (`NGCObject`) finish decoding themselves the first time
+# they're used. That's fine for a one-off export, but not for many
+# threads reading the same catalog while it gets reloaded.
+#
+# A snapshot is a frozen copy of a catalog. Every object in it has been
+# fully decoded and then made read-only, so readers share it without
+# any locks. When the catalog file changes, a new snapshot is built in
+# the background and swapped in with a single assignment; readers keep
+# the snapshot they already have until they ask for a new one.
+
+
+class FrozenError(AttributeError):
+    pass
+
+
+def _frozen(self, *args, **kwargs):
+    raise FrozenError("{} is frozen".format(self.__class__.__name__))
+
+
+# The frozen subclasses, by class. `freeze` swaps an object's class for
+# a subclass of its own class that refuses to change its attributes, so
+# the object still is what it was.
+_frozen_classes = {}
+
+def frozen_class(cls):
+    if cls not in _frozen_classes:
+        _frozen_classes[cls] = type('Frozen' + cls.__name__, (cls,), {
+            '__slots__': (),
+            '__setattr__': _frozen,
+            '__delattr__': _frozen,
+            'add_alias': _frozen,
+        })
+    return _frozen_classes[cls]
+
+
+def is_frozen(o):
+    return _frozen_classes.get(o.__class__.__base__) is o.__class__
+
+
+#### freeze
+# Make the given `CelestialObject`, `Constellation`, `Line` or
+# `MilkyWayOutline` read-only in place, and return it. Lazily decoded
+# values are decoded first, so nothing is written when the object is
+# read later. A constellation's lines, a line's positions and an
+# outline's levels become tuples.
+def freeze(o):
+    if is_frozen(o):
+        return o
+
+    if isinstance(o, CelestialObject):
+        o.ra, o.dec, o.size, o.aliases
+    elif isinstance(o, Constellation):
+        o.lines = tuple(freeze(line) for line in o.lines)
+        o.boundaries = tuple(freeze(line) for line in o.boundaries)
+    elif isinstance(o, Line):
+        o.positions = tuple(o.positions)
+    elif isinstance(o, MilkyWayOutline):
+        o.levels = tuple(tuple((tuple(box), tuple(points)) 
+            for box, points in parts) for parts in o.levels)
+    else:
+        raise TypeError("can't freeze {}".format(o.__class__.__name__))
+
+    o.__class__ = frozen_class(o.__class__)
+    return o
+
+
+#### CatalogSnapshot
+# A read-only mapping of a catalog's keys to its frozen objects, with
+# the kind, path and modification time of the file it was loaded from.
+class CatalogSnapshot(Mapping):
+
+    def __init__(self, catalog, kind=None, path=None, mtime=None):
+        self.__objects = dict((k, freeze(o)) for k, o in catalog.items())
+        self.__kind = kind
+        self.__path = path
+        self.__mtime = mtime
+
+    @property
+    def kind(self):
+        return self.__kind
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def mtime(self):
+        return self.__mtime
+
+    def __getitem__(self, key):
+        return self.__objects[key]
+
+    def __iter__(self):
+        return iter(self.__objects)
+
+    def __len__(self):
+        return len(self.__objects)
+
+    def __repr__(self):
+        return "CatalogSnapshot(kind={kind}, path={path}, objects={count})".format(
+                kind=self.__kind, path=self.__path, count=len(self))
+
+
+#### load_snapshot
+# Load a catalog file with the given catalog class (i.e. `NGCCatalog`)
+# and freeze it. The modification time is taken before reading, so a
+# change made while loading is picked up by the next check. The Milky
+# Way is loaded with `load_milky_way`, so its simplified levels come
+# from the sidecar cache rather than being rebuilt.
+def load_snapshot(catalog_class, path, kind=None):
+    mtime = os.stat(path).st_mtime_ns
+    if catalog_class is MilkyWayCatalog:
+        catalog = load_milky_way(path)
+    else:
+        with open(path) as stream:
+            catalog = catalog_class(stream)
+    return CatalogSnapshot(catalog, kind=kind, path=path, mtime=mtime)
+
+
+#### SnapshotCache
+# The current snapshots of catalogs, keyed by kind and file path, with
+# catalog classes for each kind given in `catalogs` (i.e.
+# `jsontool.CATALOGS`). A catalog is loaded in the caller the first time
+# it's asked for. After that, if its file has changed, the current
+# snapshot is returned while the new one is built on a background
+# thread, and the new one is swapped in when it's done.
+#
+# Only building takes a lock; `load` never waits for a rebuild.
+class SnapshotCache(dict):
+
+    def __init__(self, catalogs, background=True):
+        super().__init__()
+        self.catalogs = catalogs
+        self.background = background
+        self.__lock = threading.Lock()
+        self.__building = {}
+
+    def __build(self, key, kind, path):
+        try:
+            self[key] = load_snapshot(self.catalogs[kind], path, kind)
+        finally:
+            with self.__lock:
+                self.__building.pop(key, None)
+
+    def load(self, kind, path):
+        key = (kind, os.path.abspath(path))
+        snapshot = self.get(key)
+
+        if snapshot is None:
+            with self.__lock:
+                snapshot = self.get(key)
+                if snapshot is None:
+                    snapshot = load_snapshot(self.catalogs[kind], path, kind)
+                    self[key] = snapshot
+            return snapshot
+
+        if os.stat(path).st_mtime_ns != snapshot.mtime:
+            if not self.background:
+                snapshot = load_snapshot(self.catalogs[kind], path, kind)
+                self[key] = snapshot
+                return snapshot
+
+            with self.__lock:
+                if key not in self.__building:
+                    thread = threading.Thread(target=self.__build,
+                            args=(key, kind, path), daemon=True)
+                    self.__building[key] = thread
+                    thread.start()
+
+        return snapshot
+
+    # Wait for any snapshots being built in the background
+    def wait(self):
+        with self.__lock:
+            threads = list(self.__building.values())
+        for thread in threads:
+            thread.join()
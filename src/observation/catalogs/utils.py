@@ -27,10 +27,8 @@
 # 
 
 import math 
-from decimal import Decimal
 
 import re
-import unittest
 from collections import namedtuple
 
 ### Named Tuples
@@ -44,12 +42,29 @@ Point = namedtuple('Point', ('x', 'y'))
 # Position: A position in the celestial sphere (an ra and dec coordinate)
 Position = namedtuple('Position', ('ra', 'dec'))
 
+#### LazyRegex
+# A regular expression that's compiled the first time it's used instead
+# of when its module is imported, so that importing a module doesn't
+# cost anything for expressions it might never need. After the first
+# use, its methods are the compiled expression's own.
+class LazyRegex(object):
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __getattr__(self, name):
+        value = getattr(re.compile(self.pattern, self.flags), name)
+        setattr(self, name, value)
+        return value
+
+
 # Regular expressions to match possible coordinate input strings
-hms_re = re.compile(r'([+-]?)([0-9]+)[hH] ?([0-9]+)[mM] ?([0-9\.]+)[sS]')
+hms_re = LazyRegex(r'([+-]?)([0-9]+)[hH] ?([0-9]+)[mM] ?([0-9\.]+)[sS]')
 hms = namedtuple('hms', ('h', 'm', 's'))
-dms_re = re.compile(r'([+-]?)([0-9]+)[°ºdD:] ?([0-9]+)[′\'mM:] ?([0-9\.]+)[″"sS]')
+dms_re = LazyRegex(r'([+-]?)([0-9]+)[°ºdD:] ?([0-9]+)[′\'mM:] ?([0-9\.]+)[″"sS]')
 dms = namedtuple('dms', ('d', 'm', 's'))
-degrees_re = re.compile(r'([+-]?[0-9\.]+)[°ºdD]')
+degrees_re = LazyRegex(r'([+-]?[0-9\.]+)[°ºdD]')
 
 # Only do this calculation once
 PI_OVER_TWELVE = math.pi / 12
@@ -215,77 +230,3 @@ class EquatorialCoordinate(object):
     @property
     def hours(self):
         return self.__hour_value
-
-
-class TestEquatorialCoordinate(unittest.TestCase):
-    def test_hours(self):
-        # This tests the hour coordinate parsing and conversions using
-        # M42.
-        e = EquatorialCoordinate('05h 35m 17.2s')
-        self.assertEqual(
-                Decimal(e.hours).quantize(Decimal('1.00000')),
-                Decimal('5.58811'))
-        self.assertEqual(
-                Decimal(e.radians).quantize(Decimal('1.000')),
-                Decimal('1.463'))
-
-    def test_degrees(self):
-        # This tests the degree coordinate parsing and conversions using
-        # M42.
-
-        # Plain float number
-        e = EquatorialCoordinate(-5.39083, degrees=True)
-        self.assertEqual(e.degrees, -5.39083)
-        self.assertEqual(
-                Decimal(e.radians).quantize(Decimal('1.00000')),
-                Decimal('-0.09409'))
-
-        # Float with a degree symbol as a string
-        e = EquatorialCoordinate('-5.39083°')
-        self.assertEqual(e.degrees, -5.39083)
-        self.assertEqual(
-                Decimal(e.radians).quantize(Decimal('1.00000')),
-                Decimal('-0.09409'))
-
-        # DMS one way
-        e = EquatorialCoordinate('-05º 23\' 27"')
-        self.assertEqual(
-                Decimal(e.degrees).quantize(Decimal('1.00000')),
-                Decimal('-5.39083'))
-        self.assertEqual(
-                Decimal(e.radians).quantize(Decimal('1.00000')),
-                Decimal('-0.09409'))
-
-        # DMS another way
-        e = EquatorialCoordinate('-5° 23′ 27″')
-        self.assertEqual(
-                Decimal(e.degrees).quantize(Decimal('1.00000')),
-                Decimal('-5.39083'))
-        self.assertEqual(
-                Decimal(e.radians).quantize(Decimal('1.00000')),
-                Decimal('-0.09409'))
-
-        # DMS a final way
-        e = EquatorialCoordinate('-5d 23m 27s')
-        self.assertEqual(
-                Decimal(e.degrees).quantize(Decimal('1.00000')),
-                Decimal('-5.39083'))
-        self.assertEqual(
-                Decimal(e.radians).quantize(Decimal('1.00000')),
-                Decimal('-0.09409'))
-
-        # This should cause an exception
-        with self.assertRaises(ValueError):
-            e = EquatorialCoordinate("I'm clearly not a coordinate")
-
-    def test_reverse_hours(self):
-        pass
-
-    def test_reverse_degrees(self):
-        pass
-
-
-if __name__ == "__main__":
-    unittest.main()
-
-
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+import calendar
+import datetime
+from collections import namedtuple
+
+from objects import CelestialObject
+from constellations import Constellation
+
+### Visibility
+# Which objects get above a minimum altitude for an observer at a given
+# latitude during an observing window, i.e. the evenings of a month.
+#
+# Times are local mean solar time. The local sidereal time at a given
+# local mean time hardly depends on the observer's longitude, so only
+# the latitude matters here.
+
+# The J2000.0 epoch
+J2000 = datetime.datetime(2000, 1, 1, 12)
+
+# The ratio of sidereal to solar time
+SIDEREAL_RATE = 1.00273790935
+
+# Window: an observing window in sidereal time. Starts at local sidereal
+# time `start` (hours) and lasts `hours` sidereal hours.
+Window = namedtuple('Window', ('start', 'hours'))
+
+
+# The Greenwich mean sidereal time, in hours, at the given UT datetime.
+# Given a local mean time instead, this is the local sidereal time.
+def sidereal_time(when):
+    days = (when - J2000).total_seconds() / 86400
+    return (18.697374558 + 24.06570982441908 * days) % 24
+
+
+#### month_window
+# The observing window covering the given local hours (`(20, 2)` being
+# 8 pm to 2 am) on every night of the given month.
+def month_window(year, month, hours=(20, 2)):
+    start_hour, end_hour = hours
+    length = (end_hour - start_hour) % 24 or 24
+
+    first_night = datetime.datetime(year, month, 1) + \
+            datetime.timedelta(hours=start_hour)
+    nights = calendar.monthrange(year, month)[1]
+
+    # Each night starts about four minutes of sidereal time later than
+    # the last, so the window grows by that much per night.
+    sidereal_hours = length * SIDEREAL_RATE + \
+            (nights - 1) * (SIDEREAL_RATE - 1) * 24
+    return Window(sidereal_time(first_night), min(sidereal_hours, 24))
+
+
+#### visible
+# Whether each of the given positions, as lists of right ascensions in
+# hours and declinations in degrees, gets above `min_altitude` degrees
+# during the window for an observer at `latitude`.
+def visible(ras, decs, latitude, window, min_altitude=0):
+    phi = math.radians(latitude)
+    sin_phi = math.sin(phi)
+    cos_phi = math.cos(phi)
+    sin_h = math.sin(math.radians(min_altitude))
+
+    # An object is above the minimum altitude for hour angles within
+    # ±h0, h0 coming from the altitude formula
+    #   sin(alt) = sin(phi)sin(dec) + cos(phi)cos(dec)cos(H)
+    # h0 is 12 for objects that never get below it and negative for
+    # ones that never get above it.
+    sin_decs = [math.sin(math.radians(d)) for d in decs]
+    cos_decs = [math.cos(math.radians(d)) for d in decs]
+    h0s = [_half_arc(sin_h, sin_phi, cos_phi, s, c)
+            for s, c in zip(sin_decs, cos_decs)]
+
+    # Visible if the arc [ra - h0, ra + h0] overlaps the window, which
+    # is when either one starts inside the other.
+    start, hours = window
+    return [h0 >= 12 or (h0 >= 0 and 
+                (hours >= 24 or (ra - h0 - start) % 24 <= hours or 
+                    (start - ra + h0) % 24 <= 2 * h0))
+            for ra, h0 in zip(ras, h0s)]
+
+
+# The hour angle, in hours, at which a declination crosses the given
+# altitude.
+def _half_arc(sin_h, sin_phi, cos_phi, sin_dec, cos_dec):
+    denominator = cos_phi * cos_dec
+    if denominator == 0:
+        # At a pole, or an object at a pole: the altitude never changes
+        return 12 if sin_phi * sin_dec >= sin_h else -1
+    cos_h0 = (sin_h - sin_phi * sin_dec) / denominator
+    if cos_h0 <= -1:
+        return 12
+    if cos_h0 > 1:
+        return -1
+    return math.degrees(math.acos(cos_h0)) / 15
+
+
+#### visible_objects
+# Filter a list of `CelestialObject`s and `Constellation`s down to those
+# that are visible during the window. A constellation is visible if any
+# point on its lines or boundaries is.
+def visible_objects(objects, latitude, window, min_altitude=0):
+    celestial = [o for o in objects if isinstance(o, CelestialObject)]
+    flags = visible([o.ra.hours for o in celestial],
+            [o.dec.degrees for o in celestial],
+            latitude, window, min_altitude)
+    visible_ids = set(id(o) for o, f in zip(celestial, flags) if f)
+
+    for o in objects:
+        if isinstance(o, Constellation):
+            positions = [p for line in o.lines + o.boundaries 
+                    for p in line.positions]
+            if any(visible([p.ra.hours for p in positions],
+                    [p.dec.degrees for p in positions],
+                    latitude, window, min_altitude)):
+                visible_ids.add(id(o))
+
+    return [o for o in objects if id(o) in visible_ids]
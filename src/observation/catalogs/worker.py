@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import json
+import socketserver
+
+from jsontool import CATALOGS, build_parser, cached_export
+from cache import ExportCache
+from snapshot import SnapshotCache
+
+### Worker
+# A long-running export worker for build tooling that calls `jsontool`
+# many times. The catalogs are loaded once and kept around, so each
+# request only pays for its filtering and encoding.
+#
+# Requests are JSON objects, one per line, with the same options that
+# `jsontool` accepts on the command line (without the leading dashes):
+#
+#   {"ngc": "ngcic.csv", "magnitude": 8, "geojson": true, "out": "objects.json"}
+#
+# Each request gets a single line JSON response. If the request gave an
+# `out` file the response says how many objects were written to it,
+# otherwise the exported JSON is included as `result`. Failed requests
+# get an `error` response instead.
+#
+# The catalogs are kept as frozen snapshots. When a catalog file
+# changes, requests keep using the old snapshot until the new one has
+# been built in the background, so the worker never stops to reload.
+
+
+# Convert a request into the equivalent `jsontool` arguments
+def request_argv(request):
+    argv = []
+    for option, value in request.items():
+        option = '--' + option.replace('_', '-')
+        if value is True:
+            argv.append(option)
+        elif value is not False and value is not None:
+            argv.extend((option, str(value)))
+    return argv
+
+
+class WorkerError(Exception):
+    pass
+
+
+class Worker(object):
+
+    def __init__(self):
+        self.catalogs = SnapshotCache(CATALOGS)
+        # Export caches, by cache directory
+        self.caches = {}
+        self.parser = build_parser()
+
+    def parse_request(self, line):
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise WorkerError("requests must be JSON objects")
+        # argparse would print the help to stdout, in among the responses
+        if 'help' in request or 'h' in request:
+            raise WorkerError("requests cannot ask for help")
+
+        try:
+            args = self.parser.parse_args(request_argv(request))
+        except SystemExit:
+            # argparse has already reported the problem on stderr
+            raise WorkerError("invalid request options")
+
+        if args.worker:
+            raise WorkerError("requests cannot start another worker")
+        if args.share or args.build_partitions or args.bundles:
+            raise WorkerError("requests cannot share catalogs or build "
+                    "partitions or bundles")
+
+        # Results sent back inline have to stay on a single line
+        if not args.out:
+            args.indent = None
+
+        return args
+
+    # Handle one request line, returning the response line. Any error is
+    # reported in the response, so one bad request (an invalid
+    # `specifically` pattern, say) doesn't stop the worker.
+    def handle(self, line):
+        try:
+            args = self.parse_request(line)
+            cache = None
+            if args.cache_dir:
+                if args.cache_dir not in self.caches:
+                    self.caches[args.cache_dir] = ExportCache(args.cache_dir,
+                            max_bytes=args.cache_size * 1024 * 1024)
+                cache = self.caches[args.cache_dir]
+            count, json_string = cached_export(args, cache, 
+                    self.catalogs.load)
+            if args.out:
+                with open(args.out, 'w') as outfile:
+                    outfile.write(json_string)
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+        if args.out:
+            return json.dumps({"objects": count, "out": args.out})
+
+        # SQLite and column exports are written straight to their
+        # files and have no result.
+        if not json_string:
+            return json.dumps({"objects": count})
+
+        return '{{"objects": {count}, "result": {result}}}'.format(
+                count=count, result=json_string)
+
+    # Serve requests from one stream, writing responses to another,
+    # until the input is closed.
+    def serve(self, instream, outstream):
+        for line in instream:
+            if not line.strip():
+                continue
+            outstream.write(self.handle(line) + '\n')
+            outstream.flush()
+
+    # Serve requests from connections to a Unix socket at the given
+    # path. Each connection is handled on its own thread; they all
+    # share the same catalog snapshots.
+    def serve_socket(self, path):
+        worker = self
+
+        class WorkerHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    response = worker.handle(line.decode('utf-8'))
+                    self.wfile.write(response.encode('utf-8') + b'\n')
+
+        server = socketserver.ThreadingUnixStreamServer(path, WorkerHandler)
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(path)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import json
+
+import unittest
+
+from bundles import INDEX_FILE, chart_region, build_bundle, build_bundles
+
+
+class TestBundles(unittest.TestCase):
+    constellations = '''ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
+ORI,5.919444,7.4000,5.679444,-1.9500
+TAU,5.438194,28.6075,4.598667,16.5092,4.476944,19.1806
+UMI,2.530194,89.2642,17.536917,86.5864,16.766167,82.0372,15.734306,77.7944
+PSC,23.988500,6.8633,0.811389,7.5853,1.524722,15.3456'''
+    hyg = '''StarID,HIP,HD,HR,Gliese,BayerFlamsteed,ProperName,RA,Dec,Distance,PMRA,PMDec,RV,Mag,AbsMag,Spectrum,ColorIndex,X,Y,Z,VX,VY,VZ
+27919,27989,39801,2061,,58Alp Ori,Betelgeuse,5.91952477,07.40703634,131.06,27.33,10.86,21,0.45,-5.13,M2Ib,1.500,2.738,129.93909,16.89611,-1.693e-05,2.0769e-05,9.611e-06
+80582,80763,148478,6134,,21Alp Sco,Antares,16.49012986,-26.43194608,185.18,-10.16,-23.21,-3.4,1.06,-5.28,M1.5Iab,1.865,-51.48,-170.39,-82.46,0,0,0
+11734,11767,8890,424,,1Alp UMi,Polaris,2.52974312,89.26413805,132.28,44.22,-11.74,-17.4,1.97,-3.64,F7:Ib-IIv SB,0.636,0.47,0.46,132.27,0,0,0
+'''
+
+    def setUp(self):
+        import io
+        import tempfile
+        from constellations import ConstellationCatalog
+        from objects import HYGStarCatalog
+        self.directory = tempfile.TemporaryDirectory()
+        self.const_path = os.path.join(self.directory.name, 'const.csv')
+        with open(self.const_path, 'w') as f:
+            f.write(self.constellations)
+        self.hyg_path = os.path.join(self.directory.name, 'hyg.csv')
+        with open(self.hyg_path, 'w') as f:
+            f.write(self.hyg)
+        self.catalogs = {
+            'constellations': ConstellationCatalog(
+                io.StringIO(self.constellations)),
+            'hyg': HYGStarCatalog(io.StringIO(self.hyg)),
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chart_region(self):
+        ra, dec, radius = chart_region([self.catalogs['constellations']['ORI']])
+        self.assertTrue(83 < ra < 86)
+        self.assertTrue(0 < dec < 4)
+        self.assertTrue(radius < 10)
+
+    def test_chart_region_wraps(self):
+        # Pisces straddles 0h and Ursa Minor the pole
+        ra, dec, radius = chart_region([self.catalogs['constellations']['PSC']])
+        self.assertTrue(ra < 20 or ra > 340)
+        self.assertTrue(radius < 20)
+        ra, dec, radius = chart_region([self.catalogs['constellations']['UMI']])
+        self.assertTrue(dec > 80)
+
+    def test_build_bundle(self):
+        bundle = build_bundle('ORI', self.catalogs, magnitude=6)
+        ids = [getattr(o, 'id', None) or o.abbr for o in bundle['features']]
+        self.assertEqual(ids, ['HIP27989', 'ORI'])
+        self.assertIsNone(build_bundle('SCO', self.catalogs))
+
+    def test_build_bundles(self):
+        out = os.path.join(self.directory.name, 'bundles')
+        index = build_bundles(out, {'hyg': self.hyg_path, 
+            'constellations': self.const_path, 'ngc': None}, 
+            abbrs=['ORI', 'UMI', 'SCO'], processes=2)
+        self.assertEqual([entry['file'] for entry in index],
+                ['ori.json', 'umi.json', None])
+        with open(os.path.join(out, 'umi.json')) as f:
+            bundle = json.load(f)
+        self.assertEqual(bundle['constellation'], 'UMI')
+        self.assertEqual([f['properties']['id'] for f in bundle['features']],
+                ['HIP11767', 'UMI'])
+        with open(os.path.join(out, INDEX_FILE)) as f:
+            self.assertEqual(json.load(f), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
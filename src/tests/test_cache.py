@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import tempfile
+
+import unittest
+
+from cache import canonical_key, catalog_fingerprint, ExportCache
+
+
+class TestExportCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.catalog_path = os.path.join(self.directory.name, 'ngc.csv')
+        with open(self.catalog_path, 'w') as f:
+            f.write('NGCNo\n1976\n')
+        self.cache_path = os.path.join(self.directory.name, 'cache')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_canonical_key(self):
+        self.assertEqual(canonical_key({'magnitude': 6, 'geojson': True}),
+                canonical_key({'geojson': True, 'magnitude': 6, 
+                    'labels': False, 'center': None}))
+        self.assertNotEqual(canonical_key({'magnitude': 6}),
+                canonical_key({'magnitude': 7}))
+
+    def test_fingerprint(self):
+        fingerprint = catalog_fingerprint([self.catalog_path])
+        self.assertEqual(catalog_fingerprint([self.catalog_path]), 
+                fingerprint)
+        with open(self.catalog_path, 'a') as f:
+            f.write('5194\n')
+        self.assertNotEqual(catalog_fingerprint([self.catalog_path]),
+                fingerprint)
+
+    def test_memory(self):
+        cache = ExportCache()
+        self.assertIsNone(cache.get({'magnitude': 6}, 'a'))
+        cache.put({'magnitude': 6}, 'a', [1, '{}'])
+        self.assertEqual(cache.get({'magnitude': 6}, 'a'), [1, '{}'])
+        self.assertEqual(cache.stats['memory_hits'], 1)
+        self.assertEqual(cache.stats['misses'], 1)
+
+    def test_lru(self):
+        cache = ExportCache(max_items=2)
+        for m in (1, 2, 3):
+            cache.put({'magnitude': m}, 'a', m)
+        self.assertIsNone(cache.get({'magnitude': 1}, 'a'))
+        self.assertEqual(cache.get({'magnitude': 3}, 'a'), 3)
+
+    def test_disk(self):
+        ExportCache(self.cache_path).put({'magnitude': 6}, 'a', [1, '{}'])
+        cache = ExportCache(self.cache_path)
+        self.assertEqual(cache.get({'magnitude': 6}, 'a'), [1, '{}'])
+        self.assertEqual(cache.stats['disk_hits'], 1)
+        cache.get({'magnitude': 6}, 'a')
+        self.assertEqual(cache.stats['memory_hits'], 1)
+
+    def test_invalidation(self):
+        cache = ExportCache(self.cache_path)
+        cache.put({'magnitude': 6}, 'a', [1, '{}'])
+        self.assertIsNone(cache.get({'magnitude': 6}, 'b'))
+        self.assertEqual(cache.stats['invalidations'], 1)
+        self.assertEqual(os.listdir(self.cache_path), [])
+
+    def test_memory_hits_touch_disk(self):
+        # Entries used from memory are the most recent on disk too
+        cache = ExportCache(self.cache_path)
+        cache.put({'magnitude': 6}, 'a', [1, '{}'])
+        path = os.path.join(self.cache_path, 
+                canonical_key({'magnitude': 6}) + '.json')
+        os.utime(path, ns=(0, 0))
+        cache.get({'magnitude': 6}, 'a')
+        self.assertEqual(cache.stats['memory_hits'], 1)
+        self.assertGreater(os.stat(path).st_mtime_ns, 0)
+
+    def test_today(self):
+        # Only exports with a date defaulting to today expire daily
+        from jsontool import build_parser, uses_today
+        parser = build_parser()
+        self.assertFalse(uses_today(parser.parse_args(['--magnitude', '6'])))
+        self.assertTrue(uses_today(parser.parse_args(
+            ['--latitude', '40', '--month', '1'])))
+        self.assertFalse(uses_today(parser.parse_args(
+            ['--latitude', '40', '--month', '1', '--year', '2015'])))
+        self.assertTrue(uses_today(parser.parse_args(
+            ['--latitude', '40', '--best', '10'])))
+
+    def test_size_bound(self):
+        cache = ExportCache(self.cache_path, max_bytes=300)
+        for m in range(5):
+            cache.put({'magnitude': m}, 'a', 'x' * 100)
+        self.assertTrue(cache.stats['evictions'] > 0)
+        total = sum(os.path.getsize(os.path.join(self.cache_path, name))
+                for name in os.listdir(self.cache_path))
+        self.assertTrue(total <= 300)
+        self.assertEqual(cache.get({'magnitude': 4}, 'a'), 'x' * 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+import math
+
+import unittest
+
+from clipping import vector, coordinates, in_polygon, Cap, Clip
+from constellations import Constellation, Line, Position
+from utils import EquatorialCoordinate
+
+
+# The angle in degrees between two (ra, dec) points
+def distance(a, b):
+    u, v = vector(*a), vector(*b)
+    return math.degrees(math.acos(max(-1, min(1, 
+        sum(x * y for x, y in zip(u, v))))))
+
+
+class TestClipping(unittest.TestCase):
+    # A square 20 degrees on a side around the cone axis
+    square = [(70, -10), (90, -10), (90, 10), (70, 10), (70, -10)]
+
+    def assertPointsEqual(self, first, second):
+        self.assertEqual(len(first), len(second))
+        for a, b in zip(first, second):
+            self.assertLess(distance(a, b), 1e-6)
+
+    def test_coordinates(self):
+        self.assertPointsEqual([coordinates(vector(350, -20))], [(350, -20)])
+
+    def test_in_polygon(self):
+        ring = [vector(ra, dec) for ra, dec in self.square]
+        self.assertTrue(in_polygon(vector(80, 0), ring))
+        self.assertFalse(in_polygon(vector(100, 0), ring))
+        # The antipode of a point inside is not inside
+        self.assertFalse(in_polygon(vector(260, 0), ring))
+
+    def test_crossings(self):
+        cap = Cap(80, 0, 5)
+        crossings = cap.crossings(vector(70, 0), vector(90, 0))
+        self.assertPointsEqual([coordinates(v) for v in crossings], 
+                [(75, 0), (85, 0)])
+        self.assertEqual(cap.crossings(vector(70, 10), vector(90, 10)), [])
+
+    def test_box_line(self):
+        clip = Clip.box(10, 20, -10, 10)
+        lines = clip.lines([(0, 0), (30, 0)])
+        self.assertEqual(len(lines), 1)
+        self.assertPointsEqual(lines[0], [(10, 0), (20, 0)])
+
+    def test_cone_line_dip(self):
+        # Both ends outside the cone, the middle inside
+        clip = Clip.cone(80, 0, 5)
+        lines = clip.lines([(70, 0), (90, 0)])
+        self.assertEqual(len(lines), 1)
+        self.assertPointsEqual(lines[0], [(75, 0), (85, 0)])
+
+    def test_wrap(self):
+        clip = Clip.box(350, 10, -10, 10)
+        lines = clip.lines([(340, 0), (0, 0), (20, 0)])
+        self.assertEqual(len(lines), 1)
+        self.assertPointsEqual(lines[0], [(350, 0), (0, 0), (10, 0)])
+        self.assertEqual(clip.lines([(100, 0), (120, 0)]), [])
+
+    def test_pole(self):
+        clip = Clip.cone(0, 90, 10)
+        lines = clip.lines([(0, 70), (0, 90), (180, 70)])
+        self.assertEqual(len(lines), 1)
+        self.assertPointsEqual(lines[0], [(0, 80), (0, 90), (180, 80)])
+
+    def test_wide_box(self):
+        clip = Clip.box(0, 270, -10, 10)
+        self.assertEqual(len(clip.groups), 2)
+        self.assertEqual(len(Clip.box(0, 360, -10, 10).groups[0]), 2)
+        lines = clip.lines([(100, 0), (200, 0)])
+        self.assertPointsEqual([lines[0][0], lines[-1][-1]], 
+                [(100, 0), (200, 0)])
+        self.assertEqual(clip.lines([(300, 0), (330, 0)]), [])
+
+    def test_polygon_cut(self):
+        clip = Clip.cone(90, 0, 5)
+        rings = clip.polygons(self.square)
+        self.assertEqual(len(rings), 1)
+        ring = rings[0]
+        self.assertEqual(ring[0], ring[-1])
+        for point in ring:
+            self.assertLess(distance(point, (90, 0)), 5 + 1e-6)
+            self.assertLess(point[0], 90 + 1e-6)
+        # Along the edge of the cone every degree or so
+        self.assertGreater(len(ring), 10)
+
+    def test_polygon_around_cone(self):
+        clip = Clip.cone(80, 0, 5)
+        rings = clip.polygons(self.square, resolution=5)
+        self.assertEqual(len(rings), 1)
+        for point in rings[0]:
+            self.assertAlmostEqual(distance(point, (80, 0)), 5)
+
+    def test_polygon_inside_cone(self):
+        clip = Clip.cone(80, 0, 30)
+        self.assertPointsEqual(clip.polygons(self.square)[0], self.square)
+
+    def test_disjoint(self):
+        clip = Clip.cone(200, 40, 5)
+        self.assertEqual(clip.lines([(70, 0), (90, 0)]), [])
+        self.assertEqual(clip.polygons(self.square), [])
+
+    def test_constellation(self):
+        def line(points):
+            return Line([Position(EquatorialCoordinate(ra, degrees=True),
+                EquatorialCoordinate(dec, degrees=True)) 
+                for ra, dec in points])
+        o = Constellation('TST', 'Test', [line([(70, 0), (90, 0)])], 
+                [line(self.square)])
+
+        clipped = Clip.cone(80, 0, 5).constellation(o)
+        self.assertIsNot(clipped, o)
+        self.assertEqual(clipped.abbr, 'TST')
+        self.assertEqual(len(clipped.lines), 1)
+        self.assertEqual(len(clipped.boundaries), 1)
+        self.assertEqual(len(o.lines[0].positions), 2)
+        start = clipped.lines[0].positions[0]
+        self.assertAlmostEqual(start.ra.degrees, 75)
+
+        self.assertIsNone(Clip.cone(200, 40, 5).constellation(o))
+
+
+if __name__ == "__main__":
+    unittest.main()
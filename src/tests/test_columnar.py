@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import math
+
+import unittest
+
+from columnar import build_columns, write_columns, ColumnarCatalog
+
+
+class TestColumnarCatalog(unittest.TestCase):
+    def setUp(self):
+        import io
+        import tempfile
+        from objects import NGCCatalog
+
+        ngc = '''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+5194,13h 29m 52.1s,"+47º 11' 43""",CVn,Gxy,11'X7.8',163,8.5,9.1,"M 51A, UGC 8493"
+1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4,"M 42, LBN 974, Sh2-281"'''
+        self.objects = list(NGCCatalog(io.StringIO(ngc)).values())
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_build_columns(self):
+        columns = build_columns(self.objects)
+        self.assertEqual(list(columns['alias_index']), [0, 3, 7])
+        self.assertEqual(list(columns['type']), [3, 4])
+        self.assertTrue(math.isnan(columns['angle'][1]))
+
+    def test_round_trip(self):
+        schema = write_columns(self.directory.name, self.objects)
+        self.assertEqual(schema['count'], 2)
+
+        with ColumnarCatalog(self.directory.name) as catalog:
+            self.assertEqual(len(catalog), 2)
+            self.assertEqual(catalog.id(1), 'NGC1976')
+            self.assertEqual(catalog.aliases(1), 
+                    ['NGC1976', 'M42', 'LBN974', 'Sh2281'])
+            self.assertEqual(catalog.type(0), 'Galaxy')
+            self.assertAlmostEqual(catalog['ra'][1], 83.82166666666667)
+            self.assertEqual(list(catalog['magnitude']), [8.5, 4.0])
+
+    def test_close(self):
+        write_columns(self.directory.name, self.objects)
+        with ColumnarCatalog(self.directory.name) as catalog:
+            magnitudes = catalog['magnitude']
+            ras = catalog['ra'][:1]
+            self.assertEqual(magnitudes[0], 8.5)
+
+        # Columns are released on close, slices of them stay usable
+        self.assertRaises(ValueError, lambda: magnitudes[0])
+        self.assertAlmostEqual(ras[0], 202.46708333333333)
+
+    def test_big_endian(self):
+        # Written and read as on a big-endian machine, the columns on
+        # disk are swapped twice over but the values come back the same
+        import sys
+        from unittest import mock
+        with mock.patch.object(sys, 'byteorder', 'big'):
+            write_columns(self.directory.name, self.objects)
+            with ColumnarCatalog(self.directory.name) as catalog:
+                self.assertEqual(list(catalog['magnitude']), [8.5, 4.0])
+                self.assertEqual(list(catalog['alias_index']), [0, 3, 7])
+                self.assertEqual(catalog.id(1), 'NGC1976')
+
+    def test_file_layout(self):
+        # Columns are plain little-endian arrays
+        import struct
+        write_columns(self.directory.name, self.objects)
+        with open(os.path.join(self.directory.name, 'dec.bin'), 'rb') as f:
+            decs = struct.unpack('<2d', f.read())
+        self.assertAlmostEqual(decs[1], -5.390833333333333)
+
+    def test_empty(self):
+        write_columns(self.directory.name, [])
+        with ColumnarCatalog(self.directory.name) as catalog:
+            self.assertEqual(len(catalog), 0)
+            self.assertEqual(list(catalog['ra']), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
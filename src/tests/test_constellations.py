@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from constellations import ConstellationCatalog, BoundaryCatalog, topology
+
+
+class TestConstellationCatalog(unittest.TestCase):
+    orion = '''ORI,4.843611,8.9000,4.830833,6.9500,4.853611,5.6000,4.904167,2.4500,4.975833,1.7167,5.418889,6.3500,5.533611,-0.3000,5.408056,-2.3833,5.293333,-6.8500,5.242222,-8.2000,5.796111,-9.6667,5.679444,-1.9500,5.919444,7.4000,5.585556,9.9333,5.418889,6.3500
+ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
+ORI,5.919444,7.4000,6.039722,9.6500,6.126389,14.7667,5.906389,20.2667
+ORI,6.039722,9.6500,6.198889,14.2167,6.065278,20.1333'''
+
+    def test_init(self):
+        import io
+        orion = '''ORI,4.843611,8.9000,4.830833,6.9500,4.853611,5.6000,4.904167,2.4500,4.975833,1.7167,5.418889,6.3500,5.533611,-0.3000,5.408056,-2.3833,5.293333,-6.8500,5.242222,-8.2000,5.796111,-9.6667,5.679444,-1.9500,5.919444,7.4000,5.585556,9.9333,5.418889,6.3500
+ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
+ORI,5.919444,7.4000,6.039722,9.6500,6.126389,14.7667,5.906389,20.2667
+ORI,6.039722,9.6500,6.198889,14.2167,6.065278,20.1333'''
+
+        # orion = '''ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
+        # ORI,6.039722,9.6500,6.198889,14.2167,6.065278,20.1333'''
+
+        stream = io.StringIO(initial_value=orion)
+        const_catalog = ConstellationCatalog(stream)
+
+        self.assertTrue('ORI' in const_catalog)
+        self.assertEqual(len(const_catalog['ORI'].lines), 4)
+        self.assertEqual(len(const_catalog['ORI'].lines[0].positions), 15)
+
+    def test_interned_positions(self):
+        import io
+        stream = io.StringIO(initial_value=self.orion)
+        lines = ConstellationCatalog(stream)['ORI'].lines
+
+        # 5.418889,6.3500 starts and ends the first line, and
+        # 5.679444,-1.9500 is on the first and second.
+        self.assertIs(lines[0].positions[5], lines[0].positions[14])
+        self.assertIs(lines[0].positions[11], lines[1].positions[0])
+
+    def test_topology(self):
+        import io
+        stream = io.StringIO(initial_value=self.orion)
+        result = topology(ConstellationCatalog(stream).values())
+
+        # 25 positions, 20 distinct
+        self.assertEqual(len(result['vertices']), 20)
+        orion = result['constellations'][0]
+        self.assertEqual(orion['abbr'], 'ORI')
+        self.assertEqual(orion['lines'][0][5], orion['lines'][0][14])
+        self.assertEqual(orion['lines'][1][0], orion['lines'][0][11])
+        self.assertEqual(result['vertices'][orion['lines'][1][0]], 
+                [5.679444 * 15, -1.95])
+
+
+class TestBoundaryCatalog(unittest.TestCase):
+    def test_init(self):
+        import io
+        boundaries = ''' 5.0 10.0 ORI  O
+ 6.0 10.0 ORI  I
+ 6.0  0.0 ORI  O
+15.9  5.0 SER1 O
+15.9  0.0 SER1 O
+16.0  0.0 SER1 O
+18.0 -5.0 SER2 O
+18.5 -5.0 SER2 O
+18.5  0.0 SER2 O
+'''
+        catalog = BoundaryCatalog(io.StringIO(initial_value=boundaries))
+        self.assertEqual(sorted(catalog), ['ORI', 'SER'])
+        self.assertEqual(len(catalog['ORI'].boundaries), 1)
+        self.assertEqual(len(catalog['SER'].boundaries), 2)
+
+        # Boundaries are closed
+        positions = catalog['ORI'].boundaries[0].positions
+        self.assertEqual(len(positions), 4)
+        self.assertIs(positions[0], positions[-1])
+        self.assertEqual(positions[1].ra.degrees, 90)
+
+
+if __name__ == "__main__":
+    unittest.main()
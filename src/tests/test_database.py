@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+
+import unittest
+
+from database import write_database, CatalogDatabase
+
+
+class TestCatalogDatabase(unittest.TestCase):
+    def setUp(self):
+        import io
+        import tempfile
+        from objects import NGCCatalog
+        from constellations import ConstellationCatalog, BoundaryCatalog
+
+        ngc = '''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+5194,13h 29m 52.1s,"+47º 11' 43""",CVn,Gxy,11'X7.8',163,8.5,9.1,"M 51A, UGC 8493"
+1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4,"M 42, LBN 974, Sh2-281"
+7814,00h 03m 14.9s,"+16º 08' 44""",Peg,Gxy,6'X2.5',135,10.6,11.6,"UGC 8, PGC 218"'''
+        orion = "ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000"
+        boundaries = " 23.9 10.0 PEG  O\n 0.1 10.0 PEG  O\n 0.1 20.0 PEG  O\n"
+
+        objects = list(NGCCatalog(io.StringIO(ngc)).values())
+        # The same objects again, as from two overlapping sources
+        objects.extend(NGCCatalog(io.StringIO(ngc)).values())
+        objects.extend(ConstellationCatalog(io.StringIO(orion)).values())
+        objects.extend(BoundaryCatalog(io.StringIO(boundaries)).values())
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'catalogs.sqlite')
+        write_database(self.path, objects)
+        self.database = CatalogDatabase(self.path)
+
+    def tearDown(self):
+        self.database.close()
+        self.directory.cleanup()
+
+    def test_region(self):
+        rows = self.database.region(80, 90, -10, 0)
+        self.assertEqual([r['object_id'] for r in rows], ['NGC1976'])
+        self.assertEqual(rows[0]['type'], 'Open Cluster')
+
+        # Wrapping through 0h
+        rows = self.database.region(350, 10, 0, 50)
+        self.assertEqual([r['object_id'] for r in rows], ['NGC7814'])
+
+        rows = self.database.region(0, 360, -90, 90, magnitude=9)
+        self.assertEqual([r['object_id'] for r in rows], 
+                ['NGC1976', 'NGC5194'])
+
+    def test_duplicates(self):
+        self.assertEqual(self.database.connection.execute(
+            "SELECT count(*) FROM objects").fetchone()[0], 3)
+
+    def test_brighter_than(self):
+        rows = self.database.brighter_than(11, types=['Galaxy'])
+        self.assertEqual([r['object_id'] for r in rows], 
+                ['NGC5194', 'NGC7814'])
+
+    def test_lookup(self):
+        self.assertEqual(self.database.lookup('m 42')[0]['object_id'], 
+                'NGC1976')
+        self.assertEqual(self.database.aliases('NGC1976'),
+                ['NGC1976', 'M42', 'LBN974', 'Sh2281'])
+        self.assertEqual(self.database.connection.execute(
+            "SELECT catalog FROM aliases WHERE alias = 'M42'").fetchone()[0],
+            'M')
+
+    def test_lines(self):
+        lines = self.database.lines(80, 90, -5, 5)
+        self.assertEqual([(l[0], l[1]) for l in lines], [('ORI', 'line')])
+
+        # The Pegasus boundary crosses 0h
+        lines = self.database.lines(359, 1, 12, 13, kind='boundary')
+        self.assertEqual([l[0] for l in lines], ['PEG'])
+        self.assertEqual(self.database.lines(180, 190, 12, 13), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+
+import unittest
+
+from objects import CelestialObject
+from density import SkyGrid, density_map
+
+
+class TestSkyGrid(unittest.TestCase):
+    def test_cells(self):
+        grid = SkyGrid(ra_cells=4, dec_cells=2)
+        self.assertEqual(grid.cells([0, 100, 359.9, 0], [-10, -10, 10, 90]),
+                [0, 1, 7, 4])
+
+    def test_equal_area(self):
+        grid = SkyGrid(ra_cells=8, dec_cells=6)
+        areas = []
+        for cell in range(len(grid)):
+            ra_min, ra_max, dec_min, dec_max = grid.bounds(cell)
+            areas.append(math.radians(ra_max - ra_min) * 
+                    (math.sin(math.radians(dec_max)) - 
+                        math.sin(math.radians(dec_min))))
+        for area in areas:
+            self.assertAlmostEqual(area, 4 * math.pi / len(grid))
+
+    def test_cells_in(self):
+        grid = SkyGrid(ra_cells=4, dec_cells=2)
+        self.assertEqual(grid.cells_in(10, 100, 5, 10), [4, 5])
+        self.assertEqual(grid.cells_in(300, 10, -10, 10), [3, 0, 7, 4])
+
+    def test_polygon(self):
+        grid = SkyGrid(ra_cells=4, dec_cells=2)
+        ring = grid.polygon(4, step=45)
+        self.assertEqual(ring[0], ring[-1])
+        self.assertEqual(len(ring), 7)
+
+
+class TestDensityMap(unittest.TestCase):
+    def setUp(self):
+        from utils import EquatorialCoordinate
+        star = lambda ra, dec, magnitude: CelestialObject('1', 'HIP', 
+                type=0, ra=EquatorialCoordinate(ra, degrees=True),
+                dec=EquatorialCoordinate(dec, degrees=True),
+                magnitude=magnitude)
+        self.stars = [star(10, 10, 0), star(20, 10, 2.5), star(200, -30, 8)]
+
+    def test_density_map(self):
+        grid = SkyGrid(ra_cells=4, dec_cells=2)
+        density = density_map(self.stars, grid)
+        self.assertEqual(density.counts, [0, 0, 1, 0, 2, 0, 0, 0])
+        self.assertAlmostEqual(density.flux[4], 1.1)
+
+    def test_magnitudes(self):
+        grid = SkyGrid(ra_cells=4, dec_cells=2)
+        density = density_map(self.stars, grid, magnitudes=(1, 10))
+        self.assertEqual(density.counts, [0, 0, 1, 0, 1, 0, 0, 0])
+
+    def test_geojson(self):
+        grid = SkyGrid(ra_cells=4, dec_cells=2)
+        collection = density_map(self.stars, grid).geojson()
+        self.assertEqual(len(collection['features']), 2)
+        properties = collection['features'][1]['properties']
+        self.assertEqual(properties['count'], 2)
+        self.assertAlmostEqual(properties['magnitude'], 
+                -2.5 * math.log10(1.1 / grid.cell_area), places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
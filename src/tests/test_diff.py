@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import json
+
+import unittest
+
+from diff import feature_id, diff, apply_patch
+
+
+class TestDiff(unittest.TestCase):
+    def feature(self, id, magnitude):
+        return {"type": "Feature", 
+                "geometry": {"type": "Point", "coordinates": [0, 0]},
+                "properties": {"id": id, "magnitude": magnitude}}
+
+    def setUp(self):
+        self.previous = {"type": "FeatureCollection", "version": 1,
+                "features": [self.feature('NGC1', 12), 
+                    self.feature('NGC2', 13), self.feature('NGC3', 14)]}
+        self.current = {"type": "FeatureCollection", "version": 2,
+                "features": [self.feature('NGC1', 12), 
+                    self.feature('NGC3', 13.5), self.feature('NGC4', 11)]}
+
+    def test_diff(self):
+        patch = diff(self.previous, self.current)
+        self.assertEqual(patch['from_version'], 1)
+        self.assertEqual(patch['to_version'], 2)
+        self.assertEqual(patch['added'], [self.feature('NGC4', 11)])
+        self.assertEqual(patch['removed'], ['NGC2'])
+        self.assertEqual(patch['changed'], [self.feature('NGC3', 13.5)])
+
+    def test_apply_patch(self):
+        patch = json.loads(json.dumps(diff(self.previous, self.current)))
+        patched = apply_patch(self.previous, patch)
+        self.assertEqual(patched['version'], 2)
+        self.assertEqual(
+                sorted(patched['features'], key=feature_id),
+                sorted(self.current['features'], key=feature_id))
+
+        with self.assertRaises(ValueError):
+            apply_patch(self.current, patch)
+
+    def test_lists(self):
+        previous = [{"id": "HIP1", "magnitude": 5}]
+        current = [{"id": "HIP1", "magnitude": 5.1}]
+        patch = diff(previous, current, to_version=1)
+        self.assertEqual(patch['changed'], current)
+        self.assertEqual(apply_patch(previous, patch), current)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import datetime
+
+import unittest
+
+from visibility import sidereal_time
+from ephemeris import NO_EVENT, ephemeris, Ephemeris
+
+
+class TestEphemeris(unittest.TestCase):
+    def test_transit(self):
+        # An object at the sidereal time of 0h UT transits at 0h UT at
+        # Greenwich, and about four minutes earlier each day.
+        start = datetime.date(2015, 1, 1)
+        ra = sidereal_time(datetime.datetime(2015, 1, 1))
+        table = ephemeris(['X'], [ra], [0], 0, 0, start, 3)
+        self.assertEqual(list(table.transit('X')), [0, 1436, 1432])
+
+    def test_rise_set(self):
+        # An object on the celestial equator, seen from the equator,
+        # is up for (almost exactly) half a sidereal day.
+        start = datetime.date(2015, 1, 1)
+        table = ephemeris(['X'], [12], [0], 0, 0, start, 1, altitude=0)
+        rise, transit, set = [a[0] for a in table['X']]
+        self.assertEqual((transit - rise) % 1440, 359)
+        self.assertEqual((set - transit) % 1440, 359)
+
+    def test_circumpolar(self):
+        start = datetime.date(2015, 1, 1)
+        table = ephemeris(['Polaris', 'Acrux'], [2.53, 12.44], 
+                [89.26, -63.1], 40.75, -73.98, start, 2)
+        self.assertEqual(list(table.rise('Polaris')), [NO_EVENT] * 2)
+        self.assertEqual(list(table.set('Acrux')), [NO_EVENT] * 2)
+        self.assertNotEqual(table.transit('Polaris')[0], NO_EVENT)
+
+    def test_betelgeuse(self):
+        # Betelgeuse from New York on 2015-01-15 transits around 3:14
+        # UT (10:14 pm EST), rising around 20:46 UT the day before.
+        from objects import HYGStar
+        betelgeuse = HYGStar(StarID='27919', HIP='27989', HD='39801',
+                HR='2061', BayerFlamsteed='58Alp Ori',
+                ProperName='Betelgeuse', RA='5.91952477', Dec='07.40703634',
+                Mag='0.45', AbsMag='-5.1373773102256', Spectrum='M2Ib',
+                ColorIndex='1.500')
+        e = Ephemeris([betelgeuse])
+        table = e.table(40.75, -73.98, datetime.date(2015, 1, 15), 1)
+        self.assertAlmostEqual(table.transit('HIP27989')[0], 3 * 60 + 14,
+                delta=2)
+        self.assertAlmostEqual(table.rise('HIP27989')[0], 20 * 60 + 46,
+                delta=3)
+
+        # The same query is cached, and each caller gets its own copy
+        from ephemeris import _cached_ephemeris
+        hits = _cached_ephemeris.cache_info().hits
+        table.transit('HIP27989')[0] = 0
+        again = e.table(40.75, -73.98, datetime.date(2015, 1, 15), 1)
+        self.assertEqual(_cached_ephemeris.cache_info().hits, hits + 1)
+        self.assertIsNot(again, table)
+        self.assertAlmostEqual(again.transit('HIP27989')[0], 3 * 60 + 14,
+                delta=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from frames import obliquity, convert, frame_coordinates, graticule, equator
+
+
+class TestFrames(unittest.TestCase):
+    def assertCoordinates(self, converted, expected, places=3):
+        lons, lats = converted
+        for lon, lat, (e_lon, e_lat) in zip(lons, lats, expected):
+            self.assertAlmostEqual(lon, e_lon, places=places)
+            self.assertAlmostEqual(lat, e_lat, places=places)
+
+    def test_obliquity(self):
+        self.assertAlmostEqual(obliquity(2000), 23.4392794, places=6)
+        self.assertTrue(obliquity(2100) < obliquity(2000))
+
+    def test_galactic(self):
+        # The galactic center and the north galactic pole
+        lons, lats = convert([266.405, 192.85948], [-28.936175, 27.12825],
+                'equatorial', 'galactic')
+        self.assertAlmostEqual((lons[0] + 180) % 360 - 180, 0, places=3)
+        self.assertAlmostEqual(lats[0], 0, places=3)
+        self.assertAlmostEqual(lats[1], 90, places=3)
+
+    def test_ecliptic(self):
+        # The vernal equinox stays put and the north ecliptic pole is at
+        # 18h, 90 - obliquity.
+        lons, lats = convert([0, 0], [0, 90], 'ecliptic', 'equatorial')
+        self.assertCoordinates(([lons[0]], [lats[0]]), [(0, 0)])
+        self.assertAlmostEqual(lons[1], 270, places=6)
+        self.assertAlmostEqual(lats[1], 90 - obliquity(2000), places=6)
+
+    def test_round_trip(self):
+        lons, lats = [10, 88.8, 201.3, 359], [-80, 7.4, 33.3, 0.5]
+        self.assertCoordinates(convert(*convert(lons, lats, 'galactic',
+            'ecliptic'), 'ecliptic', 'galactic'), zip(lons, lats), 
+            places=6)
+
+    def test_frame_coordinates(self):
+        import io
+        from constellations import ConstellationCatalog
+        catalog = ConstellationCatalog(io.StringIO(
+                "ORI,5.679444,-1.9500,5.603333,-1.2000"))
+        orion = catalog['ORI']
+        coordinates = frame_coordinates([orion], 'equatorial')
+        p = orion.lines[0].positions[0]
+        self.assertAlmostEqual(coordinates[id(p)][0], 5.679444 * 15)
+        self.assertAlmostEqual(coordinates[id(p)][1], -1.95)
+
+    def test_equator(self):
+        ecliptic = equator('ecliptic', resolution=90)
+        coordinates = ecliptic['geometry']['coordinates']
+        self.assertEqual(len(coordinates), 5)
+        # The summer solstice, at 6h and the obliquity
+        self.assertAlmostEqual(coordinates[1][0], 90)
+        self.assertAlmostEqual(coordinates[1][1], obliquity(2000))
+        self.assertIs(equator('ecliptic', resolution=90), ecliptic)
+
+    def test_graticule(self):
+        lines = graticule('equatorial', step=30, resolution=10)
+        lines = lines['geometry']['coordinates']
+        # 12 meridians and 5 parallels from -60 to 60
+        self.assertEqual(len(lines), 17)
+        self.assertEqual(lines[0][0], [0, -60])
+        self.assertEqual(lines[12][0], [0, -60])
+
+
+if __name__ == "__main__":
+    unittest.main()
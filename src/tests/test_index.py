@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+
+import unittest
+
+from objects import HYGStar, NGCObject
+from index import INDEX_SUFFIX, CatalogIndex
+
+
+class TestCatalogIndex(unittest.TestCase):
+    ngc = '''NGCNo,L,GC,JH,WH,RA_2000,DEC_2000,Const,OriginalNGCSummaryDescription,Discoverer,Year,TelescopeType,Diam_inch,ObjectType,ObjectClassif,Size,PA,Vmag,Bmag,VSfcBrt,NGCEquiv,ICEquiv,AlsoCatalogedAs,HistoricalNotes,ObservingNotes,Uranometria2000,HeraldBobroffASTROATLAS,GSCSmallRegionNr,POSSBluePlateNr,POSS RedPlateNr,SourcesUsed
+5194,1,3572,1622,…,13h 29m 52.1s,"+47º 11' 43""",CVn,"!!!, Great Spiral neb",Charles Messier,1773,Refractor,3.3,Gxy,Sc I,11'X7.8',163,8.5,9.1,13.1,…,…,"M 51A, UGC 8493, ARP 85, MCG+08-25-012, CGCG 246.008, VV 403, IRAS 13277+4727, PGC 47404",H.C.,S.G.,76,"C-11,C-29",3460,1593,1593,"N,O,S,U,1,Z,m,0,6,8,D,n"
+1976,1,1179,360,…,05h 35m 17.2s,"-05º 23' 27""",Ori,!!! Theta Orionis and the great neb,Nicolas Peiresc,1610,Refractor,-,OC+Neb,3:02:03,90'X60',…,…,4,…,…,…,"M 42, LBN 974, Sh2-281",H.C.,S.G.,"225,226,270,271","C-53,D-24",4774,1477,1477,"N,O,S,l,s,6,8,0,M,D,n"
+'''
+    hyg = '''StarID,HIP,HD,HR,Gliese,BayerFlamsteed,ProperName,RA,Dec,Distance,PMRA,PMDec,RV,Mag,AbsMag,Spectrum,ColorIndex,X,Y,Z,VX,VY,VZ
+27919,27989,39801,2061,,58Alp Ori,Betelgeuse,5.91952477,07.40703634,131.061598951507,27.33,10.86,21,0.45,-5.1373773102256,M2Ib,1.500,2.738,129.93909,16.89611,-1.693e-05,2.0769e-05,9.611e-06
+'''
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.ngc_path = os.path.join(self.directory.name, 'ngc.csv')
+        with open(self.ngc_path, 'w', encoding='utf-8') as f:
+            f.write(self.ngc)
+        self.hyg_path = os.path.join(self.directory.name, 'hyg.csv')
+        with open(self.hyg_path, 'w', encoding='utf-8') as f:
+            f.write(self.hyg)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ngc_lookup(self):
+        with CatalogIndex(self.ngc_path, NGCObject) as ngc_index:
+            self.assertTrue(os.path.exists(self.ngc_path + INDEX_SUFFIX))
+            self.assertEqual(ngc_index['1976'].identifier, '1976')
+            self.assertEqual(ngc_index['M 42'].identifier, '1976')
+            self.assertEqual(ngc_index['NGC5194'].identifier, '5194')
+            self.assertEqual(ngc_index['pgc47404'].identifier, '5194')
+            self.assertFalse('M 31' in ngc_index)
+            with self.assertRaises(KeyError):
+                ngc_index['M 31']
+
+    def test_hyg_lookup(self):
+        with CatalogIndex(self.hyg_path, HYGStar) as hyg_index:
+            self.assertEqual(hyg_index['HIP27989'].magnitude, 0.45)
+            self.assertEqual(hyg_index['HD 39801'].identifier, '27989')
+            self.assertEqual(hyg_index['Betelgeuse'].identifier, '27989')
+
+    def test_rebuild_stale(self):
+        CatalogIndex(self.ngc_path, NGCObject).close()
+        with open(self.ngc_path, 'w', encoding='utf-8') as f:
+            f.write(self.ngc.replace('M 42', 'M 99'))
+        with CatalogIndex(self.ngc_path, NGCObject) as ngc_index:
+            self.assertFalse('M42' in ngc_index)
+            self.assertEqual(ngc_index['M99'].identifier, '1976')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from projections import StereographicProjection
+from labels import Label, label_text, LabelLayout
+
+
+class TestLabelLayout(unittest.TestCase):
+    def setUp(self):
+        from objects import CelestialObject
+        from utils import EquatorialCoordinate
+
+        def star(identifier, ra, dec, magnitude, name=None):
+            o = CelestialObject(identifier, 'HIP', type=0,
+                    ra=EquatorialCoordinate(ra, degrees=True),
+                    dec=EquatorialCoordinate(dec, degrees=True),
+                    magnitude=magnitude)
+            if name:
+                o.add_alias(name)
+            return o
+
+        self.star = star
+        self.projection = StereographicProjection(center=(0, 0),
+                scale=1000, translate=(500, 500))
+
+    def test_label_text(self):
+        self.assertEqual(label_text(self.star('1', 0, 0, 1)), 'HIP1')
+        self.assertEqual(label_text(self.star('1', 0, 0, 1, 'Vega')), 'Vega')
+
+    def test_label_text_ngc(self):
+        # NGC objects are labelled with their id, whatever their aliases
+        from objects import NGCObject
+        o = NGCObject(NGCNo='771', RA_2000='02h 03m 26.6s',
+                DEC_2000='+72º 25\' 15"', Const='Cas', ObjectType='*',
+                Size='…', PA='…', Vmag='…', Bmag='4', AlsoCatalogedAs='…')
+        self.assertEqual(o.aliases, ['NGC771'])
+        self.assertEqual(label_text(o), 'NGC771')
+        o = NGCObject(NGCNo='6543', RA_2000='17h 58m 33.4s',
+                DEC_2000='+66º 37\' 59"', Const='Dra', ObjectType='PN',
+                Size="0.3'", PA='…', Vmag='8.1', Bmag='8.8', 
+                AlsoCatalogedAs='PK 96+29.1, NPM1G+66.0127')
+        self.assertEqual(label_text(o), 'NGC6543')
+
+    def test_place(self):
+        layout = LabelLayout(self.projection, 1000, 1000)
+        labels = layout.place([self.star('1', 0, 0, 1)])
+        self.assertEqual(labels['HIP1'], Label('HIP1', 504, 500 + 10 / 3, 
+            'start'))
+
+    def test_collision(self):
+        # Two stars next to each other: the fainter one's label moves
+        # to the left.
+        layout = LabelLayout(self.projection, 1000, 1000)
+        labels = layout.place([self.star('2', -0.2, 0, 2), 
+            self.star('1', 0, 0, 1)])
+        self.assertEqual(labels['HIP1'].anchor, 'start')
+        self.assertEqual(labels['HIP2'].anchor, 'end')
+
+    def test_culled(self):
+        # Five stars on top of each other, the brightest get labels
+        layout = LabelLayout(self.projection, 1000, 1000)
+        labels = layout.place([self.star(str(i), 0, 0, i) 
+            for i in reversed(range(5))])
+        self.assertIn('HIP0', labels)
+        self.assertIn('HIP1', labels)
+        self.assertNotIn('HIP4', labels)
+
+    def test_outside(self):
+        layout = LabelLayout(self.projection, 1000, 1000)
+        labels = layout.place([self.star('1', 180, 0, 1), 
+            self.star('2', 60, 0, 1)])
+        self.assertEqual(labels, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
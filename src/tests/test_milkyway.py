@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+
+import unittest
+
+from milkyway import LEVELS_SUFFIX, simplify, bounding_box, overlaps, \
+        cone_region, MilkyWayOutline, MilkyWayCatalog, load_milky_way
+
+
+class TestMilkyWay(unittest.TestCase):
+    # A closed outline that crosses 0h, and an open edge
+    milkyway = '''dark,Wrapping dark area,23.500000,60.0000,23.800000,61.0000,0.100000,60.5000,0.300000,59.0000,0.100000,58.0000,23.800000,58.5000,23.500000,60.0000
+edge,Edge,6.000000,0.0000,6.100000,0.1000,6.200000,0.0000,6.300000,0.1000,6.400000,0.0000,7.000000,5.0000,8.000000,10.0000
+'''
+
+    def setUp(self):
+        import io
+        import tempfile
+        self.catalog = MilkyWayCatalog(io.StringIO(self.milkyway))
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'milkyway.csv')
+        with open(self.path, 'w') as f:
+            f.write(self.milkyway)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_simplify(self):
+        points = [(90, 0), (91.5, 0.1), (93, 0), (94.5, 0.1), (96, 0),
+                (105, 5), (120, 10)]
+        self.assertEqual(simplify(points, 0), points)
+        self.assertEqual(simplify(points, 0.25), 
+                [(90, 0), (96, 0), (105, 5), (120, 10)])
+        self.assertEqual(simplify(points, 4), [(90, 0), (120, 10)])
+        ring = [(0, 0), (10, 0), (10, 10), (0, 0)]
+        self.assertEqual(simplify(ring, 1), ring)
+
+    def test_bounding_box(self):
+        self.assertEqual(bounding_box([(10, 1), (20, -1)]), (10, 20, -1, 1))
+        # Wraps through 0h
+        box = bounding_box([(350, 1), (355, 3), (5, 2)])
+        self.assertEqual(box, (350, 5, 1, 3))
+        self.assertTrue(overlaps(box, (0, 10, 0, 2)))
+        self.assertTrue(overlaps(box, (340, 351, 0, 2)))
+        self.assertFalse(overlaps(box, (10, 340, 0, 90)))
+        self.assertFalse(overlaps(box, (0, 10, 4, 10)))
+
+    def test_cone_region(self):
+        self.assertEqual(cone_region(10, 85, 10), (0, 360, 75, 90))
+        ra_min, ra_max, dec_min, dec_max = cone_region(0, 0, 10)
+        self.assertAlmostEqual(ra_min, 350)
+        self.assertAlmostEqual(ra_max, 10)
+
+    def test_levels(self):
+        edge = self.catalog['MW2']
+        self.assertEqual((edge.kind, edge.name), ('edge', 'Edge'))
+        self.assertEqual([len(parts[0][1]) for parts in edge.levels],
+                [7, 4, 4, 2])
+        dark = self.catalog['MW1']
+        self.assertEqual(dark.levels[0][0][0][:2], (352.5, 4.5))
+        self.assertEqual(dark.lines(0)[0][0], dark.lines(0)[0][-1])
+
+    def test_select(self):
+        self.assertEqual([v.id for v in self.catalog.select()],
+                ['MW1', 'MW2'])
+        views = self.catalog.select(cone_region(0, 60, 5))
+        self.assertEqual([v.id for v in views], ['MW1'])
+        self.assertEqual(len(views[0].lines[0]), 7)
+        self.assertEqual(self.catalog.select(kinds=('edge',))[0].id, 'MW2')
+        self.assertEqual(len(self.catalog.select(resolution=4)[1].lines[0]), 2)
+        self.assertEqual(self.catalog.select((200, 250, -10, 10)), [])
+
+        feature = views[0].feature(invert_ra=True)
+        self.assertEqual(feature['properties']['type'], 'Milky Way')
+        self.assertAlmostEqual(feature['geometry']['coordinates'][0][0][0], 
+                7.5)
+
+    def test_parts(self):
+        points = [(i, 0) for i in range(40)]
+        outline = MilkyWayOutline('MW', 'edge', 'Line', points)
+        parts = outline.levels[0]
+        self.assertEqual([len(p) for box, p in parts], [17, 17, 8])
+        self.assertEqual(outline.lines(0, (20, 25, -1, 1)), 
+                [points[16:33]])
+        self.assertEqual(outline.lines(0, (10, 35, -1, 1)), [points])
+
+    def test_load_cached(self):
+        catalog = load_milky_way(self.path)
+        self.assertTrue(os.path.exists(self.path + LEVELS_SUFFIX))
+        cached = load_milky_way(self.path)
+        self.assertEqual(cached['MW1'].levels, catalog['MW1'].levels)
+        self.assertEqual([v.lines for v in cached.select()], 
+                [v.lines for v in catalog.select()])
+
+        # A changed catalog rebuilds the levels
+        with open(self.path, 'w') as f:
+            f.write(self.milkyway.replace('Edge', 'Northern edge'))
+        self.assertEqual(load_milky_way(self.path)['MW2'].name, 
+                'Northern edge')
+
+
+if __name__ == "__main__":
+    unittest.main()
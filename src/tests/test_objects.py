@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from utils import Size
+from objects import CelestialObject, NGCObject, NGCCatalog, HYGStar, \
+        HYGStarCatalog
+
+
+class TestCelestialObject(unittest.TestCase):
+    # Aliases are the primary functionality of the CelestialObject. It
+    # isn't exactly abstract, it can be used to an actual object, but
+    # objects are likely to come from a catalog, and it would be better
+    # to use a catalog-specific class to handle any catalog-specific
+    # quirks.
+    def test_aliases_dict(self):
+        c = CelestialObject('1976', 'NGC')
+        self.assertEqual(c.aliases_dict, ['1976',])
+
+    def test_catalogs(self):
+        c = CelestialObject('1976', 'NGC')
+        self.assertEqual(c.catalogs, ['NGC',])
+
+    def test_add_alias(self):
+        c = CelestialObject('1976', 'NGC')
+
+        c.add_alias('42', 'M')
+        self.assertEqual(c.aliases_dicts, ['1976', '42'])
+        self.assertEqual(c.catalogs, ['NGC', 'M'])
+
+        c.add_alias('The Orion Nebula')
+        self.assertEqual(c.aliases_dicts, ['1976', '42', 'The Orion Nebula'])
+        self.assertEqual(c.catalogs, ['NGC', 'M'])
+
+    def test_names(self):
+        c = CelestialObject('1976', 'NGC')
+        c.add_alias('42', 'M')
+        self.assertEqual(c.names, [])
+
+        c.add_alias('The Orion Nebula')
+        self.assertEqual(c.names, ['The Orion Nebula'])
+
+
+class TestNGCObject(unittest.TestCase):
+    def setUp(self):
+        self.ngc_object_dict = {
+                'ObjectType': 'OC+Neb', 
+                'L': '1', 
+                'HistoricalNotes': 'H.C.', 
+                'NGCNo': '1976', 
+                'GC': '1179', 
+                'VSfcBrt': '…', 
+                'Const': 'Ori', 
+                'ObjectClassif': '3:02:03', 
+                'GSCSmallRegionNr': '4774', 
+                'DEC_2000': '-05º 23\' 27"', 
+                'ICEquiv': '…', 
+                'TelescopeType': 'Refractor', 
+                'PA': '…', 
+                'Size': "90'X60'", 
+                'JH': '360', 
+                'Diam_inch': '-', 
+                'Bmag': '4', 
+                'NGCEquiv': '…', 
+                'RA_2000': '05h 35m 17.2s', 
+                'AlsoCatalogedAs': 'M 42, LBN 974, Sh2-281', 
+                'POSS RedPlateNr': '1477', 
+                'HeraldBobroffASTROATLAS': 'C-53,D-24', 
+                'Year': '1610', 
+                'POSSBluePlateNr': '1477', 
+                'Vmag': '…', 
+                'WH': '…', 
+                'Uranometria2000': '225,226,270,271', 
+                'ObservingNotes': 'S.G.', 
+                'SourcesUsed': 'N,O,S,l,s,6,8,0,M,D,n', 
+                'OriginalNGCSummaryDescription': '!!! Theta Orionis and the great neb', 
+                'Discoverer': 'Nicolas Peiresc'}
+        
+    def test_size(self):
+        ngc_object = NGCObject(**self.ngc_object_dict)
+        self.assertEqual(ngc_object.identifier, '1976')
+
+    def test_lazy_fields(self):
+        ngc_object = NGCObject(**self.ngc_object_dict)
+        self.assertEqual(ngc_object.size, Size(major=90.0, minor=60.0))
+        self.assertAlmostEqual(ngc_object.ra.hours, 5.58811, places=5)
+        self.assertAlmostEqual(ngc_object.dec.degrees, -5.39083, places=5)
+        self.assertEqual(ngc_object.aliases, 
+                ['NGC1976', 'M42', 'LBN974', 'Sh2281'])
+        self.assertEqual(ngc_object.catalogs, ['NGC', 'M', 'LBN', 'Sh2'])
+        self.assertEqual(ngc_object.constellation, 'Ori')
+
+    def test_add_alias_after_decoding(self):
+        ngc_object = NGCObject(**self.ngc_object_dict)
+        ngc_object.add_alias('The Orion Nebula')
+        self.assertEqual(ngc_object.aliases[-1], 'The Orion Nebula')
+        self.assertEqual(ngc_object.aliases[1], 'M42')
+
+
+class TestNGCCatalog(unittest.TestCase):
+    def test_init(self):
+        import io
+        ngc_orion = '''NGCNo,L,GC,JH,WH,RA_2000,DEC_2000,Const,OriginalNGCSummaryDescription,Discoverer,Year,TelescopeType,Diam_inch,ObjectType,ObjectClassif,Size,PA,Vmag,Bmag,VSfcBrt,NGCEquiv,ICEquiv,AlsoCatalogedAs,HistoricalNotes,ObservingNotes,Uranometria2000,HeraldBobroffASTROATLAS,GSCSmallRegionNr,POSSBluePlateNr,POSS RedPlateNr,SourcesUsed
+5194,1,3572,1622,…,13h 29m 52.1s,"+47º 11' 43""",CVn,"!!!, Great Spiral neb",Charles Messier,1773,Refractor,3.3,Gxy,Sc I,11'X7.8',163,8.5,9.1,13.1,…,…,"M 51A, UGC 8493, ARP 85, MCG+08-25-012, CGCG 246.008, VV 403, IRAS 13277+4727, PGC 47404",H.C.,S.G.,76,"C-11,C-29",3460,1593,1593,"N,O,S,U,1,Z,m,0,6,8,D,n"
+1976,1,1179,360,…,05h 35m 17.2s,"-05º 23' 27""",Ori,!!! Theta Orionis and the great neb,Nicolas Peiresc,1610,Refractor,-,OC+Neb,3:02:03,90'X60',…,…,4,…,…,…,"M 42, LBN 974, Sh2-281",H.C.,S.G.,"225,226,270,271","C-53,D-24",4774,1477,1477,"N,O,S,l,s,6,8,0,M,D,n"'''
+        stream = io.StringIO(initial_value=ngc_orion)
+        ngc_catalog = NGCCatalog(stream)
+        self.assertTrue('1976' in ngc_catalog)
+
+    def test_init_needed_columns_only(self):
+        import io
+        ngc_orion = '''AlsoCatalogedAs,NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag
+"M 42, LBN 974, Sh2-281",1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4'''
+        stream = io.StringIO(initial_value=ngc_orion)
+        ngc_catalog = NGCCatalog(stream)
+        self.assertEqual(ngc_catalog['1976'].magnitude, 4)
+        self.assertEqual(ngc_catalog['1976'].aliases[1], 'M42')
+
+
+class TestHYGStar(unittest.TestCase):
+    def setUp(self):
+        self.hyg_object_dict = {
+                'VX': '-1.693e-05', 
+                'Distance': '131.061598951507', 
+                'X': '2.738', 
+                'StarID': '27919', 
+                'HD': '39801', 
+                'Z': '16.89611', 
+                'VZ': '9.611e-06', 
+                'BayerFlamsteed': '58Alp Ori', 
+                'VY': '2.0769e-05', 
+                'PMRA': '27.33', 
+                'Mag': '0.45', 
+                'HR': '2061', 
+                'Y': '129.93909', 
+                'Spectrum': 'M2Ib', 
+                'ColorIndex': '1.500', 
+                'RA': '5.91952477', 
+                'HIP': '27989', 
+                'AbsMag': '-5.1373773102256', 
+                'Dec': '07.40703634', 
+                'PMDec': '10.86', 
+                'ProperName': 'Betelgeuse', 
+                'Gliese': '', 
+                'RV': '21'}
+
+    def test_init(self):
+        # Betelgeuse, HIP 27989
+        hyg_object = HYGStar(**self.hyg_object_dict)
+        self.assertEqual(hyg_object.identifier, '27989')
+        self.assertEqual(hyg_object.ra.hours, 5.91952477)
+        self.assertEqual(hyg_object.ra.degrees, 88.79287155)
+        self.assertEqual(hyg_object.dec.degrees, 7.40703634)
+        self.assertEqual(hyg_object.names, ['Betelgeuse'])
+        self.assertEqual(hyg_object.constellation, 'Ori')
+
+
+class TestHYGStarCatalog(unittest.TestCase):
+    def test_init(self):
+        import io
+        hyg_betelgeuse = '''StarID,HIP,HD,HR,Gliese,BayerFlamsteed,ProperName,RA,Dec,Distance,PMRA,PMDec,RV,Mag,AbsMag,Spectrum,ColorIndex,X,Y,Z,VX,VY,VZ
+27919,27989,39801,2061,,58Alp Ori,Betelgeuse,5.91952477,07.40703634,131.061598951507,27.33,10.86,21,0.45,-5.1373773102256,M2Ib,1.500,2.738,129.93909,16.89611,-1.693e-05,2.0769e-05,9.611e-06'''
+        stream = io.StringIO(initial_value=hyg_betelgeuse)
+        hyg_catalog = HYGStarCatalog(stream)
+        self.assertTrue('27989' in hyg_catalog)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import tempfile
+
+import unittest
+
+from density import SkyGrid
+from partitions import build_partitions, PartitionedCatalog
+
+
+class TestPartitionedCatalog(unittest.TestCase):
+    header = 'StarID,HIP,HD,HR,Gliese,BayerFlamsteed,ProperName,RA,Dec,Distance,PMRA,PMDec,RV,Mag,AbsMag,Spectrum,ColorIndex,X,Y,Z,VX,VY,VZ'
+    stars = [
+        ('27989', 'Betelgeuse', 5.91952477, 7.40703634, 0.45),
+        ('24436', 'Rigel', 5.24229756, -8.20163919, 0.18),
+        ('26727', 'Alnitak', 5.67931245, -1.94257841, 1.74),
+        ('80763', 'Antares', 16.49012986, -26.43194608, 1.06),
+        ('11767', 'Polaris', 2.52974312, 89.26413805, 1.97),
+        ('677', 'Alpheratz', 0.13976888, 29.09082805, 2.07),
+        ('113881', 'Scheat', 23.06287038, 28.08245462, 2.44),
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, 'hyg.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(self.header + '\n')
+            for hip, name, ra, dec, mag in self.stars:
+                f.write('0,{hip},,,,,{name},{ra},{dec},,,,,{mag},,,,,,,,,\n'.format(
+                    hip=hip, name=name, ra=ra, dec=dec, mag=mag))
+            f.write('0,,,,,,,,,,,,,,,,,,,,,,\n')
+        self.out = os.path.join(self.directory.name, 'partitions')
+        # Small chunks, so the runs really are merged
+        self.manifest = build_partitions(self.csv_path, self.out, 
+                SkyGrid(8, 4), chunk_size=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_build(self):
+        self.assertEqual(self.manifest['count'], 7)
+        self.assertEqual(sum(c['count'] 
+            for c in self.manifest['cells'].values()), 7)
+        # Only the manifest and cell files are left
+        self.assertEqual(len(os.listdir(self.out)), 
+                len(self.manifest['cells']) + 1)
+
+    def test_cells_sorted_by_magnitude(self):
+        stars = PartitionedCatalog(self.out)
+        orion = stars.grid.cell(5.9 * 15, -5)
+        self.assertEqual([s.names[0] for s in stars.tile(orion)],
+                ['Rigel', 'Alnitak'])
+        self.assertEqual([s.names[0] for s in stars.tile(orion, 1)],
+                ['Rigel'])
+
+    def test_query_region(self):
+        stars = PartitionedCatalog(self.out)
+        found = stars.query(region=(75, 95, -10, 10), magnitude=1)
+        self.assertEqual(sorted(s.names[0] for s in found),
+                ['Betelgeuse', 'Rigel'])
+
+    def test_query_wraps(self):
+        stars = PartitionedCatalog(self.out)
+        found = stars.query(region=(340, 5, 20, 40))
+        self.assertEqual(sorted(s.names[0] for s in found),
+                ['Alpheratz', 'Scheat'])
+
+    def test_query_cone(self):
+        # Cones are read through their bounding box
+        from milkyway import cone_region
+        stars = PartitionedCatalog(self.out)
+        region = cone_region(85, 0, 12)
+        self.assertLess(len(stars.cells(region)), len(stars.cells()))
+        self.assertEqual(sorted(s.names[0] for s in stars.query(region)),
+                ['Alnitak', 'Betelgeuse', 'Rigel'])
+
+    def test_cells_skipped(self):
+        stars = PartitionedCatalog(self.out)
+        self.assertEqual(stars.cells(magnitude=0), [])
+        # Rigel's and Betelgeuse's
+        self.assertEqual(len(stars.cells(magnitude=0.5)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+import datetime
+
+import unittest
+
+from planner import limiting_magnitude, airmass, surface_brightness, \
+        night_times, best_targets
+
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        from objects import NGCObject
+        self.m42 = NGCObject(NGCNo='1976', RA_2000='05h 35m 17.2s',
+                DEC_2000='-05º 23\' 27"', Const='Ori', ObjectType='OC+Neb',
+                Size="90'X60'", PA='…', Vmag='…', Bmag='4', 
+                AlsoCatalogedAs='M 42, LBN 974, Sh2-281')
+        self.m51 = NGCObject(NGCNo='5194', RA_2000='13h 29m 52.1s',
+                DEC_2000='+47º 11\' 43"', Const='CVn', ObjectType='Gxy',
+                Size="11'X7.8'", PA='163', Vmag='8.5', Bmag='9.1', 
+                AlsoCatalogedAs='M 51A, UGC 8493, PGC 47404')
+        self.m4 = NGCObject(NGCNo='6121', RA_2000='16h 23m 35.4s',
+                DEC_2000='-26º 31\' 31"', Const='Sco', ObjectType='GC',
+                Size="36'", PA='…', Vmag='5.6', Bmag='…', 
+                AlsoCatalogedAs='M 4')
+
+    def test_limiting_magnitude(self):
+        self.assertAlmostEqual(limiting_magnitude(100), 12.7)
+
+    def test_airmass(self):
+        self.assertAlmostEqual(airmass(90), 1, places=3)
+        self.assertAlmostEqual(airmass(30), 2, places=1)
+        self.assertEqual(airmass(-1), math.inf)
+        self.assertEqual(airmass(-10), math.inf)
+
+    def test_surface_brightness(self):
+        from utils import Size
+        self.assertEqual(surface_brightness(8, None), 8)
+        self.assertEqual(surface_brightness(8, Size(0, 0)), 8)
+        self.assertAlmostEqual(surface_brightness(8, Size(2, 2)),
+                8 + 2.5 * math.log10(math.pi), places=6)
+
+    def test_night_times(self):
+        times = night_times(datetime.date(2015, 1, 15), -75, (20, 2))
+        self.assertEqual(times[0], datetime.datetime(2015, 1, 16, 1))
+        self.assertEqual(times[-1], datetime.datetime(2015, 1, 16, 7))
+        self.assertEqual(len(times), 25)
+
+    def test_best_targets(self):
+        # New York on a January evening: Orion is up all evening, M 51
+        # rises late and M 4 is down with the sun.
+        targets = best_targets([self.m4, self.m51, self.m42], 40.75, -74,
+                datetime.date(2015, 1, 15), 100, hours=(20, 2),
+                min_altitude=20)
+        self.assertEqual([t.id for t in targets], ['NGC1976', 'NGC5194'])
+        self.assertTrue(targets[0].altitude > 40)
+        # M 42 transits at about 2:50 UT
+        self.assertEqual(targets[0].best_time, 
+                datetime.datetime(2015, 1, 16, 2, 56))
+
+    def test_best_targets_aperture(self):
+        # M 51 is beyond a 10mm finder
+        targets = best_targets([self.m51, self.m42], 40.75, -74,
+                datetime.date(2015, 1, 15), 10, hours=(20, 2))
+        self.assertEqual([t.id for t in targets], ['NGC1976'])
+
+    def test_best_targets_below_horizon(self):
+        # M 4 gets above -30 degrees but never above the horizon
+        targets = best_targets([self.m4, self.m42], 40.75, -74,
+                datetime.date(2015, 1, 15), 100, min_altitude=-30)
+        self.assertEqual([t.id for t in targets], ['NGC1976'])
+
+    def test_best_targets_k(self):
+        targets = best_targets([self.m51, self.m42], 40.75, -74,
+                datetime.date(2015, 1, 15), 100, k=1)
+        self.assertEqual(len(targets), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import math
+
+import unittest
+
+from projections import StereographicProjection, EquirectangularProjection
+
+
+class TestStereographicProjection(unittest.TestCase):
+    def test_center(self):
+        projection = StereographicProjection(center=(83.8, -5.4),
+                scale=500, translate=(400, 300))
+        p = projection(83.8, -5.4)
+        self.assertAlmostEqual(p.x, 400)
+        self.assertAlmostEqual(p.y, 300)
+
+    def test_orientation(self):
+        projection = StereographicProjection(center=(90, 0), scale=500)
+        # East is left, north is up
+        self.assertLess(projection(95, 0).x, 0)
+        self.assertLess(projection(90, 5).y, 0)
+
+    def test_horizon(self):
+        projection = StereographicProjection(scale=100)
+        self.assertAlmostEqual(projection(0, 90).y, -100)
+        self.assertIsNone(projection(180, 0))
+        self.assertIsNotNone(projection(89, 0))
+
+
+class TestEquirectangularProjection(unittest.TestCase):
+    def test_wrap(self):
+        projection = EquirectangularProjection(center=(0, 0), scale=1)
+        self.assertAlmostEqual(projection(350, 0).x, math.radians(10))
+        self.assertAlmostEqual(projection(10, 0).x, -math.radians(10))
+        self.assertAlmostEqual(projection(0, 45).y, -math.radians(45))
+
+
+if __name__ == "__main__":
+    unittest.main()
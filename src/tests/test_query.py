@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from query import Magnitude, Types, InConstellation, Region, Cone, Ids, \
+        Query, magnitude_order
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        import io
+        from objects import NGCCatalog
+        ngc = '''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+224,00h 42m 44.3s,"+41º 16' 9""",And,Gxy,190'X60',35,3.4,4.4,"M 31, UGC 454"
+1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4,"M 42, LBN 974, Sh2-281"
+1981,05h 35m 9.0s,"-04º 25' 54""",Ori,OC,28',…,4.2,…,""
+2024,05h 41m 43.0s,"-01º 51' 0""",Ori,Neb,30'X30',…,…,…,""
+5194,13h 29m 52.1s,"+47º 11' 43""",CVn,Gxy,11'X7.8',163,8.5,9.1,"M 51A, UGC 8493"'''
+        self.catalog = NGCCatalog(io.StringIO(ngc))
+        self.objects = list(self.catalog.values())
+
+    def ids(self, objects):
+        return [o.identifier for o in objects]
+
+    def test_magnitude(self):
+        query = Query([Magnitude(faintest=4.2)])
+        self.assertEqual(self.ids(query.run(self.objects)), 
+                ['224', '1976', '1981'])
+        query = Magnitude(brightest=4) & Magnitude(faintest=9)
+        self.assertEqual(self.ids(query.run(self.objects)), 
+                ['1976', '1981', '5194'])
+
+    def test_magnitude_order(self):
+        query = Query([Magnitude(faintest=9)])
+        self.assertEqual(self.ids(query.run(self.objects, 
+            order='magnitude', limit=2)), ['224', '1976'])
+
+    def test_types(self):
+        query = Types('Galaxy')
+        self.assertEqual(self.ids(Query([query]).run(self.objects)), 
+                ['224', '5194'])
+
+    def test_constellation(self):
+        query = InConstellation('ORI') & Magnitude(faintest=5)
+        self.assertEqual(self.ids(query.run(self.objects)), 
+                ['1976', '1981'])
+
+    def test_constellation_boundaries(self):
+        # Stars without a designation are placed by the boundaries
+        import io
+        from objects import HYGStar
+        from constellations import BoundaryCatalog
+        boundaries = BoundaryCatalog(io.StringIO(
+                " 5.0 10.0 ORI  O\n 6.0 10.0 ORI  O\n 6.0  0.0 ORI  O\n"))
+        def star(hip, ra, dec, bayer=''):
+            return HYGStar(StarID=hip, HIP=hip, HD='', HR='', 
+                    BayerFlamsteed=bayer, ProperName='', RA=ra, Dec=dec, 
+                    Mag='5', AbsMag='', Spectrum='', ColorIndex='')
+        stars = [star('1', '5.8', '6'), star('2', '5.2', '2'), 
+                star('3', '12', '6', '58Alp Ori')]
+
+        query = Query([InConstellation('ORI')])
+        self.assertEqual(self.ids(query.run(stars)), ['3'])
+        query = Query([InConstellation('ORI', boundaries=boundaries)])
+        self.assertEqual(self.ids(query.run(stars)), ['1', '3'])
+
+    def test_region(self):
+        query = Query([Region(80, 90, -6, 0)])
+        self.assertEqual(self.ids(query.run(self.objects)), 
+                ['1976', '1981', '2024'])
+        query = Query([Region(350, 20, 30, 50)])
+        self.assertEqual(self.ids(query.run(self.objects)), ['224'])
+
+    def test_cone(self):
+        query = Query([Cone(83.8, -5.4, 1.2)])
+        self.assertEqual(self.ids(query.run(self.objects)), 
+                ['1976', '1981'])
+
+    def test_ids(self):
+        query = Query([Ids('^M ?4')])
+        self.assertEqual(self.ids(query.run(self.objects)), ['1976'])
+        query = Query([Ids('NGC2024')])
+        self.assertEqual(self.ids(query.run(self.objects)), ['2024'])
+
+    def test_plan(self):
+        query = Ids('M') & Region(0, 10, 0, 10) & Magnitude(faintest=6) \
+                & Types(3)
+        magnitudes, others = query.plan()
+        self.assertEqual(magnitudes, (None, 6))
+        self.assertEqual([p.__class__ for p in others], 
+                [Types, Region, Ids])
+
+        # Patterns that match everything are left out
+        magnitudes, others = (Ids('.*') & Types(3)).plan()
+        self.assertEqual([p.__class__ for p in others], [Types])
+
+    def test_catalog(self):
+        # Catalogs are sorted by magnitude once
+        order = magnitude_order(self.catalog)
+        self.assertIs(magnitude_order(self.catalog)[1], order[1])
+        self.assertEqual([self.objects[i].identifier for i in order[1]], 
+                ['224', '1976', '1981', '5194', '2024'])
+        query = Magnitude(faintest=4.2) & Ids('.*')
+        self.assertEqual(self.ids(query.run(self.catalog)), 
+                ['224', '1976', '1981'])
+        self.assertIsNotNone(self.objects[0]._NGCObject__AlsoCatalogedAs)
+
+    def test_lazy(self):
+        # Objects cut off by magnitude never decode their coordinates
+        query = Magnitude(faintest=4) & Region(0, 360, -90, 90)
+        query.run(self.objects)
+        self.assertIsNone(self.objects[4]._NGCObject__ra)
+        self.assertIsNotNone(self.objects[1]._NGCObject__ra)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from milkyway import MilkyWayView
+from render import SVGChart
+
+
+class TestSVGChart(unittest.TestCase):
+    def setUp(self):
+        import io
+        from objects import HYGStar, NGCCatalog
+        from constellations import ConstellationCatalog
+        from projections import StereographicProjection
+
+        self.projection = StereographicProjection(center=(83.8, 0), 
+                scale=1000, translate=(500, 500))
+        self.chart = SVGChart(self.projection, 1000, 1000)
+
+        def star(identifier, ra, dec, magnitude):
+            return HYGStar(StarID=identifier, HIP=identifier, HD='', HR='',
+                    BayerFlamsteed='', ProperName='', RA=str(ra), 
+                    Dec=str(dec), Mag=str(magnitude), AbsMag='', 
+                    Spectrum='', ColorIndex='')
+
+        self.betelgeuse = star('27989', 5.91952477, 7.40703634, 0.45)
+        self.antares = star('80763', 16.49012986, -26.43194608, 1.06)
+        ngc = '''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4,"M 42"
+2024,05h 41m 43.0s,"-01º 51' 0""",Ori,Gxy,30'X30',…,…,…,""'''
+        self.ngc = list(NGCCatalog(io.StringIO(ngc)).values())
+        self.orion = ConstellationCatalog(io.StringIO(
+            "ORI,5.679444,-1.9500,5.603333,-1.2000,16.49,-26.43"))['ORI']
+
+    def test_radius(self):
+        self.assertEqual(self.chart.radius(-1.5, (0.5, 6)), 6)
+        self.assertEqual(self.chart.radius(6, (0.5, 6)), 0.5)
+        self.assertEqual(self.chart.radius(9, (0.5, 6)), 0.5)
+        self.assertTrue(self.chart.radius(0.45, (0.5, 6)) >
+                self.chart.radius(1.06, (0.5, 6)))
+
+    def test_symbol_culled(self):
+        self.assertIn('class="star"', self.chart.symbol(self.betelgeuse))
+        self.assertIsNone(self.chart.symbol(self.antares))
+
+    def test_symbols(self):
+        m42, ngc2024 = self.ngc
+        # M 42 is an open cluster with nebulosity, drawn as a cluster
+        self.assertTrue(self.chart.symbol(m42).startswith(
+            '<circle id="NGC1976" class="open-cluster"'))
+        self.assertIn('<ellipse id="NGC2024" class="galaxy"', 
+                self.chart.symbol(ngc2024))
+
+    def test_path(self):
+        # The last point is on the far side of the sky
+        d = self.chart.path(self.orion.lines[0])
+        self.assertEqual(d.count('M'), 1)
+        self.assertEqual(d.count('L'), 1)
+
+    def test_milky_way(self):
+        view = MilkyWayView('MW1', 'dark', 'Dark area', 
+                [[(80, 0), (85, 1), (90, 0)], [(250, 0), (260, 0)]])
+        element = self.chart.milky_way(view)
+        self.assertTrue(element.startswith(
+            '<path id="MW1" class="milky-way dark" d="M'))
+        self.assertEqual(element.count('L'), 2)
+        view.lines = [[(250, 0), (260, 0)]]
+        self.assertIsNone(self.chart.milky_way(view))
+
+    def test_render(self):
+        import io
+        stream = io.StringIO()
+        count = self.chart.render([self.orion, self.antares, 
+            self.betelgeuse] + self.ngc, stream)
+        svg = stream.getvalue()
+        self.assertTrue(svg.startswith('<?xml'))
+        self.assertTrue(svg.rstrip().endswith('</svg>'))
+        self.assertIn('id="ORI" class="constellation"', svg)
+        self.assertIn('id="HIP27989"', svg)
+        self.assertNotIn('HIP80763', svg)
+        self.assertEqual(count, len(svg.splitlines()))
+
+        # Well formed
+        from xml.etree import ElementTree
+        ElementTree.fromstring(svg.encode('utf-8'))
+
+    def test_labels(self):
+        import io
+        from labels import Label
+        stream = io.StringIO()
+        self.chart.render([self.betelgeuse], stream, labels={
+            'HIP27989': Label('Betelgeuse & co', 10, 20, 'start')})
+        self.assertIn('>Betelgeuse &amp; co</text>', stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
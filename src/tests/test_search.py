@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from objects import CelestialObject
+from search import normalize, alias_keys, SearchIndex, build_search_index
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        from utils import EquatorialCoordinate
+
+        def star(identifier, magnitude, *aliases):
+            o = CelestialObject(identifier, 'HIP', type=0,
+                    ra=EquatorialCoordinate(0, degrees=True),
+                    dec=EquatorialCoordinate(0, degrees=True),
+                    magnitude=magnitude)
+            for alias, catalog in aliases:
+                o.add_alias(alias, catalog)
+            return o
+
+        objects = [
+            star('27989', 0.45, ('39801', 'HD'), ('Betelgeuse', None)),
+            star('24436', 0.18, ('34085', 'HD'), ('Rigel', None)),
+            star('1', 9.1, ('224700', 'HD')),
+            star('2', 9.3, ('224690', 'HD')),
+        ]
+        orion_nebula = CelestialObject('1976', 'NGC', type=7, magnitude=4)
+        orion_nebula.add_alias('42', 'M')
+        orion_nebula.add_alias('The Orion Nebula')
+        objects.append(orion_nebula)
+        objects.extend(star(str(i), 12, ('2' * 3 + str(i), 'HD')) 
+                for i in range(100, 200))
+
+        self.index = build_search_index(objects)
+
+    def test_normalize(self):
+        self.assertEqual(normalize('M 42'), 'm42')
+        self.assertEqual(alias_keys('The Orion Nebula'), 
+                ['theorionnebula', 'orionnebula', 'nebula'])
+
+    def test_exact(self):
+        self.assertEqual(self.index.search('M 42')[0].id, 'NGC1976')
+        self.assertEqual(self.index.search('hd39801')[0].id, 'HIP27989')
+
+    def test_prefix(self):
+        results = self.index.search('betel')
+        self.assertEqual(results[0].id, 'HIP27989')
+        self.assertEqual(results[0].alias, 'Betelgeuse')
+        self.assertEqual(self.index.search('orion')[0].alias, 
+                'The Orion Nebula')
+
+    def test_brightness(self):
+        # Both HD224... stars match; the brighter one ranks first
+        results = self.index.search('HD224', k=2)
+        self.assertEqual([r.id for r in results], ['HIP1', 'HIP2'])
+
+    def test_precomputed_prefix(self):
+        # 'hd' has more than PREFIX_RANGE keys
+        self.assertIn('hd', self.index.prefixes)
+        results = self.index.search('hd', k=3)
+        self.assertEqual([r.id for r in results], 
+                ['HIP24436', 'HIP27989', 'HIP1'])
+
+    def test_precomputed_prefix_exact(self):
+        # A faint exact match still comes first under a crowded prefix
+        objects = [CelestialObject(str(i), 'NGC', type=0, magnitude=1)
+                for i in range(100, 200)]
+        objects.append(CelestialObject('1', 'NGC', type=0, magnitude=15))
+        index = build_search_index(objects)
+        self.assertIn('ngc1', index.prefixes)
+        self.assertEqual(index.search('NGC 1')[0].id, 'NGC1')
+
+    def test_fuzzy(self):
+        self.assertEqual(self.index.search('betelguese')[0].id, 'HIP27989')
+        self.assertEqual(self.index.search('rigl')[0].id, 'HIP24436')
+        self.assertEqual(self.index.search('zzzz'), [])
+
+    def test_repeated_trigrams(self):
+        # Similarity counts an entry's distinct trigrams, not its length
+        o = CelestialObject('1', 'X', type=0, magnitude=1)
+        o.add_alias('Aaaaaaaa')
+        index = build_search_index([o])
+        entry = index.normalized.index('aaaaaaaa')
+        self.assertEqual(index.trigram_counts[entry], 3)
+
+    def test_save_load(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search.json')
+            self.index.save(path)
+            index = SearchIndex.load(path)
+        self.assertEqual(index.search('betel'), self.index.search('betel'))
+        self.assertEqual(index.search('hd'), self.index.search('hd'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from tests import CATALOGS_DIR
+from shared import SharedCatalog
+
+
+class TestSharedCatalog(unittest.TestCase):
+    def setUp(self):
+        import io
+        from objects import NGCCatalog
+
+        ngc = '''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+5194,13h 29m 52.1s,"+47º 11' 43""",CVn,Gxy,11'X7.8',163,8.5,9.1,"M 51A, UGC 8493"
+1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4,"M 42, LBN 974, Sh2-281"'''
+        self.objects = list(NGCCatalog(io.StringIO(ngc)).values())
+        self.shared = SharedCatalog.create(self.objects)
+
+    def tearDown(self):
+        self.shared.close()
+        self.shared.unlink()
+
+    def test_create(self):
+        self.assertEqual(len(self.shared), 2)
+        self.assertEqual(self.shared.id(1), 'NGC1976')
+        self.assertEqual(list(self.shared['magnitude']), [8.5, 4.0])
+        self.assertEqual(self.shared.type(0), 'Galaxy')
+
+    def test_attach(self):
+        with SharedCatalog(self.shared.name) as attached:
+            self.assertEqual(len(attached), 2)
+            self.assertAlmostEqual(attached['ra'][1], 83.82166666666667)
+            self.assertEqual(attached.aliases(1), 
+                    ['NGC1976', 'M42', 'LBN974', 'Sh2281'])
+            self.assertEqual(attached.lookup('M 42'), [1])
+            self.assertEqual(attached.lookup('ngc5194'), [0])
+            self.assertEqual(attached.lookup('M 31'), [])
+
+    def test_read_only(self):
+        with SharedCatalog(self.shared.name) as attached:
+            with self.assertRaises(TypeError):
+                attached['magnitude'][0] = 1
+
+    def test_attach_other_process(self):
+        import subprocess
+        import sys
+        script = ("from shared import SharedCatalog\n"
+                "with SharedCatalog({!r}) as ngc:\n"
+                "    print(ngc.id(ngc.lookup('M42')[0]))\n").format(
+                        self.shared.name)
+        output = subprocess.check_output([sys.executable, '-c', script],
+                cwd=CATALOGS_DIR)
+        self.assertEqual(output.strip(), b'NGC1976')
+        # The block outlives the attached process
+        self.assertEqual(self.shared.id(0), 'NGC5194')
+
+    def test_empty(self):
+        with SharedCatalog.create([]) as empty:
+            self.assertEqual(len(empty), 0)
+            self.assertEqual(empty.lookup('M42'), [])
+            empty.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+
+import unittest
+
+from constellations import Line
+from milkyway import MilkyWayOutline
+from snapshot import FrozenError, freeze, load_snapshot, SnapshotCache
+
+
+class TestSnapshot(unittest.TestCase):
+    orion = "ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000\n"
+    ngc = '''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+1976,05h 35m 17.2s,"-05º 23' 27""",Ori,OC+Neb,90'X60',…,…,4,"M 42, LBN 974, Sh2-281"
+'''
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.const_path = os.path.join(self.directory.name, 'const.csv')
+        with open(self.const_path, 'w') as f:
+            f.write(self.orion)
+        self.ngc_path = os.path.join(self.directory.name, 'ngc.csv')
+        with open(self.ngc_path, 'w') as f:
+            f.write(self.ngc)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def catalogs(self):
+        from objects import NGCCatalog
+        from constellations import ConstellationCatalog
+        return {'ngc': NGCCatalog, 'constellations': ConstellationCatalog}
+
+    def test_freeze_object(self):
+        from objects import NGCCatalog, NGCObject
+        snapshot = load_snapshot(NGCCatalog, self.ngc_path, 'ngc')
+        m42 = snapshot['1976']
+        self.assertTrue(isinstance(m42, NGCObject))
+        self.assertEqual(m42.aliases[1], 'M42')
+        self.assertEqual(m42.size.major, 90)
+        with self.assertRaises(FrozenError):
+            m42.magnitude = 1
+        with self.assertRaises(FrozenError):
+            m42.add_alias('The Orion Nebula')
+        self.assertIs(freeze(m42), m42)
+
+    def test_freeze_constellation(self):
+        from constellations import ConstellationCatalog
+        snapshot = load_snapshot(ConstellationCatalog, self.const_path)
+        orion = snapshot['ORI']
+        self.assertEqual(len(orion.lines[0].positions), 3)
+        with self.assertRaises(AttributeError):
+            orion.lines.append(Line())
+        with self.assertRaises(AttributeError):
+            orion.lines[0].positions.append(None)
+        with self.assertRaises(FrozenError):
+            orion.name = 'Orion'
+
+    def test_freeze_milky_way(self):
+        outline = freeze(MilkyWayOutline('MW1', 'edge', 'Edge', 
+            [(90, 0), (91.5, 0.1), (93, 0)]))
+        self.assertEqual(outline.lines(0), [[(90, 0), (91.5, 0.1), (93, 0)]])
+        with self.assertRaises(AttributeError):
+            outline.levels[0][0][1].append((94, 0))
+        with self.assertRaises(FrozenError):
+            outline.kind = 'dark'
+
+    def test_load_milky_way(self):
+        # The Milky Way's levels are cached next to its file
+        from milkyway import LEVELS_SUFFIX, MilkyWayCatalog
+        path = os.path.join(self.directory.name, 'milkyway.csv')
+        with open(path, 'w') as f:
+            f.write("edge,Edge,6.000000,0.0000,6.100000,0.1000,6.200000,0.0000\n")
+        snapshot = load_snapshot(MilkyWayCatalog, path, 'milkyway')
+        self.assertTrue(os.path.exists(path + LEVELS_SUFFIX))
+        self.assertEqual(len(snapshot), 1)
+
+    def test_snapshot_read_only(self):
+        from constellations import ConstellationCatalog
+        snapshot = load_snapshot(ConstellationCatalog, self.const_path)
+        self.assertEqual(list(snapshot), ['ORI'])
+        with self.assertRaises(TypeError):
+            snapshot['GEM'] = None
+
+    def test_cache(self):
+        cache = SnapshotCache(self.catalogs())
+        snapshot = cache.load('constellations', self.const_path)
+        self.assertIs(cache.load('constellations', self.const_path), 
+                snapshot)
+
+    def test_cache_rebuild(self):
+        cache = SnapshotCache(self.catalogs())
+        snapshot = cache.load('constellations', self.const_path)
+
+        with open(self.const_path, 'a') as f:
+            f.write("GEM,7.576667,31.8833,7.485278,31.7833\n")
+        os.utime(self.const_path, ns=(0, snapshot.mtime + 1))
+
+        # The current snapshot is still served while the new one builds
+        self.assertIs(cache.load('constellations', self.const_path),
+                snapshot)
+        cache.wait()
+        rebuilt = cache.load('constellations', self.const_path)
+        self.assertEqual(sorted(rebuilt), ['GEM', 'ORI'])
+        self.assertEqual(list(snapshot), ['ORI'])
+
+    def test_cache_rebuild_foreground(self):
+        cache = SnapshotCache(self.catalogs(), background=False)
+        snapshot = cache.load('ngc', self.ngc_path)
+        os.utime(self.ngc_path, ns=(0, snapshot.mtime + 1))
+        self.assertIsNot(cache.load('ngc', self.ngc_path), snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
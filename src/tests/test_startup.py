@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import sys
+import time
+import subprocess
+
+import unittest
+
+from tests import CATALOGS_DIR
+
+### Startup Budget
+# Most exports are small, and for a small export startup is most of the
+# time it takes. `jsontool` only imports the modules an export uses
+# when it uses them; these tests keep it that way.
+#
+# Budgets are fractions of the time it takes to import the deferred
+# catalog modules in the same run, so they hold on slow machines too.
+# There are also limits in seconds, about eight times what was measured
+# on a developer machine (19ms to import jsontool, 30ms for `--help`
+# beyond starting Python), to catch startup creeping up everywhere.
+
+# The longest `import jsontool` may take, as a fraction of importing the
+# deferred catalog modules after it
+IMPORT_BUDGET = 0.5
+
+# The longest `jsontool.py --help` may take beyond starting Python, as a
+# fraction of importing jsontool and the deferred catalog modules
+COLD_START_BUDGET = 0.75
+
+# The longest `import jsontool` and `jsontool.py --help` (beyond
+# starting Python) may take, in seconds
+IMPORT_SECONDS = 0.15
+COLD_START_SECONDS = 0.25
+
+# Modules that `import jsontool` shouldn't import
+DEFERRED_MODULES = ('unittest', 'objects', 'constellations', 'query',
+        'milkyway', 'labels', 'visibility', 'ephemeris', 'planner',
+        'database', 'sqlite3', 'columnar', 'diff', 'search', 'density',
+        'render', 'xml.sax', 'cache', 'partitions', 'shared',
+        'multiprocessing', 'calendar', 'projections', 'frames', 'utils')
+
+# The catalog modules `jsontool` defers, to measure budgets against
+CATALOG_MODULES = ('objects', 'constellations', 'query', 'milkyway', 
+        'labels', 'visibility', 'ephemeris', 'planner', 'database', 
+        'columnar', 'diff', 'search', 'density', 'render', 'cache', 
+        'partitions', 'shared')
+
+
+# Run Python with the given arguments in the catalogs directory, and
+# return the fastest of `runs` wall-clock times and the last output.
+def _run(args, runs=5):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        output = subprocess.check_output([sys.executable] + args,
+                cwd=CATALOGS_DIR)
+        times.append(time.perf_counter() - start)
+    return min(times), output
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_deferred_imports(self):
+        elapsed, output = _run(['-c', 'import sys, jsontool; '
+            'print(" ".join(sorted(sys.modules)))'], runs=1)
+        imported = set(output.decode('utf-8').split())
+        self.assertEqual(sorted(imported.intersection(DEFERRED_MODULES)), [])
+
+    def test_import_budget(self):
+        elapsed, output = _run(['-c', 'import time; '
+            't = time.perf_counter(); import jsontool; '
+            'print(time.perf_counter() - t); '
+            't = time.perf_counter(); import {}; '
+            'print(time.perf_counter() - t)'.format(
+                ', '.join(CATALOG_MODULES))])
+        jsontool, catalogs = [float(t) for t in output.split()]
+        self.assertLess(jsontool, IMPORT_BUDGET * catalogs)
+        self.assertLess(jsontool, IMPORT_SECONDS)
+
+    def test_cold_start_budget(self):
+        python, output = _run(['-c', 'pass'])
+        eager, output = _run(['-c', 'import jsontool, {}'.format(
+            ', '.join(CATALOG_MODULES))])
+        elapsed, output = _run(['jsontool.py', '--help'])
+        self.assertIn(b'--ngc', output)
+        self.assertLess(elapsed - python, 
+                COLD_START_BUDGET * (eager - python))
+        self.assertLess(elapsed - python, COLD_START_SECONDS)
+
+    def test_choices(self):
+        # The option choices jsontool lists without importing anything
+        from jsontool import PROJECTION_NAMES, FRAME_NAMES
+        from projections import PROJECTIONS
+        from frames import FRAMES
+        self.assertEqual(PROJECTION_NAMES, tuple(sorted(PROJECTIONS)))
+        self.assertEqual(FRAME_NAMES, FRAMES)
+
+
+if __name__ == "__main__":
+    unittest.main()
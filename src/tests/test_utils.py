@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import unittest
+
+from decimal import Decimal
+from utils import EquatorialCoordinate
+
+
+class TestEquatorialCoordinate(unittest.TestCase):
+    def test_hours(self):
+        # This tests the hour coordinate parsing and conversions using
+        # M42.
+        e = EquatorialCoordinate('05h 35m 17.2s')
+        self.assertEqual(
+                Decimal(e.hours).quantize(Decimal('1.00000')),
+                Decimal('5.58811'))
+        self.assertEqual(
+                Decimal(e.radians).quantize(Decimal('1.000')),
+                Decimal('1.463'))
+
+    def test_degrees(self):
+        # This tests the degree coordinate parsing and conversions using
+        # M42.
+
+        # Plain float number
+        e = EquatorialCoordinate(-5.39083, degrees=True)
+        self.assertEqual(e.degrees, -5.39083)
+        self.assertEqual(
+                Decimal(e.radians).quantize(Decimal('1.00000')),
+                Decimal('-0.09409'))
+
+        # Float with a degree symbol as a string
+        e = EquatorialCoordinate('-5.39083°')
+        self.assertEqual(e.degrees, -5.39083)
+        self.assertEqual(
+                Decimal(e.radians).quantize(Decimal('1.00000')),
+                Decimal('-0.09409'))
+
+        # DMS one way
+        e = EquatorialCoordinate('-05º 23\' 27"')
+        self.assertEqual(
+                Decimal(e.degrees).quantize(Decimal('1.00000')),
+                Decimal('-5.39083'))
+        self.assertEqual(
+                Decimal(e.radians).quantize(Decimal('1.00000')),
+                Decimal('-0.09409'))
+
+        # DMS another way
+        e = EquatorialCoordinate('-5° 23′ 27″')
+        self.assertEqual(
+                Decimal(e.degrees).quantize(Decimal('1.00000')),
+                Decimal('-5.39083'))
+        self.assertEqual(
+                Decimal(e.radians).quantize(Decimal('1.00000')),
+                Decimal('-0.09409'))
+
+        # DMS a final way
+        e = EquatorialCoordinate('-5d 23m 27s')
+        self.assertEqual(
+                Decimal(e.degrees).quantize(Decimal('1.00000')),
+                Decimal('-5.39083'))
+        self.assertEqual(
+                Decimal(e.radians).quantize(Decimal('1.00000')),
+                Decimal('-0.09409'))
+
+        # This should cause an exception
+        with self.assertRaises(ValueError):
+            e = EquatorialCoordinate("I'm clearly not a coordinate")
+
+    def test_reverse_hours(self):
+        pass
+
+    def test_reverse_degrees(self):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import datetime
+
+import unittest
+
+from visibility import sidereal_time, month_window, visible, visible_objects
+
+
+class TestVisibility(unittest.TestCase):
+    def test_sidereal_time(self):
+        # GMST at 0h UT on 2000-01-01 is 6.6645h
+        self.assertAlmostEqual(
+                sidereal_time(datetime.datetime(2000, 1, 1)), 6.6645,
+                places=3)
+
+    def test_month_window(self):
+        # January evenings: the window starts around 2h sidereal time
+        # and lasts the six hours plus about two for the month.
+        window = month_window(2015, 1, hours=(20, 2))
+        self.assertAlmostEqual(window.start, 2.74, places=1)
+        self.assertAlmostEqual(window.hours, 8.0, places=1)
+
+    def test_visible(self):
+        window = month_window(2015, 1, hours=(20, 2))
+        # Betelgeuse, Polaris, Antares and the south celestial pole from
+        # New York in January.
+        self.assertEqual(
+                visible([5.92, 2.53, 16.49, 0], [7.4, 89.26, -26.4, -89],
+                    40.75, window, min_altitude=10),
+                [True, True, False, False])
+
+    def test_visible_all_night(self):
+        window = month_window(2015, 1, hours=(0, 0))
+        self.assertEqual(window.hours, 24)
+        self.assertEqual(visible([16.49], [-26.4], 40.75, window), [True])
+
+    def test_visible_objects(self):
+        import io
+        from constellations import ConstellationCatalog
+        from objects import HYGStar
+
+        betelgeuse = HYGStar(StarID='27919', HIP='27989', HD='39801',
+                HR='2061', BayerFlamsteed='58Alp Ori',
+                ProperName='Betelgeuse', RA='5.91952477', Dec='07.40703634',
+                Mag='0.45', AbsMag='-5.1373773102256', Spectrum='M2Ib',
+                ColorIndex='1.500')
+        catalog = ConstellationCatalog(io.StringIO(
+                "ORI,5.679444,-1.9500,5.603333,-1.2000\n"
+                "SCO,16.490,-26.43,16.836,-34.29"))
+
+        objects = visible_objects(
+                [betelgeuse, catalog['ORI'], catalog['SCO']], 40.75,
+                month_window(2015, 1), min_altitude=10)
+        self.assertEqual(objects, [betelgeuse, catalog['ORI']])
+
+    def test_visible_boundaries(self):
+        import io
+        from constellations import BoundaryCatalog
+
+        # Constellations with boundaries and no lines
+        catalog = BoundaryCatalog(io.StringIO(
+                " 5.0 10.0 ORI  O\n 6.0 10.0 ORI  O\n 6.0  0.0 ORI  O\n"
+                "16.5 -30.0 SCO  O\n16.9 -30.0 SCO  O\n16.9 -35.0 SCO  O\n"))
+
+        objects = visible_objects([catalog['ORI'], catalog['SCO']], 40.75,
+                month_window(2015, 1), min_altitude=10)
+        self.assertEqual(objects, [catalog['ORI']])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*- 
+# Copyright 2010-2014 Will Barton. 
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without 
+# modification, are permitted provided that the following conditions
+# are met:
+# 
+#   1. Redistributions of source code must retain the above copyright 
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright 
+#      notice, this list of conditions and the following disclaimer in the 
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY
+# AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL
+# THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS;
+# OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR
+# OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+import json
+
+import unittest
+
+from worker import request_argv, Worker
+
+
+class TestWorker(unittest.TestCase):
+    orion = '''ORI,5.679444,-1.9500,5.603333,-1.2000,5.533611,-0.3000
+ORI,6.039722,9.6500,6.198889,14.2167,6.065278,20.1333
+GEM,7.576667,31.8833,7.485278,31.7833,7.185833,30.2500'''
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.const_path = os.path.join(self.directory.name, 'const.csv')
+        with open(self.const_path, 'w') as f:
+            f.write(self.orion)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_request_argv(self):
+        self.assertEqual(
+                request_argv({'ngc': 'ngc.csv', 'magnitude': 6,
+                    'geojson': True, 'invert_ra': False}),
+                ['--ngc', 'ngc.csv', '--magnitude', '6', '--geojson'])
+
+    def test_handle_result(self):
+        worker = Worker()
+        response = json.loads(worker.handle(json.dumps(
+            {'constellations': self.const_path, 'geojson': True,
+                'specifically': 'ORI'})))
+        self.assertEqual(response['objects'], 1)
+        self.assertEqual(response['result']['features'][0]['properties']['id'],
+                'ORI')
+
+    def test_handle_out(self):
+        worker = Worker()
+        out = os.path.join(self.directory.name, 'out.json')
+        response = json.loads(worker.handle(json.dumps(
+            {'constellations': self.const_path, 'geojson': True,
+                'out': out, 'indent': 2})))
+        self.assertEqual(response, {'objects': 2, 'out': out})
+        with open(out) as f:
+            self.assertEqual(len(json.load(f)['features']), 2)
+
+    def test_catalogs_loaded_once(self):
+        worker = Worker()
+        request = json.dumps({'constellations': self.const_path,
+            'geojson': True})
+        worker.handle(request)
+        catalog = worker.catalogs.load('constellations', self.const_path)
+        worker.handle(request)
+        self.assertIs(
+                worker.catalogs.load('constellations', self.const_path),
+                catalog)
+
+    def test_handle_cached(self):
+        worker = Worker()
+        cache_dir = os.path.join(self.directory.name, 'cache')
+        request = json.dumps({'constellations': self.const_path,
+            'geojson': True, 'cache_dir': cache_dir})
+        first = worker.handle(request)
+        self.assertEqual(worker.handle(request), first)
+        self.assertEqual(worker.caches[cache_dir].stats['memory_hits'], 1)
+
+    def test_handle_density(self):
+        # The density magnitudes select the objects, not --magnitude
+        ngc_path = os.path.join(self.directory.name, 'ngc.csv')
+        with open(ngc_path, 'w') as f:
+            f.write('''NGCNo,RA_2000,DEC_2000,Const,ObjectType,Size,PA,Vmag,Bmag,AlsoCatalogedAs
+224,00h 42m 44.3s,"+41º 16' 9""",And,Gxy,190'X60',35,3.4,4.4,"M 31, UGC 454"
+5194,13h 29m 52.1s,"+47º 11' 43""",CVn,Gxy,11'X7.8',163,8.5,9.1,"M 51A, UGC 8493"''')
+        worker = Worker()
+        response = json.loads(worker.handle(json.dumps(
+            {'ngc': ngc_path, 'density': True, 'density_cells': '4,2',
+                'density_magnitudes': '8,12'})))
+        self.assertEqual(response['objects'], 1)
+        self.assertEqual(sum(response['result']['counts']), 1)
+
+    def test_handle_help(self):
+        # Help would end up in the middle of the responses
+        import io
+        import contextlib
+        worker = Worker()
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            response = json.loads(worker.handle(json.dumps({'help': True})))
+            self.assertIn('error', response)
+            response = json.loads(worker.handle(json.dumps({'h': True})))
+            self.assertIn('error', response)
+        self.assertEqual(stdout.getvalue(), '')
+
+    def test_handle_errors(self):
+        worker = Worker()
+        self.assertIn('error', json.loads(worker.handle('[]')))
+        self.assertIn('error', json.loads(worker.handle(
+            json.dumps({'worker': True}))))
+        self.assertIn('error', json.loads(worker.handle(
+            json.dumps({'constellations': '/does/not/exist.csv'}))))
+        # Bad patterns don't stop the worker
+        response = json.loads(worker.handle(json.dumps(
+            {'constellations': self.const_path, 'specifically': '('})))
+        self.assertIn('error', response)
+        response = json.loads(worker.handle(json.dumps(
+            {'constellations': self.const_path, 'geojson': True})))
+        self.assertEqual(response['objects'], 2)
+        # Only GeoJSON exports record a version to patch from
+        self.assertIn('error', json.loads(worker.handle(
+            json.dumps({'constellations': self.const_path, 
+                'previous': self.const_path, 'patch': 'patch.json'}))))
+
+
+if __name__ == "__main__":
+    unittest.main()